@@ -1,5 +1,11 @@
+from django.conf import settings
 from django.contrib import admin
-from .models import Assessment, Test, Domain, Skill, Item  # keep only models that exist
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from . import facets, item_index, jobs
+from .models import Assessment, Test, Domain, Skill, Classroom, Item, Job  # keep only models that exist
+
+ADMIN_COUNT_CAP = 10000
 
 @admin.register(Assessment)
 class AssessmentAdmin(admin.ModelAdmin):
@@ -23,8 +29,100 @@ class SkillAdmin(admin.ModelAdmin):
     list_filter = ("domain", "code")
     search_fields = ("code", "name")
 
+class FacetListFilter(admin.SimpleListFilter):
+    """Item column filter whose choices come from the facet table (api.facets), not SELECT DISTINCT."""
+    field = ""
+
+    def lookups(self, request, model_admin):
+        return [(value, f"{value} ({count})") for value, count in facets.values(self.field)]
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(**{self.field: self.value()})
+        return queryset
+
+def facet_filter(field):
+    return type(f"{field.title()}FacetFilter", (FacetListFilter,), {
+        "field": field, "title": field.replace("_", " "), "parameter_name": field,
+    })
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator without an exact COUNT over the whole table: the
+    unfiltered count comes from the item index, filtered counts stop at
+    ADMIN_COUNT_CAP rows (later pages are reached by narrowing the filter).
+    """
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if not qs.query.where:
+            index = item_index.get_index()
+            if index is not None:
+                return index.count
+        return qs.order_by()[:ADMIN_COUNT_CAP].count()
+
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
     list_display = ("uid", "program", "module", "difficulty", "primary_class_cd", "skill")
-    list_filter = ("program", "module", "difficulty", "primary_class_cd")
+    list_select_related = ("skill",)
     search_fields = ("question_id", "uid")
+    autocomplete_fields = ("assessment", "test", "domain", "skill", "duplicate_of")
+    changelist_columns = ("uid", "program", "module", "difficulty", "primary_class_cd", "skill__code", "skill__name")
+
+    def get_list_filter(self, request):
+        if settings.ADMIN_PERFORMANCE_MODE:
+            return [facet_filter(field) for field in facets.FACET_FIELDS]
+        return facets.FACET_FIELDS
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = EstimatedCountPaginator if settings.ADMIN_PERFORMANCE_MODE else Paginator
+        return paginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    def get_changelist_instance(self, request):
+        # skip the second, unfiltered COUNT behind "N results (M total)"
+        self.show_full_result_count = not settings.ADMIN_PERFORMANCE_MODE
+        return super().get_changelist_instance(request)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        match = request.resolver_match
+        if match and match.url_name == "api_item_changelist":
+            qs = qs.only(*self.changelist_columns)
+        return qs
+
+@admin.register(Classroom)
+class ClassroomAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "teacher", "created_at")
+    search_fields = ("name", "teacher__email")
+    filter_horizontal = ("students",)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "progress", "rate", "eta", "worker", "created_at", "finished_at")
+    list_filter = ("status", "kind")
+    readonly_fields = ("status", "cancel_requested", "done", "total", "run_start_done", "checkpoint", "message",
+                       "worker", "started_at", "heartbeat_at", "finished_at")
+    actions = ("cancel_jobs", "resume_jobs")
+
+    @admin.display(description="progress")
+    def progress(self, obj):
+        return f"{obj.done}/{obj.total}" if obj.total else str(obj.done)
+
+    @admin.display(description="per s")
+    def rate(self, obj):
+        return f"{obj.throughput:.1f}" if obj.throughput else "-"
+
+    @admin.display(description="ETA s")
+    def eta(self, obj):
+        return f"{obj.eta_seconds:.0f}" if obj.eta_seconds is not None else "-"
+
+    @admin.action(description="Cancel selected jobs")
+    def cancel_jobs(self, request, queryset):
+        for job in queryset:
+            jobs.cancel(job)
+
+    @admin.action(description="Resume selected jobs from their checkpoint")
+    def resume_jobs(self, request, queryset):
+        for job in queryset:
+            jobs.resume(job)
@@ -1,6 +1,20 @@
+import logging
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from . import auth_views  # noqa: F401  (cache invalidation receivers)
+        # Map the item index once at startup so forked workers share the pages.
+        from . import item_index
+
+        try:
+            item_index.get_index()
+        except (OSError, ValueError) as exc:
+            logger.warning("Item index not loaded: %s", exc)
@@ -0,0 +1,160 @@
+"""
+Content-addressed store for images/SVGs embedded in scraped item HTML.
+
+The importer pulls data: URIs, inline <svg> elements and (optionally)
+remote image links out of stems/rationales/content into files named by
+the hash of their bytes under ITEM_ASSET_ROOT, and rewrites the markup to
+point at ITEM_ASSET_URL. Identical assets are stored once.
+
+ITEM_ASSET_ROOT lives outside STATIC_ROOT: WhiteNoise only indexes static
+files at startup and `collectstatic --clear` empties STATIC_ROOT, so
+assets written by a running import are served by asset_view instead, with
+far-future immutable cache headers (names never change content).
+"""
+import base64
+import binascii
+import hashlib
+import html
+import mimetypes
+import os
+import re
+import tempfile
+import urllib.request
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import unquote_to_bytes
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.utils.cache import patch_cache_control
+
+MIME_EXT = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/svg+xml": "svg",
+}
+EXT_RE = re.compile(r"\.(png|jpe?g|gif|webp|svg)(?:[?#]|$)", re.I)
+
+DATA_URI_RE = re.compile(
+    r"""(?P<q>["'])data:(?P<mime>image/[\w.+-]+)(?P<b64>;base64)?,(?P<data>[^"']*)(?P=q)""", re.I
+)
+REMOTE_SRC_RE = re.compile(r"""(?P<attr>\bsrc\s*=\s*)(?P<q>["'])(?P<url>https?://[^"']+)(?P=q)""", re.I)
+SVG_RE = re.compile(r"<svg\b[^>]*>.*?</svg\s*>", re.I | re.S)
+SVG_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title\s*>", re.I | re.S)
+
+NAME_RE = re.compile(r"^[0-9a-f]{32}\.(png|jpg|gif|webp|svg)$")
+
+MAX_REMOTE_BYTES = 5 * 1024 * 1024
+
+
+class AssetStore:
+    def __init__(self, root: Optional[Path] = None, url_prefix: Optional[str] = None, fetch_remote: bool = False):
+        self.root = Path(root or settings.ITEM_ASSET_ROOT)
+        self.url_prefix = url_prefix or settings.ITEM_ASSET_URL
+        self.fetch_remote = fetch_remote
+        self.stored = 0
+        self.reused = 0
+        self._remote: Dict[str, str] = {}
+
+    # ---- storage ----
+    def save(self, data: bytes, ext: str) -> str:
+        """Store bytes once under their content hash; return the public URL."""
+        name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+        path = self.root / name
+        if path.exists():
+            self.reused += 1
+        else:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+            self.stored += 1
+        return self.url_prefix + name
+
+    # ---- rewriting ----
+    def rewrite_html(self, html: str) -> str:
+        if not html or ("data:" not in html and "<svg" not in html.lower() and not self.fetch_remote):
+            return html
+        html = DATA_URI_RE.sub(self._data_uri, html)
+        html = SVG_RE.sub(self._inline_svg, html)
+        if self.fetch_remote:
+            html = REMOTE_SRC_RE.sub(self._remote_src, html)
+        return html
+
+    def rewrite(self, value):
+        """rewrite_html() applied to every string inside a JSON-like value."""
+        if isinstance(value, str):
+            return self.rewrite_html(value)
+        if isinstance(value, list):
+            return [self.rewrite(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self.rewrite(v) for k, v in value.items()}
+        return value
+
+    def _data_uri(self, m) -> str:
+        ext = MIME_EXT.get(m.group("mime").lower())
+        if not ext:
+            return m.group(0)
+        try:
+            if m.group("b64"):
+                data = base64.b64decode(re.sub(r"\s+", "", m.group("data")), validate=True)
+            else:
+                data = unquote_to_bytes(m.group("data"))
+        except (binascii.Error, ValueError):
+            return m.group(0)
+        q = m.group("q")
+        return f"{q}{self.save(data, ext)}{q}"
+
+    def _inline_svg(self, m) -> str:
+        svg = m.group(0)
+        if "xmlns=" not in svg[:svg.index(">")]:
+            svg = "<svg" + ' xmlns="http://www.w3.org/2000/svg"' + svg[4:]
+        title = SVG_TITLE_RE.search(svg)
+        alt = html.unescape(re.sub(r"<[^>]+>", "", title.group(1))).strip() if title else ""
+        return f'<img src="{self.save(svg.encode("utf-8"), "svg")}" alt="{html.escape(alt)}">'
+
+    def _remote_src(self, m) -> str:
+        url = m.group("url")
+        if url.startswith(self.url_prefix):
+            return m.group(0)
+        if url not in self._remote:
+            self._remote[url] = self._fetch(url) or url
+        return f"{m.group('attr')}{m.group('q')}{self._remote[url]}{m.group('q')}"
+
+    def _fetch(self, url: str) -> Optional[str]:
+        try:
+            with urllib.request.urlopen(url, timeout=15) as r:
+                mime = (r.headers.get_content_type() or "").lower()
+                data = r.read(MAX_REMOTE_BYTES + 1)
+        except (OSError, ValueError):
+            return None
+        ext = MIME_EXT.get(mime)
+        if not ext:
+            m = EXT_RE.search(url)
+            ext = m and m.group(1).lower().replace("jpeg", "jpg")
+        if not ext or len(data) > MAX_REMOTE_BYTES:
+            return None
+        return self.save(data, ext)
+
+
+def asset_view(request, name):
+    """Serve one stored asset (see module docstring)."""
+    if not NAME_RE.match(name):
+        raise Http404
+    path = Path(settings.ITEM_ASSET_ROOT) / name
+    try:
+        f = path.open("rb")
+    except FileNotFoundError:
+        raise Http404
+    response = FileResponse(f, content_type=mimetypes.guess_type(name)[0])
+    patch_cache_control(response, public=True, max_age=365 * 24 * 3600, immutable=True)
+    response["X-Content-Type-Options"] = "nosniff"
+    if name.endswith(".svg"):
+        # scraped SVGs are opened directly too; never let them run script
+        response["Content-Security-Policy"] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+    return response
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.base_user import BaseUserManager
+from django.db.models.functions import Lower
+
+from . import hashing
+
+
+def normalize_email(email):
+    """How emails are stored and looked up (domain part lowercased)."""
+    return BaseUserManager.normalize_email((email or "").strip())
+
+
+def users_by_email(email):
+    """
+    Users whose email matches case-insensitively: one probe on the unique
+    lower(email) index (migration 0021). Accounts keep the case they were
+    created with, so an exact match would lock out e.g. Bob@Example.com.
+    """
+    User = get_user_model()
+    return (
+        # email > '' matches the partial index's WHERE clause (exclude() would not)
+        User._default_manager.filter(email__gt="")
+        .annotate(email_ci=Lower("email"))
+        .filter(email_ci=normalize_email(email).lower())
+    )
+
+
+class EmailBackend(ModelBackend):
+    """
+    Authenticate with email + password in one query on the unique
+    lower(auth_user.email) index. ModelBackend stays configured for
+    username logins (admin).
+    """
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if not email or password is None:
+            return None
+        User = get_user_model()
+        try:
+            user = users_by_email(email).get()
+        except User.DoesNotExist:
+            # run the hasher anyway so timing doesn't reveal which emails exist
+            hashing.hash_password(password)
+            return None
+        # hashing runs on the bounded pool (api.hashing); may raise HashingBusy
+        if hashing.verify_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
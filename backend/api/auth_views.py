@@ -1,10 +1,75 @@
-from django.contrib.auth import authenticate, login, logout
+from django.conf import settings
+from django.contrib.auth import HASH_SESSION_KEY, SESSION_KEY, authenticate, login, logout
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.middleware.csrf import get_token
 import json
+import re
+
+from . import hashing
+from .auth_backends import normalize_email, users_by_email
+
+ME_CACHE_SECONDS = 60
+
+
+def user_payload(user):
+    return {
+        'id': user.id,
+        'email': user.email,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_staff': user.is_staff,
+    }
+
+
+def unique_username(base):
+    """`base`, or `base<N>` with the lowest free N, from a single query."""
+    base = re.sub(r"[^\w.@+-]", "", base)[:140] or "user"
+    taken = set(User.objects.filter(username__startswith=base).values_list('username', flat=True))
+    if base not in taken:
+        return base
+    pattern = re.compile(re.escape(base) + r"(\d+)$")
+    suffixes = {int(m.group(1)) for name in taken for m in [pattern.match(name)] if m}
+    return f"{base}{next(n for n in range(1, len(suffixes) + 2) if n not in suffixes)}"
+
+
+def limited(request, email):
+    """
+    429/503 response when this attempt is throttled (per IP, per email) or the
+    hashing pool is saturated; None to go ahead.
+    """
+    ip_limit, email_limit, window = settings.LOGIN_THROTTLE
+    wait = max(
+        hashing.throttle("ip", hashing.client_ip(request), ip_limit, window),
+        hashing.throttle("email", normalize_email(email).lower(), email_limit, window),
+    )
+    if wait:
+        response = JsonResponse({'error': 'Too many attempts, try again shortly'}, status=429)
+        response['Retry-After'] = str(wait)
+        return response
+    return None
+
+
+def busy():
+    response = JsonResponse({'error': 'Server busy, try again shortly'}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _me_key(user_id):
+    return f"auth:me:{user_id}"
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_user(sender, instance, **kwargs):
+    cache.delete(_me_key(instance.pk))
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -19,29 +84,17 @@ def login_view(request):
                 'error': 'Email and password are required'
             }, status=400)
         
-        # Try to find user by email (Django uses username by default)
-        try:
-            user = User.objects.get(email=email)
-            username = user.username
-        except User.DoesNotExist:
-            return JsonResponse({
-                'error': 'Invalid email or password'
-            }, status=401)
-        
-        # Authenticate with username
-        user = authenticate(request, username=username, password=password)
+        throttled = limited(request, email)
+        if throttled:
+            return throttled
+
+        # One indexed lookup by email (api.auth_backends.EmailBackend)
+        user = authenticate(request, email=email, password=password)
         
         if user is not None:
             login(request, user)
             return JsonResponse({
-                'user': {
-                    'id': user.id,
-                    'email': user.email,
-                    'username': user.username,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'is_staff': user.is_staff,
-                },
+                'user': user_payload(user),
                 'message': 'Login successful'
             })
         else:
@@ -53,6 +106,8 @@ def login_view(request):
         return JsonResponse({
             'error': 'Invalid JSON data'
         }, status=400)
+    except hashing.HashingBusy:
+        return busy()
     except Exception as e:
         return JsonResponse({
             'error': 'An error occurred during login'
@@ -73,42 +128,46 @@ def register_view(request):
                 'error': 'Email and password are required'
             }, status=400)
         
+        throttled = limited(request, email)
+        if throttled:
+            return throttled
+        email = normalize_email(email)
+
         # Check if user already exists
-        if User.objects.filter(email=email).exists():
+        if users_by_email(email).exists():
             return JsonResponse({
                 'error': 'User with this email already exists'
             }, status=400)
         
-        # Create username from email
-        username = email.split('@')[0]
-        # Make username unique if it already exists
-        counter = 1
-        original_username = username
-        while User.objects.filter(username=username).exists():
-            username = f"{original_username}{counter}"
-            counter += 1
-        
-        # Create user
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password,
-            first_name=first_name,
-            last_name=last_name
-        )
+        # Hash on the bounded pool, outside the transaction
+        password_hash = hashing.hash_password(password)
+
+        # Create username from email, retrying if a concurrent signup took it
+        user = None
+        for _ in range(3):
+            try:
+                with transaction.atomic():
+                    user = User.objects.create(
+                        username=unique_username(email.split('@')[0]),
+                        email=email,
+                        password=password_hash,
+                        first_name=first_name,
+                        last_name=last_name
+                    )
+                break
+            except IntegrityError:
+                if users_by_email(email).exists():
+                    return JsonResponse({
+                        'error': 'User with this email already exists'
+                    }, status=400)
+        if user is None:
+            raise IntegrityError("could not allocate a unique username")
         
         # Log in the user
-        login(request, user)
+        login(request, user, backend='api.auth_backends.EmailBackend')
         
         return JsonResponse({
-            'user': {
-                'id': user.id,
-                'email': user.email,
-                'username': user.username,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_staff': user.is_staff,
-            },
+            'user': user_payload(user),
             'message': 'Registration successful'
         })
         
@@ -116,6 +175,8 @@ def register_view(request):
         return JsonResponse({
             'error': 'Invalid JSON data'
         }, status=400)
+    except hashing.HashingBusy:
+        return busy()
     except Exception as e:
         return JsonResponse({
             'error': 'An error occurred during registration'
@@ -129,17 +190,22 @@ def logout_view(request):
 
 @require_http_methods(["GET"])
 def me_view(request):
+    # Anonymous requests never touch the session store or the user table
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None:
+        return JsonResponse({'user': None})
+
+    # Cached per user and keyed to the session's auth hash, so a password
+    # change (which saves the user and clears the entry) is re-verified.
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    cached = cache.get(_me_key(user_id))
+    if cached and cached['hash'] == session_hash:
+        return JsonResponse({'user': cached['user']})
+
     if request.user.is_authenticated:
-        return JsonResponse({
-            'user': {
-                'id': request.user.id,
-                'email': request.user.email,
-                'username': request.user.username,
-                'first_name': request.user.first_name,
-                'last_name': request.user.last_name,
-                'is_staff': request.user.is_staff,
-            }
-        })
+        payload = user_payload(request.user)
+        cache.set(_me_key(user_id), {'hash': session_hash, 'user': payload}, ME_CACHE_SECONDS)
+        return JsonResponse({'user': payload})
     else:
         return JsonResponse({'user': None})
 
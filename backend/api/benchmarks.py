@@ -0,0 +1,214 @@
+"""
+Benchmark helpers: synthetic item banks and API latency scenarios.
+
+`write_bank` streams a bank in the import_sat_json input shape (so 1M
+items never sit in memory at once); `run_scenarios` drives the API through
+the Django test client and records latency percentiles and query counts
+per endpoint; `wire_scenarios` records bytes on the wire and CPU per
+request for each response encoding; `compare` checks a run against a stored baseline. See the
+`gen_sat_bank` and `bench` management commands.
+"""
+import json
+import random
+import statistics
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.db import connection
+from django.test import Client
+
+from . import compression
+
+DOMAINS = {
+    "math": [
+        ("H", "Algebra", ["H.A.", "H.B.", "H.C.", "H.D.", "H.E."]),
+        ("P", "Advanced Math", ["P.A.", "P.B.", "P.C."]),
+        ("Q", "Problem-Solving and Data Analysis", ["Q.A.", "Q.B.", "Q.C.", "Q.D.", "Q.E.", "Q.F.", "Q.G."]),
+        ("S", "Geometry and Trigonometry", ["S.A.", "S.B.", "S.C.", "S.D."]),
+    ],
+    "reading": [
+        ("INI", "Information and Ideas", ["CID", "INF", "COE"]),
+        ("CAS", "Craft and Structure", ["WIC", "TSP", "CTC"]),
+        ("EOI", "Expression of Ideas", ["SYN", "TRA"]),
+        ("SEC", "Standard English Conventions", ["BOU", "FSS"]),
+    ],
+}
+WORDS = (
+    "the value of x equation line graph table data shown which choice best most logical completes text "
+    "student researcher passage claim evidence function slope intercept circle triangle angle ratio percent "
+    "mean median survey sample population system solution constant variable expression equivalent"
+).split()
+
+
+def synthetic_item(rng: random.Random, i: int) -> Tuple[str, dict]:
+    module = "math" if i % 2 else "reading"
+    cd, desc, skills = DOMAINS[module][rng.randrange(4)]
+    skill = rng.choice(skills)
+    stem = " ".join(rng.choice(WORDS) for _ in range(rng.randint(25, 120)))
+    if module == "math" and rng.random() < 0.5:
+        stem += f' <math><mi>x</mi><mo>=</mo><mn>{rng.randint(1, 99)}</mn></math>'
+    options = [
+        {"id": uuid.UUID(int=rng.getrandbits(128)).hex, "content": f"<p>{rng.randint(-50, 500)}</p>"}
+        for _ in range(4)
+    ]
+    payload = {
+        "program": rng.choice(["SAT", "SAT", "PSAT/NMSQT", "PSAT 8/9"]),
+        "module": module,
+        "difficulty": rng.choice("EMH"),
+        "primary_class_cd": cd,
+        "primary_class_cd_desc": desc,
+        "skill_cd": skill,
+        "skill_desc": f"{desc} skill {skill}",
+        "questionId": f"{rng.getrandbits(32):08x}",
+        "external_id": uuid.UUID(int=rng.getrandbits(128)).hex,
+        "score_band_range_cd": rng.randint(1, 7),
+        "ibn": None,
+        "content": {
+            "stem": f"<p>{stem}</p>",
+            "rationale": "<p>Choice A is correct. " + " ".join(rng.choice(WORDS) for _ in range(60)) + "</p>",
+            "answerOptions": options,
+            "correct_answer": [rng.choice("ABCD")],
+            "type": "mcq",
+        },
+    }
+    return str(uuid.UUID(int=rng.getrandbits(128))), payload
+
+
+def write_bank(path, n: int, seed: int = 0) -> None:
+    """Stream a synthetic bank of n items to path (import_sat_json shape)."""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i in range(n):
+            uid, payload = synthetic_item(rng, i)
+            f.write(("," if i else "") + json.dumps(uid) + ":" + json.dumps(payload))
+        f.write("}")
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * mult)
+
+
+def default_scenarios(domain_id: Optional[int], deep_page: int) -> List[Tuple[str, str]]:
+    return [
+        ("list", "/api/items/"),
+        ("list full", "/api/items/?full=1"),
+        ("filter domain", f"/api/items/?domain={domain_id or 0}"),
+        ("filter module+difficulty", "/api/items/?module=Math&difficulty=H"),
+        ("search", "/api/items/?search=slope"),
+        ("paginate deep", f"/api/items/?page={deep_page}"),
+        ("modules", "/api/items/modules/"),
+        ("count domain", f"/api/items/count/?domain={domain_id or 0}"),
+        ("sample 20", "/api/items/sample/?n=20&module=math"),
+    ]
+
+
+class QueryCounter:
+    """execute_wrapper that counts queries (unlike connection.queries, not capped)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    samples = []
+    counter = QueryCounter()
+    fn()  # warm-up (fills per-process caches such as api.taxonomy)
+    with connection.execute_wrapper(counter):
+        fn()  # steady-state query count
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "queries": counter.count,
+    }
+
+
+def run_scenarios(scenarios, repeat: int) -> Dict[str, Dict[str, float]]:
+    client = Client()
+    results = {}
+    for name, url in scenarios:
+        def hit(url=url):
+            res = client.get(url, HTTP_HOST="localhost")
+            assert res.status_code == 200, f"{url}: {res.status_code}"
+            return res
+        results[name] = measure(hit, repeat)
+    return results
+
+
+def auth_scenarios(email: str, password: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Login (dominated by the password hasher, so fewer rounds) and /auth/me/ for a logged-in client."""
+    client = Client()
+    body = json.dumps({"email": email, "password": password})
+
+    def login():
+        res = client.post("/api/auth/login/", body, content_type="application/json", HTTP_HOST="localhost")
+        assert res.status_code == 200, f"login: {res.status_code}"
+
+    def me():
+        res = client.get("/api/auth/me/", HTTP_HOST="localhost")
+        assert res.json()["user"], "me: not logged in"
+
+    results = {"login": measure(login, min(repeat, 5))}
+    login()
+    results["me"] = measure(me, repeat)
+    return results
+
+
+def wire_scenarios(scenarios, repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Bytes on the wire and process CPU per request for each encoding, with
+    the compressed-body cache warm; `encode_cpu_ms` is what compressing the
+    body again (a cache miss) costs.
+    """
+    client = Client()
+    results = {}
+    for name, url in scenarios:
+        body = client.get(url, HTTP_HOST="localhost").content
+        for encoding in ("identity",) + compression.encodings():
+            def hit(url=url, encoding=encoding):
+                res = client.get(url, HTTP_HOST="localhost", HTTP_ACCEPT_ENCODING=encoding)
+                assert res.status_code == 200, f"{url}: {res.status_code}"
+                return res
+            size = len(hit().content)
+            t0 = time.process_time()
+            for _ in range(repeat):
+                hit()
+            cpu = (time.process_time() - t0) * 1000 / repeat
+            encode_cpu = 0.0
+            if encoding != "identity":
+                t0 = time.process_time()
+                for _ in range(repeat):
+                    compression.encode(body, encoding)
+                encode_cpu = (time.process_time() - t0) * 1000 / repeat
+            results[f"{name} {encoding}"] = {
+                "bytes": size, "cpu_ms": round(cpu, 3), "encode_cpu_ms": round(encode_cpu, 3),
+            }
+    return results
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of current vs baseline (same bank size only)."""
+    problems = []
+    for size, scenarios in current.items():
+        base = baseline.get(size) or {}
+        for name, cur in scenarios.items():
+            ref = base.get(name)
+            if not ref or "median_ms" not in cur:
+                continue  # the wire report is informational
+            if cur["median_ms"] > ref["median_ms"] * (1 + tolerance) and cur["median_ms"] - ref["median_ms"] > 1:
+                problems.append(f"[{size}] {name}: median {cur['median_ms']:.1f} ms vs baseline {ref['median_ms']:.1f} ms")
+            if cur.get("queries", 0) > ref.get("queries", 0):
+                problems.append(f"[{size}] {name}: {cur['queries']} queries vs baseline {ref['queries']}")
+    return problems
@@ -0,0 +1,41 @@
+import json
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from . import entitlements
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def billing_webhook_view(request):
+    """Stripe webhook endpoint; verifies Stripe-Signature and updates the local entitlement store."""
+    signature = request.headers.get("Stripe-Signature", "")
+    if not entitlements.verify_signature(request.body, signature, settings.STRIPE_WEBHOOK_SECRET):
+        return JsonResponse({'error': 'Invalid signature'}, status=400)
+    try:
+        event = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    try:
+        applied = entitlements.apply_event(event)
+    except entitlements.UnknownCustomer:
+        # not recorded; Stripe redelivers it after checkout.session.completed links the customer
+        return JsonResponse({'error': 'Unknown customer'}, status=409)
+    return JsonResponse({'received': True, 'applied': applied})
+
+
+@require_http_methods(["GET"])
+def entitlement_view(request):
+    """Same shape as the check-subscription edge function, answered from the local cache."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'subscribed': False})
+    state = entitlements.status(request.user.email)
+    end = state['until']
+    return JsonResponse({
+        'subscribed': state['active'] or request.user.is_staff,
+        'product_id': state['product_id'] or None,
+        'subscription_end': entitlements.to_datetime(end).isoformat() if end else None,
+    })
@@ -0,0 +1,178 @@
+"""
+Catalog versioning and staged (atomic) imports.
+
+`import_sat_json --staged` copies the live SQLite database to a staging
+file, imports into that copy, validates it (integrity and foreign-key
+checks, row counts, every item has a body and fingerprint) and only then
+replaces the catalog tables of the live database inside one transaction,
+recording a new CatalogVersion. With the live database in WAL mode,
+readers keep seeing the old catalog until that transaction commits and
+never wait on the import itself.
+
+Before each swap the live database is snapshotted to CATALOG_DIR so
+`manage.py catalog --rollback` can swap the previous catalog back the same
+way. Non-catalog tables (users, sessions, review schedules, item stats,
+...) are never touched; the tables keyed by item reference it without a
+foreign-key constraint, so rows for items a swap dropped wait for them to
+come back (e.g. after a rollback and a fixed re-import).
+"""
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from . import facets
+from .models import Assessment, CatalogVersion, Domain, Item, ItemBody, ItemFingerprint, Skill, Test
+
+# parents before children
+CATALOG_MODELS = [Assessment, Test, Domain, Skill, Item, ItemBody, ItemFingerprint]
+
+
+def staging_path() -> Path:
+    return Path(settings.CATALOG_DIR) / "staging.sqlite3"
+
+
+def previous_path() -> Path:
+    return Path(settings.CATALOG_DIR) / "previous.sqlite3"
+
+
+def current_version() -> int:
+    return CatalogVersion.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def current():
+    """(version, created_at) of the live catalog; (0, None) before the first import."""
+    return CatalogVersion.objects.order_by("-id").values_list("id", "created_at").first() or (0, None)
+
+
+def bump(source: str = "", content_changed: bool = True) -> CatalogVersion:
+    """
+    Record a catalog change (plain import, dedup flags, swap). When item
+    content changed, the admin facet table is rebuilt once the surrounding
+    transaction commits, so its scans never lengthen a swap.
+    """
+    if content_changed:
+        transaction.on_commit(facets.rebuild)
+    return CatalogVersion.objects.create(source=source[:200], item_count=Item.objects.count())
+
+
+def counts() -> Dict[str, int]:
+    return {model._meta.label: model.objects.count() for model in CATALOG_MODELS}
+
+
+def _live():
+    conn = connections[DEFAULT_DB_ALIAS]
+    if conn.vendor != "sqlite":
+        raise ValueError("Staged catalog imports need the SQLite backend.")
+    conn.ensure_connection()
+    return conn
+
+
+def snapshot(path: Path) -> None:
+    """Consistent copy of the whole live database (SQLite online backup)."""
+    conn = _live()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+    dst = sqlite3.connect(path)
+    try:
+        conn.connection.backup(dst)
+    finally:
+        dst.close()
+
+
+@contextmanager
+def staged_database(path: Path):
+    """Point the default connection at the staging file for the duration of the block."""
+    conn = _live()
+    if conn.in_atomic_block:
+        raise ValueError("Cannot switch to the staging database inside a transaction.")
+    live_name, live = conn.settings_dict["NAME"], conn.connection
+    # keep the live handle open (in-memory databases vanish when closed)
+    conn.connection = None
+    conn.settings_dict["NAME"] = str(path)
+    try:
+        yield
+    finally:
+        conn.close()
+        conn.settings_dict["NAME"] = live_name
+        conn.connection = live
+        # may hold rows created only in the staging copy
+        from . import taxonomy
+
+        taxonomy.reset()
+
+
+def validate(live_counts: Dict[str, int], allow_shrink: bool = False) -> List[str]:
+    """Problems with the catalog on the current connection (run inside staged_database)."""
+    problems = []
+    with connections[DEFAULT_DB_ALIAS].cursor() as cur:
+        cur.execute("PRAGMA integrity_check")
+        result = [row[0] for row in cur.fetchall()]
+        if result != ["ok"]:
+            problems.append("integrity_check: " + "; ".join(result[:5]))
+        cur.execute("PRAGMA foreign_key_check")
+        bad = cur.fetchall()
+        if bad:
+            problems.append(f"{len(bad)} foreign key violations, e.g. {bad[0]}")
+
+    staged = counts()
+    items = staged[Item._meta.label]
+    if not items:
+        problems.append("staged catalog has no items")
+    if not allow_shrink:
+        for label, n in staged.items():
+            if n < live_counts.get(label, 0):
+                problems.append(f"{label}: {n} rows staged vs {live_counts[label]} live (use --allow-shrink)")
+    for label, n in ((ItemBody._meta.label, staged[ItemBody._meta.label]),
+                     (ItemFingerprint._meta.label, staged[ItemFingerprint._meta.label])):
+        if n != items:
+            problems.append(f"{label}: {n} rows for {items} items")
+    return problems
+
+
+def swap_in(path: Path, source: str = "") -> CatalogVersion:
+    """
+    Replace the live catalog tables with those of the database file at
+    `path` in one transaction and record a new version. The live database
+    is snapshotted to previous_path() first.
+    """
+    conn = _live()
+    snapshot(previous_path())
+    qn = conn.ops.quote_name
+    with conn.cursor() as cur:
+        # readers keep their snapshot while the swap transaction runs
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("ATTACH DATABASE %s AS staged", [str(path)])
+    try:
+        with transaction.atomic():
+            with conn.cursor() as cur:
+                for model in reversed(CATALOG_MODELS):
+                    cur.execute(f"DELETE FROM main.{qn(model._meta.db_table)}")
+                for model in CATALOG_MODELS:
+                    table = qn(model._meta.db_table)
+                    cols = ", ".join(qn(f.column) for f in model._meta.local_concrete_fields)
+                    cur.execute(f"INSERT INTO main.{table} ({cols}) SELECT {cols} FROM staged.{table}")
+            version = bump(source)
+        from . import taxonomy
+
+        taxonomy.reset()
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("DETACH DATABASE staged")
+    return version
+
+
+def rollback() -> CatalogVersion:
+    """Swap the catalog from before the last swap back in (repeat to redo)."""
+    prev = previous_path()
+    if not prev.exists():
+        raise FileNotFoundError(f"No catalog snapshot at {prev}")
+    staging = staging_path()
+    prev.replace(staging)
+    try:
+        return swap_in(staging, source="rollback")
+    finally:
+        staging.unlink(missing_ok=True)
@@ -0,0 +1,136 @@
+"""
+Compression of API responses, negotiated per request.
+
+CompressionMiddleware encodes JSON responses under /api/ with the best
+encoding the client accepts: brotli when the `brotli` package is
+installed, otherwise gzip. Static files are left to WhiteNoise, which
+serves its own precompressed copies.
+
+Anonymous JSON responses that carry an ETag (item list and detail, see
+ItemViewSet.conditional) are determined by it together with the request
+headers the response varies on, and the ETag already includes the catalog
+version that every import bumps. Their compressed bytes are therefore
+cached under (path, ETag, Content-Type, Vary'd request headers, encoding)
+in API_COMPRESSION_CACHE: a hot page is compressed once per catalog
+version and then served from the cache, and an import makes every old
+entry unreachable without an explicit purge. Responses to authenticated
+requests are compressed but never cached.
+
+Only GET/HEAD JSON responses are compressed, so bodies that echo request
+input next to a secret (login, register, the browsable API's HTML with
+its CSRF token) are never compressed (BREACH).
+"""
+import gzip
+import hashlib
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_TIMEOUT = 24 * 3600
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+def encodings():
+    """Supported encodings, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The encoding to use for an Accept-Encoding header, or None for identity."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in encodings():
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def encode(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def cache_key(request, response, etag: str, encoding: str) -> str:
+    """Everything the cached bytes depend on: the URL, ETag, final Content-Type and Vary'd request headers."""
+    varied = sorted(h.strip().lower() for h in response.get("Vary", "").split(",") if h.strip())
+    headers = [f"{h}={request.headers.get(h, '')}" for h in varied if h != "accept-encoding"]
+    parts = [request.path, etag, response.get("Content-Type", ""), *headers]
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+    return f"compressed:{encoding}:{digest}"
+
+
+def shared(request) -> bool:
+    """Requests whose responses may be cached for everyone (no user, no credentials)."""
+    user = getattr(request, "user", None)
+    return not (user is not None and user.is_authenticated) and "Authorization" not in request.headers
+
+
+def compressible(request, response) -> bool:
+    return (
+        request.method in ("GET", "HEAD")
+        and request.path.startswith("/api/")
+        and response.status_code == 200
+        and not response.streaming
+        and not response.has_header("Content-Encoding")
+        and response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+        and len(response.content) >= settings.API_COMPRESSION_MIN_BYTES
+    )
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not compressible(request, response):
+            return response
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        etag = response.get("ETag")
+        cacheable = bool(etag) and shared(request)
+        body = None
+        if cacheable:
+            cache = caches[settings.API_COMPRESSION_CACHE]
+            key = cache_key(request, response, etag, encoding)
+            body = cache.get(key)
+        if body is None:
+            body = encode(response.content, encoding)
+            if cacheable and len(body) <= settings.API_COMPRESSION_CACHE_MAX_BYTES:
+                cache.set(key, body, CACHE_TIMEOUT)
+        if len(body) >= len(response.content):
+            return response
+
+        response.content = body
+        response["Content-Length"] = str(len(body))
+        response["Content-Encoding"] = encoding
+        if etag and not etag.startswith("W/"):
+            # the compressed body is a different representation
+            response["ETag"] = f"W/{etag}"
+        return response
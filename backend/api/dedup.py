@@ -0,0 +1,180 @@
+"""
+Near-duplicate detection for items (MinHash + LSH).
+
+Signatures use one-permutation hashing: every shingle is hashed once and
+dropped into one of NUM_BINS bins, keeping the minimum per bin. That keeps
+fingerprinting linear in the text length, and LSH banding keeps clustering
+close to linear in the number of items instead of comparing every pair.
+"""
+import hashlib
+import html
+import re
+import struct
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+NUM_BINS = 64
+BANDS = 8
+ROWS = NUM_BINS // BANDS          # 8 rows/band -> ~0.77 Jaccard S-curve midpoint
+DEFAULT_THRESHOLD = 0.8
+SMALL_BUCKET = 32                 # all pairs up to this size; larger buckets go through representatives
+
+_EMPTY = 0xFFFFFFFF
+_MASK = 0xFFFFFFFFFFFFFFFF
+_MUL = 0x100000001B3
+_SIG = struct.Struct(f"<{NUM_BINS}I")
+
+_PROBES = [
+    sorted(range(NUM_BINS), key=lambda j, i=i: hashlib.blake2b(bytes([i, j]), digest_size=4).digest())
+    for i in range(NUM_BINS)
+]
+
+_WORD_HASHES: Dict[str, int] = {}
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_PUNCT_RE = re.compile(r"[^\w\s]+")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(raw: str) -> str:
+    """Strip markup/punctuation, lowercase and collapse whitespace."""
+    text = _TAG_RE.sub(" ", raw or "")
+    text = html.unescape(text).lower()
+    text = _PUNCT_RE.sub(" ", text)
+    return _WS_RE.sub(" ", text).strip()
+
+
+def item_text(stem: str, options: Iterable[str]) -> str:
+    """Normalized stem + options text used for fingerprinting."""
+    parts = [stem or ""] + [o or "" for o in options]
+    return normalize_text(" ".join(parts))
+
+
+def _word_hash(word: str) -> int:
+    h = _WORD_HASHES.get(word)
+    if h is None:
+        h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+        if len(_WORD_HASHES) < 200_000:
+            _WORD_HASHES[word] = h
+    return h
+
+
+def shingle_hashes(text: str, k: int = 3) -> set:
+    """64-bit hashes of word k-shingles, combined from cached per-word hashes."""
+    hs = [_word_hash(w) for w in text.split()]
+    if len(hs) < k:
+        return {_mix(sum(hs))} if hs else set()
+    out = set()
+    for i in range(len(hs) - k + 1):
+        x = 0
+        for h in hs[i:i + k]:
+            x = ((x * _MUL) ^ h) & _MASK
+        out.add(_mix(x))
+    return out
+
+
+def _mix(x: int) -> int:
+    # splitmix64 finalizer
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def signature(text: str) -> bytes:
+    """One-permutation MinHash signature (NUM_BINS x uint32, packed)."""
+    bins = [_EMPTY] * NUM_BINS
+    for h in shingle_hashes(text):
+        b = h % NUM_BINS
+        v = (h >> 32) & 0xFFFFFFFE    # never collides with _EMPTY
+        if v < bins[b]:
+            bins[b] = v
+    # Optimal densification: an empty bin copies the first filled bin along its
+    # own fixed pseudo-random probe sequence, so sparse texts still compare well.
+    if _EMPTY in bins and any(v != _EMPTY for v in bins):
+        dense = list(bins)
+        for i, v in enumerate(bins):
+            if v == _EMPTY:
+                dense[i] = next(bins[j] for j in _PROBES[i] if bins[j] != _EMPTY)
+        bins = dense
+    return _SIG.pack(*bins)
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    va, vb = _SIG.unpack(a), _SIG.unpack(b)
+    if va[0] == _EMPTY or vb[0] == _EMPTY:
+        return 0.0
+    return sum(1 for x, y in zip(va, vb) if x == y) / NUM_BINS
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def find_clusters(
+    signatures: Iterable[Tuple[Hashable, bytes]],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[List[Hashable]]:
+    """
+    Group keys whose signatures are estimated to be >= threshold similar.
+    Returns clusters of size >= 2, each in input order.
+    """
+    keys: List[Hashable] = []
+    sigs: List[bytes] = []
+    buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+    band_width = ROWS * 4
+    for key, sig in signatures:
+        if not sig or sig[:4] == b"\xff\xff\xff\xff":
+            continue
+        idx = len(keys)
+        keys.append(key)
+        sigs.append(bytes(sig))
+        for band in range(BANDS):
+            buckets[(band, sigs[idx][band * band_width:(band + 1) * band_width])].append(idx)
+
+    parent = list(range(len(keys)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a: int, b: int) -> None:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    # empty signatures were skipped above, so no bucket is keyed on one
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        if len(members) <= SMALL_BUCKET:
+            for pos, a in enumerate(members):
+                for b in members[pos + 1:]:
+                    if find(a) != find(b) and similarity(sigs[a], sigs[b]) >= threshold:
+                        union(a, b)
+            continue
+        # Large buckets (the biggest duplicate groups): each member joins the first
+        # similar representative or becomes one, so the cost stays linear in the bucket.
+        reps: List[int] = []
+        for b in members:
+            for a in reps:
+                if similarity(sigs[a], sigs[b]) >= threshold:
+                    union(a, b)
+                    break
+            else:
+                if len(reps) < SMALL_BUCKET:
+                    reps.append(b)
+
+    groups: Dict[int, List[Hashable]] = defaultdict(list)
+    for i, key in enumerate(keys):
+        groups[find(i)].append(key)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def pick_canonical(cluster: List[Hashable], rank: Optional[Dict[Hashable, tuple]] = None) -> Hashable:
+    """Lowest rank wins (e.g. earliest create_date); defaults to first key."""
+    if not rank:
+        return cluster[0]
+    return min(cluster, key=lambda k: rank.get(k, ()))
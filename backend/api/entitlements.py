@@ -0,0 +1,269 @@
+"""
+Local entitlement store for premium gating.
+
+Billing webhooks (Stripe event format) are verified and applied to the
+Entitlement table; reads go through a per-email cache with a TTL, so a
+gated request costs a cache hit and never a call to Stripe or Supabase.
+The cached value carries its own expiry (`until`), so a subscription that
+lapses is not served as active from the cache.
+
+Providers are only used for backfills (`manage.py sync_entitlements`):
+StripeProvider talks to the Stripe REST API, StubProvider stands in for it
+in tests and local development.
+"""
+import hashlib
+import hmac
+import json
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils.module_loading import import_string
+from rest_framework.permissions import BasePermission
+
+from .models import BillingEvent, Entitlement
+
+ACTIVE_STATUSES = ("active", "trialing")
+SIGNATURE_TOLERANCE = 300
+
+
+def normalize_email(email: str) -> str:
+    # Stripe keeps whatever case the customer typed; match entitlements case-insensitively
+    return (email or "").strip().lower()
+
+
+def cache_key(email: str) -> str:
+    return f"entitlement:{hashlib.sha1(normalize_email(email).encode('utf-8')).hexdigest()}"
+
+
+def _snapshot(ent: Optional[Entitlement]) -> Dict:
+    if ent is None:
+        return {"status": "", "product_id": "", "until": None}
+    until = ent.current_period_end.timestamp() if ent.current_period_end else None
+    return {"status": ent.status, "product_id": ent.product_id, "until": until}
+
+
+def status(email: str) -> Dict:
+    """Cached entitlement snapshot for `email` plus a computed `active` flag."""
+    if not email:
+        snap = _snapshot(None)
+    else:
+        key = cache_key(email)
+        snap = cache.get(key)
+        if snap is None:
+            snap = _snapshot(Entitlement.objects.filter(email=normalize_email(email)).first())
+            cache.set(key, snap, settings.ENTITLEMENT_CACHE_SECONDS)
+    active = snap["status"] in ACTIVE_STATUSES and (snap["until"] is None or snap["until"] > time.time())
+    return {**snap, "active": active}
+
+
+def is_entitled(user) -> bool:
+    if not getattr(user, "is_authenticated", False):
+        return False
+    return user.is_staff or status(user.email)["active"]
+
+
+class HasEntitlement(BasePermission):
+    message = "An active subscription is required."
+
+    def has_permission(self, request, view):
+        return is_entitled(request.user)
+
+
+# ---- webhooks ----
+def sign(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature header value for `payload` (used by the stub and tests)."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    mac = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("utf-8") + payload, hashlib.sha256)
+    return f"t={timestamp},v1={mac.hexdigest()}"
+
+
+def verify_signature(payload: bytes, header: str, secret: str) -> bool:
+    parts = [p.split("=", 1) for p in (header or "").split(",") if "=" in p]
+    timestamps = [v for k, v in parts if k == "t"]
+    signatures = [v for k, v in parts if k == "v1"]
+    if not secret or not timestamps or not signatures:
+        return False
+    try:
+        timestamp = int(timestamps[0])
+    except ValueError:
+        return False
+    if abs(time.time() - timestamp) > SIGNATURE_TOLERANCE:
+        return False
+    expected = sign(payload, secret, timestamp).split("v1=", 1)[1]
+    return any(hmac.compare_digest(expected, s) for s in signatures)
+
+
+def to_datetime(value) -> Optional[datetime]:
+    return datetime.fromtimestamp(int(value), tz=dt_timezone.utc) if value else None
+
+
+class UnknownCustomer(Exception):
+    """A subscription event for a customer no checkout has linked to an email yet."""
+
+
+def subscription_fields(sub: Dict, kind: str = "customer.subscription.updated", created: int = 0) -> Dict:
+    """Entitlement fields from a Stripe subscription object."""
+    items = (sub.get("items") or {}).get("data") or [{}]
+    price = items[0].get("price") or {}
+    # newer API versions moved the period end onto the subscription item
+    period_end = sub.get("current_period_end") or items[0].get("current_period_end")
+    return {
+        "customer_id": sub.get("customer") or "",
+        "status": "canceled" if kind.endswith(".deleted") else (sub.get("status") or ""),
+        "product_id": price.get("product") or "",
+        "current_period_end": to_datetime(sub.get("trial_end") if sub.get("status") == "trialing" else period_end),
+        "event_created": created,
+    }
+
+
+def checkout_fields(session: Dict, created: int) -> Dict:
+    """
+    Fields from a completed checkout: the customer link, plus the
+    subscription's state, so access does not wait for (or depend on the
+    order of) the customer.subscription.* events.
+    """
+    fields = {"customer_id": session.get("customer") or ""}
+    sub = session.get("subscription")
+    if isinstance(sub, str) and sub and settings.STRIPE_SECRET_KEY:
+        try:
+            sub = StripeProvider().subscription(sub)
+        except Exception:
+            sub = None
+    if isinstance(sub, dict):
+        return {**subscription_fields(sub, created=created), **{k: v for k, v in fields.items() if v}}
+    if session.get("mode") == "subscription" and session.get("payment_status") in ("paid", "no_payment_required"):
+        # provisional until the subscription events arrive; event_created stays
+        # untouched so they are not treated as stale
+        fields["status"] = "active"
+    return fields
+
+
+def apply_event(event: Dict) -> bool:
+    """
+    Apply one Stripe event; returns False when it was a duplicate, stale or
+    irrelevant. Handles checkout.session.completed (links the customer id to
+    an email and applies the session's subscription) and
+    customer.subscription.created/updated/deleted. Raises UnknownCustomer for
+    a subscription event that cannot be matched yet; the event is not
+    recorded, so Stripe's redelivery applies it once checkout has linked the
+    customer.
+    """
+    kind = event.get("type", "")
+    obj = (event.get("data") or {}).get("object") or {}
+    created = int(event.get("created") or 0)
+    customer = obj.get("customer") or ""
+
+    if kind == "checkout.session.completed":
+        email = (obj.get("customer_details") or {}).get("email") or obj.get("customer_email")
+        fields = checkout_fields(obj, created)
+    elif kind.startswith("customer.subscription."):
+        email = (obj.get("metadata") or {}).get("email") or obj.get("customer_email")
+        fields = subscription_fields(obj, kind, created)
+    else:
+        return False
+
+    event_id = event.get("id") or ""
+    try:
+        with transaction.atomic():
+            if BillingEvent.objects.filter(event_id=event_id).exists():
+                return False
+            ent = None
+            if email:
+                ent = Entitlement.objects.select_for_update().filter(email=normalize_email(email)).first()
+            elif customer:
+                ent = Entitlement.objects.select_for_update().filter(customer_id=customer).first()
+            if ent is None:
+                if not email:
+                    raise UnknownCustomer(customer)
+                ent = Entitlement(email=normalize_email(email))
+            if kind == "checkout.session.completed" and ent.event_created:
+                # subscription events already set the state; only link the customer
+                fields, applied = {"customer_id": fields["customer_id"]}, True
+            else:
+                applied = not (created and created < ent.event_created)
+            if applied:
+                for field, value in fields.items():
+                    if value or field == "current_period_end":
+                        setattr(ent, field, value)
+                ent.save()
+            # recorded only once handled, in the same transaction
+            BillingEvent.objects.create(event_id=event_id, type=kind)
+    except IntegrityError:
+        return False  # a concurrent delivery of the same event won
+    if applied:
+        cache.delete(cache_key(ent.email))
+    return applied
+
+
+# ---- providers (backfill) ----
+class StripeProvider:
+    """Looks up the newest subscription for an email through the Stripe REST API."""
+    api = "https://api.stripe.com/v1"
+
+    def __init__(self, secret_key: Optional[str] = None):
+        self.secret_key = secret_key or settings.STRIPE_SECRET_KEY
+
+    def _get(self, path: str, **params) -> Dict:
+        url = f"{self.api}/{path}?{urllib.parse.urlencode(params)}"
+        req = urllib.request.Request(url, headers={"Authorization": f"Bearer {self.secret_key}"})
+        with urllib.request.urlopen(req, timeout=10) as res:
+            return json.load(res)
+
+    def subscription(self, subscription_id: str) -> Dict:
+        return self._get(f"subscriptions/{urllib.parse.quote(subscription_id)}")
+
+    def subscription_event(self, email: str) -> Optional[Dict]:
+        customers = self._get("customers", email=email, limit=1)["data"]
+        if not customers:
+            return None
+        subs = self._get("subscriptions", customer=customers[0]["id"], status="all", limit=1)["data"]
+        if not subs:
+            return None
+        sub = {**subs[0], "metadata": {**(subs[0].get("metadata") or {}), "email": email}}
+        return {"id": f"sync:{sub['id']}:{int(time.time())}", "type": "customer.subscription.updated",
+                "created": int(time.time()), "data": {"object": sub}}
+
+
+class StubProvider:
+    """In-memory stand-in for Stripe: subscriptions by email, as webhook-shaped events."""
+
+    def __init__(self, subscriptions: Optional[Dict[str, Dict]] = None):
+        self.subscriptions = subscriptions if subscriptions is not None else {}
+
+    def subscribe(self, email, status="active", product="prod_stub", days=30):
+        self.subscriptions[normalize_email(email)] = {
+            "status": status, "product": product, "current_period_end": int(time.time()) + days * 86400,
+        }
+
+    def subscription_event(self, email: str) -> Optional[Dict]:
+        sub = self.subscriptions.get(normalize_email(email))
+        if sub is None:
+            return None
+        return stub_event("customer.subscription.updated", email, **sub)
+
+
+def stub_event(kind, email, status="active", product="prod_stub", current_period_end=None, customer="cus_stub"):
+    now = time.time()
+    return {
+        "id": f"evt_stub_{uuid.uuid4().hex}",
+        "type": kind,
+        "created": int(now),
+        "data": {"object": {
+            "customer": customer,
+            "status": status,
+            "current_period_end": current_period_end or int(now) + 30 * 86400,
+            "items": {"data": [{"price": {"product": product}}]},
+            "metadata": {"email": email},
+        }},
+    }
+
+
+def get_provider():
+    return import_string(settings.ENTITLEMENT_PROVIDER)()
@@ -0,0 +1,248 @@
+"""
+Timed exam sessions with cached state and batched autosave.
+
+While an exam is in progress its answers, per-question timers and autosave
+sequence live in the EXAM_SESSION_CACHE backend (a file cache shared by
+the workers on one host by default, Redis when REDIS_URL is set). An
+autosave merges into that state without touching the database; the state
+is written back to the ExamSession row at most every EXAM_SNAPSHOT_SECONDS
+per session, on submit, and by `manage.py flush_exam_sessions`. A crash or
+cache loss therefore costs at most one snapshot interval of answers, and a
+classroom autosaving every few seconds turns into a handful of UPDATEs a
+minute instead of a write per keystroke.
+
+Sequence numbers from the client make retried or reordered autosaves
+harmless: a save whose `seq` is not newer than the cached one is ignored.
+
+Every read-modify-write of a session's cached state (autosave, submit,
+flush, reloading a snapshot into the cache) runs under a per-session lock
+and re-reads the state inside it, so concurrent autosaves never drop each
+other's answers and nothing re-caches a session that submit just closed.
+The lock is an flock on a striped lock file next to a file cache and an
+atomic cache.add() with any other backend.
+"""
+import fcntl
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import transaction
+from django.utils import timezone
+
+from . import grading, reviews
+from .models import ExamSession, Item
+
+GRACE_SECONDS = 30        # accept answers this long past the deadline (network latency)
+STATE_TTL = 24 * 3600
+LOCK_TTL = 30             # cache.add locks expire in case their holder died
+LOCK_WAIT = 10
+LOCK_STRIPES = 256
+
+
+class SessionClosed(Exception):
+    """The session was submitted or its time ran out."""
+
+
+class SessionBusy(Exception):
+    """The session's lock could not be taken within LOCK_WAIT seconds."""
+
+
+def _cache():
+    return caches[settings.EXAM_SESSION_CACHE]
+
+
+def _key(pk: int) -> str:
+    return f"exam:{pk}"
+
+
+@contextmanager
+def locked(pk: int):
+    """Serialize state changes of session `pk` across threads and processes."""
+    cache = _cache()
+    if isinstance(cache, FileBasedCache):
+        # FileBasedCache.add() is not atomic; the kernel lock is released even if the process dies
+        os.makedirs(cache._dir, exist_ok=True)
+        with open(os.path.join(cache._dir, f"lock-{pk % LOCK_STRIPES}"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return
+    key, token = f"exam:lock:{pk}", uuid.uuid4().hex
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(key, token, LOCK_TTL):
+        if time.monotonic() > deadline:
+            raise SessionBusy()
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def _class_key(classroom_id: int) -> str:
+    return f"exam:class:{classroom_id}"
+
+
+def class_version(classroom_id: int):
+    """Changes whenever a session of the class autosaves or submits (polled by api.live)."""
+    return _cache().get(_class_key(classroom_id))
+
+
+def _touch(state: Dict) -> None:
+    if state.get("classroom_id"):
+        _cache().set(_class_key(state["classroom_id"]), time.time_ns(), STATE_TTL)
+
+
+def _from_row(session: ExamSession) -> Dict:
+    return {
+        "id": session.pk,
+        "user_id": session.user_id,
+        "classroom_id": session.classroom_id,
+        "status": session.status,
+        "items": session.items,
+        "deadline": session.deadline.timestamp() if session.deadline else None,
+        "answers": dict(session.answers),
+        "timers": dict(session.timers),
+        "seq": session.seq,
+        "saved_seq": session.seq,
+        "saved_at": time.time(),
+    }
+
+
+def start(user, items: Iterable[str], duration: Optional[int] = None, classroom_id: Optional[int] = None) -> Dict:
+    deadline = timezone.now() + timedelta(seconds=duration) if duration else None
+    session = ExamSession.objects.create(user=user, items=list(items), deadline=deadline, classroom_id=classroom_id)
+    state = _from_row(session)
+    _cache().set(_key(session.pk), state, STATE_TTL)
+    _touch(state)
+    return state
+
+
+def _load(pk: int) -> Optional[Dict]:
+    """get() for callers already holding the session's lock."""
+    state = _cache().get(_key(pk))
+    if state is None:
+        session = ExamSession.objects.filter(pk=pk).first()
+        if session is None:
+            return None
+        state = _from_row(session)
+        if session.status == ExamSession.ACTIVE:
+            _cache().set(_key(pk), state, STATE_TTL)
+    return state
+
+
+def get(pk: int) -> Optional[Dict]:
+    """Session state from the cache, reloaded from the last snapshot on a miss."""
+    state = _cache().get(_key(pk))
+    if state is None:
+        # under the lock, so a submit cannot close the row between the read and the set
+        with locked(pk):
+            state = _load(pk)
+    return state
+
+
+def cached_states(pks: Iterable[int]) -> Dict[int, Dict]:
+    """Cached state of several sessions in one cache round trip (misses are left out)."""
+    found = _cache().get_many([_key(pk) for pk in pks])
+    return {state["id"]: state for state in found.values()}
+
+
+def remaining(state: Dict, now: Optional[float] = None) -> Optional[float]:
+    if state["deadline"] is None:
+        return None
+    return max(0.0, state["deadline"] - (now or time.time()))
+
+
+def expired(state: Dict, now: Optional[float] = None) -> bool:
+    return state["deadline"] is not None and (now or time.time()) > state["deadline"] + GRACE_SECONDS
+
+
+def persist(state: Dict, now: Optional[float] = None) -> bool:
+    """Snapshot state to the DB if it has unsaved autosaves. Returns whether it wrote."""
+    if state["seq"] == state["saved_seq"]:
+        return False
+    now = now or time.time()
+    ExamSession.objects.filter(pk=state["id"], status=ExamSession.ACTIVE, seq__lt=state["seq"]).update(
+        answers=state["answers"], timers=state["timers"], seq=state["seq"],
+        snapshot_at=timezone.now(),
+    )
+    state["saved_seq"], state["saved_at"] = state["seq"], now
+    return True
+
+
+def autosave(state: Dict, answers: Dict, timers: Dict, seq: Optional[int] = None,
+             now: Optional[float] = None) -> Dict:
+    """Merge one autosave into the cached state; snapshots to the DB when one is due."""
+    now = now or time.time()
+    with locked(state["id"]):
+        state = _load(state["id"])  # the caller's copy may predate another save or a submit
+        if state["status"] != ExamSession.ACTIVE or expired(state, now):
+            raise SessionClosed()
+        if seq is not None and seq <= state["seq"]:
+            return state  # retried or out of order; a newer save already landed
+        allowed = set(state["items"])
+        state["answers"].update({u: a for u, a in answers.items() if u in allowed})
+        state["timers"].update({u: t for u, t in timers.items() if u in allowed})
+        state["seq"] = seq if seq is not None else state["seq"] + 1
+        if now - state["saved_at"] >= settings.EXAM_SNAPSHOT_SECONDS:
+            persist(state, now)
+        _cache().set(_key(state["id"]), state, STATE_TTL)
+    _touch(state)
+    return state
+
+
+def submit(state: Dict) -> ExamSession:
+    """Persist, grade against the compiled answer keys and close the session."""
+    with locked(state["id"]):
+        state = _load(state["id"])
+        with transaction.atomic():
+            session = ExamSession.objects.select_for_update().get(pk=state["id"])
+            if session.status == ExamSession.SUBMITTED:
+                _cache().delete(_key(state["id"]))
+                return session
+            keys = dict(Item.objects.filter(uid__in=state["items"]).values_list("uid", "answer_key"))
+            keys = {str(uid): key for uid, key in keys.items()}
+            results = grading.grade_batch(keys, {u: state["answers"].get(u) for u in state["items"] if u in keys})
+            session.answers, session.timers, session.seq = state["answers"], state["timers"], state["seq"]
+            session.results = results
+            session.score = sum(1 for r in results.values() if r)
+            session.status = ExamSession.SUBMITTED
+            session.submitted_at = session.snapshot_at = timezone.now()
+            session.save()
+            # missed and answered questions feed the spaced-repetition queue
+            answered = {uuid.UUID(u): r for u, r in results.items() if r is not None and u in state["answers"]}
+            reviews.record(session.user, answered)
+        _cache().delete(_key(state["id"]))
+    _touch(state)
+    return session
+
+
+def flush(now: Optional[float] = None) -> Dict[str, int]:
+    """Snapshot dirty active sessions and submit the ones whose time ran out."""
+    now = now or time.time()
+    pks = list(ExamSession.objects.filter(status=ExamSession.ACTIVE).values_list("pk", flat=True))
+    cached = cached_states(pks)
+    saved = submitted = 0
+    for pk in pks:
+        state = cached.get(pk) or get(pk)
+        if state is None or state["status"] != ExamSession.ACTIVE:
+            continue
+        if expired(state, now):
+            submit(state)
+            submitted += 1
+            continue
+        with locked(pk):
+            state = _load(pk)
+            if state["status"] == ExamSession.ACTIVE and persist(state, now):
+                _cache().set(_key(pk), state, STATE_TTL)
+                saved += 1
+    return {"saved": saved, "submitted": submitted}
@@ -0,0 +1,152 @@
+"""
+Answer keys compiled at import time, and grading against them.
+
+`compile_key` turns an item's accepted answers (choice letters, or grid-in
+values such as "7/2", "3.5", ".6666" scraped into `keys`) into a compact
+canonical form stored on Item.answer_key:
+
+    {"choices": ["B"],                 # multiple choice letters
+     "exact": ["7/2", "-2/3"],         # reduced rationals "p/q"
+     "ranges": [[6666, 6667, 4]],      # [lo, hi, places]: truncated/rounded decimals
+     "text": ["x=3"]}                  # anything else, normalized
+
+Grid-in rules follow the SAT: any equivalent fraction or decimal is
+accepted, and a value that does not fit the grid (5 characters, plus the
+sign for negatives) may be truncated or rounded as long as it fills it, so
+2/3 accepts .6666, .6667, 0.666 and 0.667 but not .67 or .666. A decimal
+response that fills the grid with `places` digits is scaled to an integer
+and compared with the ranges, so grading never parses the key; distinct
+responses are normalized once per process.
+"""
+import re
+from fractions import Fraction
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+GRID_WIDTH = 5
+LETTERS = "ABCDEFGH"
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def parse_number(value: str) -> Optional[Tuple[Fraction, Optional[int]]]:
+    """(value, decimal places) for "7/2", "-3.50", ".6666" or "12"; None when not a grid-in number."""
+    s = value.strip().replace(" ", "").replace("−", "-")
+    negative = s.startswith("-")
+    if negative:
+        s = s[1:]
+    places = None
+    if "/" in s:
+        num, _, den = s.partition("/")
+        if not (num.isdigit() and den.isdigit()) or int(den) == 0:
+            return None
+        result = Fraction(int(num), int(den))
+    elif "." in s:
+        whole, _, frac = s.partition(".")
+        if not frac.isdigit() or (whole and not whole.isdigit()):
+            return None
+        places = len(frac)
+        result = Fraction(int(whole or 0) * 10 ** places + int(frac), 10 ** places)
+    elif s.isdigit():
+        result = Fraction(int(s))
+    else:
+        return None
+    return (-result if negative else result), places
+
+
+def normalize_text(value: str) -> str:
+    return " ".join(_TAGS.sub(" ", value).split()).lower()
+
+
+def _rational(value: Fraction) -> str:
+    return f"{value.numerator}/{value.denominator}"
+
+
+def _ranges(value: Fraction) -> List[List[int]]:
+    """Truncated/rounded decimals that fill the grid, for values that don't fit it exactly."""
+    magnitude = abs(value)
+    whole_digits = len(str(int(magnitude))) if magnitude >= 1 else 0
+    widths = {GRID_WIDTH - 1 - whole_digits}          # ".6666" / "12.33"
+    if whole_digits == 0:
+        widths.add(GRID_WIDTH - 2)                    # "0.666"
+    out = []
+    for places in sorted(widths):
+        if places < 1:
+            continue
+        scaled = magnitude * 10 ** places
+        if scaled.denominator == 1:
+            continue                                  # fits exactly; "exact" covers it
+        truncated = int(scaled)
+        rounded = int(scaled + Fraction(1, 2))
+        sign = -1 if value < 0 else 1
+        lo, hi = sorted((sign * truncated, sign * rounded))
+        out.append([lo, hi, places])
+    return out
+
+
+def compile_key(answers: Iterable, keys: Iterable = ()) -> Dict[str, list]:
+    """
+    Canonical key for an item. `answers` are the item's correct answers
+    (letters for multiple choice); `keys` are extra accepted grid-in values,
+    used only when the answers are not letters. Returns {} when there is
+    nothing to grade against.
+    """
+    answers = [str(a).strip() for a in answers or [] if str(a).strip()]
+    letters = [a.upper() for a in answers if len(a) == 1 and a.upper() in LETTERS]
+    if letters and len(letters) == len(answers):
+        return {"choices": sorted(set(letters))}
+
+    exact, ranges, text = {}, [], {}
+    for value in [*answers, *(str(k) for k in keys or [])]:
+        plain = normalize_text(value)
+        if not plain:
+            continue
+        number = parse_number(plain)
+        if number is None:
+            text[plain] = True
+            continue
+        rational = _rational(number[0])
+        if rational not in exact:
+            exact[rational] = True
+            ranges.extend(r for r in _ranges(number[0]) if r not in ranges)
+    key = {"exact": list(exact), "ranges": ranges, "text": list(text)}
+    return {k: v for k, v in key.items() if v}
+
+
+@lru_cache(maxsize=8192)
+def _response(value: str) -> Tuple[str, str, int, int, str]:
+    """
+    Normalized forms of one response: (letter, rational, scaled, places, text).
+    `places` is 0 unless the response is a decimal that fills the grid, the
+    only kind the truncated/rounded ranges accept.
+    """
+    plain = normalize_text(value)
+    letter = plain.upper() if len(plain) == 1 and plain.upper() in LETTERS else ""
+    number = parse_number(plain) if plain else None
+    if number is None:
+        return letter, "", 0, 0, plain
+    result, places = number
+    filled = len(plain.replace(" ", "").lstrip("-−")) == GRID_WIDTH
+    if not (places and filled):
+        return letter, _rational(result), 0, 0, plain
+    return letter, _rational(result), int(result * 10 ** places), places, plain
+
+
+def grade(key: Dict[str, list], response) -> Optional[bool]:
+    """True/False for `response` against a compiled key; None when the item has no key."""
+    if not key:
+        return None
+    if response is None:
+        return False
+    letter, rational, scaled, places, text = _response(str(response))
+    if "choices" in key:
+        return letter in key["choices"]
+    if rational:
+        if rational in key.get("exact", ()):
+            return True
+        return any(p == places and lo <= scaled <= hi for lo, hi, p in key.get("ranges", ()))
+    return text in key.get("text", ())
+
+
+def grade_batch(keys: Dict, responses: Dict) -> Dict:
+    """Grade {item: response} against {item: compiled key}; items without a key map to None."""
+    return {item: grade(keys.get(item) or {}, response) for item, response in responses.items()}
@@ -0,0 +1,107 @@
+"""
+Bounded pool for password hashing, and cache-backed login throttles.
+
+Hashing (PBKDF2 by default) is deliberately slow. Running it on a small
+per-process thread pool caps how many request threads burn CPU on it at
+once (hashlib releases the GIL, so other requests keep being served), and
+a bounded queue turns a sign-in storm into fast 503s instead of a backlog
+that stalls every endpoint. Only the pure hashing runs on the pool; DB
+access stays on the request thread.
+
+Throttles are fixed-window counters in the default cache, checked before
+any hashing happens.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.core.cache import cache
+
+
+class HashingBusy(Exception):
+    """The pool and its queue are full; the caller should answer 503."""
+
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def _pool():
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = settings.HASH_WORKERS
+                _slots = threading.BoundedSemaphore(workers + settings.HASH_QUEUE_MAX)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash")
+    return _executor, _slots
+
+
+def run(fn: Callable, *args):
+    """Run fn(*args) on the hashing pool; raises HashingBusy when it is saturated."""
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=settings.HASH_TIMEOUT)
+    except TimeoutError:
+        raise HashingBusy()
+
+
+def hash_password(password: str) -> str:
+    return run(make_password, password)
+
+
+def verify_password(user, password: str) -> bool:
+    """check_password on the pool; upgrades an outdated hash like User.check_password does."""
+    if not user.has_usable_password():
+        run(make_password, password)  # same cost as a real check
+        return False
+    if not run(check_password, password, user.password):
+        return False
+    if identify_hasher(user.password).must_update(user.password):
+        user.password = hash_password(password)
+        user.save(update_fields=["password"])
+    return True
+
+
+# ---- throttling ----
+def throttle(scope: str, key: str, limit: int, window: int) -> int:
+    """
+    Count one attempt for (scope, key) in the current `window`-second bucket.
+    Returns 0 when allowed, else the seconds until the bucket resets.
+    """
+    if not key or limit <= 0:
+        return 0
+    bucket = int(time.time() // window)
+    cache_key = f"throttle:{scope}:{key}:{bucket}"
+    if cache.add(cache_key, 1, window):
+        count = 1
+    else:
+        try:
+            count = cache.incr(cache_key)
+        except ValueError:  # expired between add() and incr()
+            cache.add(cache_key, 1, window)
+            count = 1
+    if count <= limit:
+        return 0
+    return max(1, int((bucket + 1) * window - time.time()))
+
+
+def client_ip(request) -> str:
+    """REMOTE_ADDR, or the first X-Forwarded-For hop when TRUST_X_FORWARDED_FOR is set."""
+    if getattr(settings, "TRUST_X_FORWARDED_FOR", False):
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,242 @@
+"""
+Memory-mapped, array-backed snapshot of item metadata shared by all workers.
+
+`build()` writes one file (ITEM_INDEX_PATH) after each import: fixed-width
+columns (uid, assessment/test/domain/skill ids, difficulty/module codes,
+score band, flags) plus an inverted index of sorted row ids per filter
+value. Every worker maps it read-only, so the pages live once in the OS
+page cache no matter how many processes read them, and filters are
+answered from memoryviews over the map without copying or touching the DB.
+
+The file is replaced atomically (os.replace); readers notice the new inode
+on their next check and remap.
+"""
+import json
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+
+MAGIC = b"ITIX"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sII")     # magic, format version, meta JSON length
+ALIGN = 8
+
+INT_COLUMNS = ("assessment", "test", "domain", "skill")   # int32, 0 = none
+BYTE_COLUMNS = ("difficulty", "module", "score_band", "flags")  # uint8
+POSTED = ("assessment", "test", "domain", "skill", "difficulty", "module")
+
+FLAG_HAS_OPTIONS = 1
+FLAG_DUPLICATE = 2
+
+RECHECK_SECONDS = 2.0
+
+
+def index_path() -> Path:
+    return Path(settings.ITEM_INDEX_PATH)
+
+
+# ---- writer ----
+def build(path: Optional[Path] = None) -> int:
+    """Snapshot Item metadata into the index file. Returns the row count."""
+    from .models import Item
+
+    path = Path(path or index_path())
+    uids = bytearray()
+    ints = {c: array("i") for c in INT_COLUMNS}
+    bytes_ = {c: array("B") for c in BYTE_COLUMNS}
+    vocab: Dict[str, Dict[str, int]] = {"difficulty": {}, "module": {}}
+    postings: Dict[str, Dict[str, array]] = {c: defaultdict(lambda: array("I")) for c in POSTED}
+    visible = array("I")   # rows the default list shows: has options, not a duplicate
+
+    rows = Item.objects.order_by("uid").values_list(
+        "uid", "assessment_id", "test_id", "domain_id", "skill_id",
+        "difficulty", "module", "score_band_range_cd", "answer_options", "duplicate_of_id",
+    )
+    n = 0
+    for uid, a, t, d, s, difficulty, module, band, options, dup in rows.iterator(chunk_size=5000):
+        uids += uid.bytes
+        for col, value in zip(INT_COLUMNS, (a, t, d, s)):
+            ints[col].append(value or 0)
+            if value:
+                postings[col][str(value)].append(n)
+        for col, value in (("difficulty", difficulty), ("module", module)):
+            key = (value or "").strip().lower()
+            code = vocab[col].setdefault(key, len(vocab[col]))
+            bytes_[col].append(code)
+            postings[col][key].append(n)
+        bytes_["score_band"].append(band if band and 0 < band < 256 else 0)
+        flags = (FLAG_HAS_OPTIONS if options else 0) | (FLAG_DUPLICATE if dup else 0)
+        bytes_["flags"].append(flags)
+        if flags == FLAG_HAS_OPTIONS:
+            visible.append(n)
+        n += 1
+
+    blobs: List[bytes] = []
+    layout: Dict[str, list] = {}
+    offset = 0
+
+    def add(blob: bytes) -> list:
+        nonlocal offset
+        pad = (-len(blob)) % ALIGN
+        blobs.append(blob + b"\0" * pad)
+        start = offset
+        offset += len(blob) + pad
+        return [start, len(blob)]
+
+    layout["uid"] = add(bytes(uids))
+    for col in INT_COLUMNS:
+        layout[col] = add(ints[col].tobytes())
+    for col in BYTE_COLUMNS:
+        layout[col] = add(bytes_[col].tobytes())
+    posting_layout = {
+        col: {key: add(ids.tobytes()) for key, ids in values.items()} for col, values in postings.items()
+    }
+    layout["visible"] = add(visible.tobytes())
+
+    meta = {
+        "count": n,
+        "built_at": time.time(),
+        "columns": layout,
+        "postings": posting_layout,
+        "vocab": vocab,
+    }
+    meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    head = _HEADER.pack(MAGIC, FORMAT_VERSION, len(meta_bytes)) + meta_bytes
+    head += b"\0" * ((-len(head)) % ALIGN)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(head)
+        for blob in blobs:
+            f.write(blob)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+    return n
+
+
+# ---- reader ----
+class ItemIndex:
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self.inode = (st.st_ino, st.st_mtime_ns)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not an item index (format {FORMAT_VERSION})")
+        self.meta = json.loads(bytes(self._mm[_HEADER.size:_HEADER.size + meta_len]))
+        base = _HEADER.size + meta_len
+        self._base = base + (-base) % ALIGN
+        self._view = memoryview(self._mm)
+        self.count = self.meta["count"]
+        cols = self.meta["columns"]
+        self.uids = self._slice(cols["uid"])
+        self.columns = {c: self._slice(cols[c]).cast("i") for c in INT_COLUMNS}
+        self.columns.update({c: self._slice(cols[c]) for c in BYTE_COLUMNS})
+        self.visible = self._slice(cols["visible"]).cast("I")
+        self.vocab = self.meta["vocab"]
+        self._vocab_keys = {col: {code: key for key, code in v.items()} for col, v in self.vocab.items()}
+
+    def _slice(self, span) -> memoryview:
+        start, length = span
+        return self._view[self._base + start:self._base + start + length]
+
+    def posting(self, column: str, code: int) -> memoryview:
+        """Sorted row ids whose `column` equals `code` (vocab code for module/difficulty)."""
+        key = code if column in INT_COLUMNS else self._vocab_keys[column][code]
+        span = self.meta["postings"][column].get(str(key))
+        return self._slice(span).cast("I") if span else memoryview(b"").cast("I")
+
+    def uid(self, row: int) -> uuid.UUID:
+        return uuid.UUID(bytes=bytes(self.uids[row * 16:row * 16 + 16]))
+
+    def filter(self, require_options=True, include_duplicates=False, **filters) -> Sequence[int]:
+        """
+        Row ids matching all filters (assessment/test/domain/skill ids,
+        module/difficulty case-insensitive), mirroring ItemViewSet.get_queryset.
+        The smallest posting list drives the scan; other filters are checked
+        against the mapped columns.
+        """
+        conds = []
+        for col, value in filters.items():
+            if value in (None, ""):
+                continue
+            if col in INT_COLUMNS:
+                code = int(value)
+                if code <= 0:
+                    return []  # 0 stores "no id" here, but as a filter it matches nothing, as in the DB
+            else:
+                code = self.vocab[col].get(str(value).strip().lower())
+                if code is None:
+                    return []
+            conds.append((col, code))
+
+        need = FLAG_HAS_OPTIONS if require_options else 0
+        reject = 0 if include_duplicates else FLAG_DUPLICATE
+        if conds:
+            conds.sort(key=lambda c: len(self.posting(*c)))
+            candidates: Sequence[int] = self.posting(*conds[0])
+            checks = [(self.columns[col], code) for col, code in conds[1:]]
+        elif need and reject:
+            return self.visible
+        else:
+            candidates, checks = range(self.count), []
+        if not need and not reject and not checks:
+            return candidates
+        flags = self.columns["flags"]
+        return [
+            r for r in candidates
+            if (flags[r] & need) == need and not flags[r] & reject and all(view[r] == code for view, code in checks)
+        ]
+
+    def count_matching(self, **filters) -> int:
+        return len(self.filter(**filters))
+
+    def sample(self, k: int, rng: Optional[random.Random] = None, **filters) -> List[uuid.UUID]:
+        rows = self.filter(**filters)
+        picked = (rng or random).sample(rows, min(k, len(rows)))
+        return [self.uid(r) for r in picked]
+
+
+_lock = threading.Lock()
+_current: Optional[ItemIndex] = None
+_checked_at = 0.0
+
+
+def get_index() -> Optional[ItemIndex]:
+    """The process-wide mapped index, remapped when the file is replaced; None if absent."""
+    global _current, _checked_at
+    now = time.monotonic()
+    if _current is not None and now - _checked_at < RECHECK_SECONDS:
+        return _current
+    with _lock:
+        _checked_at = now
+        path = index_path()
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            _current = None
+            return None
+        if _current is None or _current.path != path or _current.inode != (st.st_ino, st.st_mtime_ns):
+            # Old maps are left to the GC: in-flight requests may still hold views on them.
+            _current = ItemIndex(path)
+        return _current
+
+
+def reset():
+    global _current, _checked_at
+    with _lock:
+        _current, _checked_at = None, 0.0
@@ -0,0 +1,138 @@
+"""
+Incremental item statistics from submitted exam sessions.
+
+`update()` folds sessions not yet counted (ExamSession.in_stats = False,
+found through a partial index) into ItemStats: attempts, correct, a time
+histogram and the sums needed for the point-biserial correlation between
+getting the item right and the student's score on the rest of the exam.
+Only items that appear in the new sessions are read and written, and each
+batch is folded and marked in one transaction, so a run after a quiet
+period costs one index probe.
+
+Derived columns:
+  p_value         correct / attempts
+  median_time     interpolated from the histogram over TIME_BUCKETS
+  discrimination  (M1 - M0) / s * sqrt(p * q), with M1/M0 the mean rest
+                  score of students who got the item right/wrong and s
+                  the standard deviation of rest scores
+"""
+import math
+from typing import Dict, List, Optional
+
+from django.db import transaction
+
+from .models import ExamSession, Item, ItemStats, StatsRun
+
+# upper bounds in seconds; the last bucket is open-ended
+TIME_BUCKETS = [5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 300, 450, 600, 900]
+BATCH_SESSIONS = 500
+MIN_ATTEMPTS_FOR_DISCRIMINATION = 5
+
+
+def bucket(seconds: float) -> int:
+    for i, bound in enumerate(TIME_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(TIME_BUCKETS)
+
+
+def median_from_histogram(counts: List[int]) -> Optional[float]:
+    total = sum(counts)
+    if not total:
+        return None
+    half, seen = total / 2, 0
+    for i, n in enumerate(counts):
+        if n and seen + n >= half:
+            lo = TIME_BUCKETS[i - 1] if i else 0
+            hi = TIME_BUCKETS[i] if i < len(TIME_BUCKETS) else lo * 2
+            return round(lo + (hi - lo) * (half - seen) / n, 1)
+        seen += n
+    return None
+
+
+def derive(stats: ItemStats) -> ItemStats:
+    n, k = stats.attempts, stats.correct
+    stats.p_value = round(k / n, 4) if n else None
+    stats.median_time = median_from_histogram(stats.time_histogram)
+    stats.discrimination = None
+    if n >= MIN_ATTEMPTS_FOR_DISCRIMINATION and 0 < k < n:
+        mean = stats.score_sum / n
+        variance = stats.score_sq_sum / n - mean * mean
+        if variance > 1e-12:
+            m1 = stats.score_correct_sum / k
+            m0 = (stats.score_sum - stats.score_correct_sum) / (n - k)
+            p = k / n
+            stats.discrimination = round((m1 - m0) / math.sqrt(variance) * math.sqrt(p * (1 - p)), 4)
+    return stats
+
+
+def _attempts(session: Dict):
+    """(uid, correct, seconds or None, rest score) for each graded answer of a session."""
+    graded = {u: bool(r) for u, r in session["results"].items() if r is not None}
+    total, right = len(graded), sum(graded.values())
+    for uid, ok in graded.items():
+        rest = (right - ok) / (total - 1) if total > 1 else 0.0
+        seconds = session["timers"].get(uid)
+        yield uid, ok, seconds if isinstance(seconds, (int, float)) and seconds > 0 else None, rest
+
+
+def fold_batch(limit: int = BATCH_SESSIONS) -> Dict[str, int]:
+    """Fold up to `limit` new sessions into ItemStats in one transaction."""
+    with transaction.atomic():
+        sessions = list(
+            ExamSession.objects.select_for_update()
+            .filter(status=ExamSession.SUBMITTED, in_stats=False)
+            .order_by("id")
+            .values("id", "results", "timers")[:limit]
+        )
+        if not sessions:
+            return {"sessions": 0, "items": 0}
+
+        deltas: Dict[str, Dict] = {}
+        for session in sessions:
+            for uid, ok, seconds, rest in _attempts(session):
+                d = deltas.setdefault(uid, {"attempts": 0, "correct": 0, "times": [], "s": 0.0, "s2": 0.0, "s1": 0.0})
+                d["attempts"] += 1
+                d["correct"] += ok
+                if seconds is not None:
+                    d["times"].append(seconds)
+                d["s"] += rest
+                d["s2"] += rest * rest
+                d["s1"] += rest if ok else 0.0
+
+        known = {str(u) for u in Item.objects.filter(uid__in=list(deltas)).values_list("uid", flat=True)}
+        existing = {str(s.item_id): s for s in ItemStats.objects.filter(item_id__in=known)}
+        rows = []
+        for uid in known:
+            d = deltas[uid]
+            stats = existing.get(uid) or ItemStats(item_id=uid, time_histogram=[])
+            histogram = list(stats.time_histogram) or [0] * (len(TIME_BUCKETS) + 1)
+            for seconds in d["times"]:
+                histogram[bucket(seconds)] += 1
+            stats.time_histogram = histogram
+            stats.attempts += d["attempts"]
+            stats.correct += d["correct"]
+            stats.score_sum += d["s"]
+            stats.score_sq_sum += d["s2"]
+            stats.score_correct_sum += d["s1"]
+            rows.append(derive(stats))
+
+        fields = ["attempts", "correct", "p_value", "median_time", "discrimination", "time_histogram",
+                  "score_sum", "score_sq_sum", "score_correct_sum", "updated_at"]
+        ItemStats.objects.bulk_create(rows, update_conflicts=True, unique_fields=["item"], update_fields=fields)
+        ExamSession.objects.filter(id__in=[s["id"] for s in sessions]).update(in_stats=True)
+        StatsRun.objects.create(sessions=len(sessions), items=len(rows))
+    return {"sessions": len(sessions), "items": len(rows)}
+
+
+def update(progress=None) -> Dict[str, int]:
+    """Fold every pending session, batch by batch. progress(sessions_done) is called per batch."""
+    totals = {"sessions": 0, "items": 0}
+    while True:
+        counts = fold_batch()
+        if not counts["sessions"]:
+            return totals
+        totals["sessions"] += counts["sessions"]
+        totals["items"] += counts["items"]
+        if progress:
+            progress(totals["sessions"])
@@ -0,0 +1,337 @@
+"""
+Lightweight DB-backed job queue for long imports and scrapes.
+
+Jobs are rows in the Job table; `manage.py run_jobs` starts local worker
+processes that claim queued jobs with a conditional UPDATE (no broker).
+Handlers report progress through JobContext.progress(), which also
+heartbeats and checks for cancellation at most once a second in a single
+query. A handler may store a checkpoint with its progress; a job that is
+cancelled, fails, or whose worker dies (no heartbeat for STALE_SECONDS)
+can be re-queued and resumes from the last checkpoint.
+
+Every write a worker makes to its job is conditional on still owning it
+(status running, worker = its name). Once a stale job has been handed to
+another worker, the first one's next progress() raises JobLost and it
+stops without touching the row again. Handlers that spend long stretches
+in one call (the staged import) keep the heartbeat fresh from a Heartbeat
+thread.
+"""
+import io
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from . import catalog, item_index, item_stats
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 1.0
+STALE_SECONDS = 60
+SCRAPE_BATCH = 50
+
+HANDLERS: Dict[str, Callable[["JobContext"], str]] = {}
+
+
+def handler(kind: str):
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobLost(Exception):
+    """The job was re-queued (stale heartbeat) and now belongs to another worker."""
+
+
+def owned(job: Job):
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker)
+
+
+class Heartbeat(threading.Thread):
+    """
+    Keeps a job's heartbeat fresh while its handler is busy in one long call.
+    Its connection is opened on entry, before the handler may repoint the
+    default database (catalog.staged_database). `lost` is set once the job
+    no longer belongs to this worker, `cancelled` once cancellation is
+    requested; check() raises JobLost/JobCancelled accordingly.
+    """
+
+    def __init__(self, job: Job, interval: float = STALE_SECONDS / 6):
+        super().__init__(daemon=True)
+        self.job = job
+        self.interval = interval
+        self.lost = False
+        self.cancelled = False
+        self._ready = threading.Event()
+        self._done = threading.Event()
+
+    def run(self):
+        try:
+            connection.ensure_connection()
+            self._ready.set()
+            while not self._done.wait(self.interval):
+                self.beat()
+                if self.lost or self.cancelled:
+                    return
+        finally:
+            self._ready.set()
+            connection.close()
+
+    def beat(self):
+        if not owned(self.job).filter(cancel_requested=False).update(heartbeat_at=timezone.now()):
+            if owned(self.job).exists():
+                self.cancelled = True
+            else:
+                self.lost = True
+
+    def check(self, *args, force=False):
+        """
+        Raise if the last heartbeat found the job lost or cancelled. force=True
+        asks the database now, on the caller's connection, so only use it
+        outside staged_database (e.g. right before the swap).
+        """
+        if force and not (self.lost or self.cancelled):
+            self.beat()
+        if self.lost:
+            raise JobLost()
+        if self.cancelled:
+            raise JobCancelled()
+
+    def __enter__(self):
+        self.start()
+        self._ready.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        self.join()
+
+
+class JobContext:
+    def __init__(self, job: Job):
+        self.job = job
+        self.params = job.params or {}
+        self.checkpoint = dict(job.checkpoint or {})
+        self._saved_at = 0.0
+
+    def progress(self, done: int, total: Optional[int] = None, checkpoint: Optional[dict] = None, force=False):
+        """
+        Record progress (and a resume point); raises JobCancelled once
+        cancellation is requested and JobLost if another worker took the job over.
+        """
+        job = self.job
+        job.done = done
+        if total is not None:
+            job.total = total
+        if checkpoint is not None:
+            job.checkpoint = checkpoint
+        now = time.monotonic()
+        if not force and now - self._saved_at < HEARTBEAT_SECONDS:
+            return
+        self._saved_at = now
+        job.heartbeat_at = timezone.now()
+        saved = owned(job).filter(cancel_requested=False).update(
+            done=job.done, total=job.total, checkpoint=job.checkpoint, heartbeat_at=job.heartbeat_at,
+        )
+        if not saved:
+            raise JobCancelled() if owned(job).exists() else JobLost()
+
+
+# ---- queue operations ----
+def enqueue(kind: str, **params) -> Job:
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r} (known: {', '.join(sorted(HANDLERS))})")
+    return Job.objects.create(kind=kind, params=params)
+
+
+def cancel(job: Job) -> None:
+    """Queued jobs are cancelled at once; running ones stop at their next progress() call."""
+    if not Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(status=Job.CANCELLED, finished_at=timezone.now()):
+        Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(cancel_requested=True)
+    job.refresh_from_db()
+
+
+def resume(job: Job) -> bool:
+    """Re-queue a failed or cancelled job; it continues from its checkpoint."""
+    n = Job.objects.filter(pk=job.pk, status__in=[Job.FAILED, Job.CANCELLED]).update(
+        status=Job.QUEUED, cancel_requested=False, finished_at=None,
+    )
+    job.refresh_from_db()
+    return bool(n)
+
+
+def requeue_stale() -> int:
+    cutoff = timezone.now() - timedelta(seconds=STALE_SECONDS)
+    return Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=cutoff).update(status=Job.QUEUED, worker="")
+
+
+def claim(worker: str, pk: Optional[int] = None) -> Optional[Job]:
+    """Mark the oldest queued job (or job `pk`) as running for `worker`; None if there is none."""
+    requeue_stale()
+    queued = Job.objects.filter(status=Job.QUEUED)
+    if pk is not None:
+        queued = queued.filter(pk=pk)
+    for pk in queued.order_by("id").values_list("id", flat=True)[:5]:
+        now = timezone.now()
+        if Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=now, heartbeat_at=now, finished_at=None,
+        ):
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def run(job: Job) -> Job:
+    """Run a claimed job to completion in this process."""
+    job.run_start_done = job.done
+    owned(job).update(run_start_done=job.done)
+    ctx = JobContext(job)
+    status = Job.FAILED
+    try:
+        fn = HANDLERS.get(job.kind)
+        if fn is None:
+            raise ValueError(f"Unknown job kind {job.kind!r}")
+        message, status = fn(ctx) or "", Job.SUCCEEDED
+    except JobCancelled:
+        message, status = "Cancelled.", Job.CANCELLED
+    except JobLost:
+        logger.warning("Job %s (%s) was taken over by another worker; %s stops", job.pk, job.kind, job.worker)
+        job.refresh_from_db()
+        return job
+    except (KeyboardInterrupt, SystemExit):
+        # worker shutting down: hand the job back to the queue
+        owned(job).update(status=Job.QUEUED, worker="", done=job.done, checkpoint=job.checkpoint)
+        raise
+    except Exception as exc:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        message = f"{type(exc).__name__}: {exc}"
+    owned(job).update(
+        status=status, message=message, finished_at=timezone.now(),
+        done=job.done, total=job.total, checkpoint=job.checkpoint,
+    )
+    job.refresh_from_db()
+    return job
+
+
+def work(worker: Optional[str] = None, once: bool = False, poll: float = 1.0) -> int:
+    """Worker loop: claim and run jobs; with once=True, stop when the queue is empty."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    ran = 0
+    while True:
+        close_old_connections()
+        job = claim(worker)
+        if job is not None:
+            run(job)
+            ran += 1
+        elif once:
+            return ran
+        else:
+            time.sleep(poll)
+
+
+# ---- handlers ----
+def _importer():
+    from .assets import AssetStore
+    from .management.commands.import_sat_json import Command
+
+    return Command(stdout=io.StringIO()), AssetStore
+
+
+@handler("import_sat_json")
+def import_sat_json(ctx: JobContext) -> str:
+    """params: path, staged, allow_shrink, fetch_assets. Checkpoint: {"next": item offset}."""
+    path = Path(ctx.params["path"])
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("Expected top-level JSON object keyed by UID.")
+    ctx.progress(ctx.job.done, total=len(data), force=True)
+
+    cmd, AssetStore = _importer()
+    assets = AssetStore(fetch_remote=ctx.params.get("fetch_assets", False))
+    if ctx.params.get("staged"):
+        # The load writes to the staging copy, so progress is only reported around it; meanwhile
+        # a side thread heartbeats, and the import stops (before the swap) if the job was lost or
+        # cancelled. Once the swap has committed the job has succeeded, even if cancelled since.
+        with Heartbeat(ctx.job) as heartbeat:
+            cmd.import_staged(path, data, assets, ctx.params.get("allow_shrink", False), progress=heartbeat.check)
+        ctx.job.done = len(data)
+    else:
+        cmd.load(data, assets, start=ctx.checkpoint.get("next", 0),
+                 progress=lambda done: ctx.progress(done, checkpoint={"next": done}))
+        catalog.bump(path.name)
+        indexed = item_index.build()
+        cmd.stdout.write(f"Assets: {assets.stored} stored, {assets.reused} reused. Index: {indexed} items.")
+    return cmd.stdout.getvalue().strip()
+
+
+@handler("item_stats")
+def fold_item_stats(ctx: JobContext) -> str:
+    """Fold newly submitted exam sessions into ItemStats (safe to enqueue periodically)."""
+    totals = item_stats.update(progress=lambda n: ctx.progress(n))
+    return f"Folded {totals['sessions']} sessions into {totals['items']} item stats."
+
+
+def scraped_payload(pq) -> dict:
+    """api.scrapers.ParsedQuestion in the import_sat_json input shape."""
+    return {
+        "program": "SAT",
+        "module": "math" if pq.section == "MC" else "reading",
+        "questionId": pq.source_uid,
+        "external_id": pq.source_uid,
+        "content": {
+            "stem": pq.text,
+            "rationale": pq.explanation,
+            "answerOptions": [{"id": c.label, "content": c.text} for c in pq.choices],
+            "correct_answer": [pq.correct_answer] if pq.correct_answer else pq.keys,
+            "keys": pq.keys,
+            "origin": pq.url,
+        },
+    }
+
+
+@handler("scrape_sat")
+def scrape_sat(ctx: JobContext) -> str:
+    """params: limit (0 = all). Checkpoint: {"next": question URLs already imported}."""
+    from .scrapers import SatOnrenderScraper  # needs requests + beautifulsoup4 + lxml
+
+    limit = int(ctx.params.get("limit") or 0)
+    skip = ctx.checkpoint.get("next", 0)
+    scraper = SatOnrenderScraper()
+    cmd, AssetStore = _importer()
+    assets = AssetStore()
+    batch, n = {}, skip
+    for i, url in enumerate(scraper.all_question_urls(), 1):
+        if limit and i > limit:
+            break
+        if i <= skip:
+            continue
+        n = i
+        pq = scraper.parse_question(url)
+        if pq:
+            batch[str(uuid.uuid5(uuid.NAMESPACE_URL, url))] = scraped_payload(pq)
+        if len(batch) >= SCRAPE_BATCH:
+            cmd.load(batch, assets)
+            batch = {}
+            ctx.progress(n, total=limit or None, checkpoint={"next": n})
+        else:
+            ctx.progress(n, total=limit or None)
+    cmd.load(batch, assets)
+    ctx.progress(n, checkpoint={"next": n}, force=True)
+    catalog.bump("scrape_sat")
+    item_index.build()
+    return f"Scraped {n} question pages."
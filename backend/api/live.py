@@ -0,0 +1,273 @@
+"""
+Live classroom progress over websockets (raw ASGI, routed in backend/asgi.py).
+
+Teachers connect to /ws/classes/<id>/progress/ and receive the class's
+per-student progress (answered count, accuracy by Domain) as it changes.
+Each class has one Room per ASGI process while anyone is watching: it polls
+the class's change marker in the exam session cache (exam_sessions.
+class_version, bumped by every autosave/submit), and when it moved, at
+most once per LIVE_PROGRESS_INTERVAL, recomputes the aggregate and JSON
+encodes it once, then fans the same text out to every viewer through the
+channel layer. Cost therefore scales with classes being watched, not with
+viewers x refresh rate, and nothing is computed for classes nobody watches.
+
+InMemoryChannelLayer implements the group/channel subset of the Channels
+layer API for a single process (used by default and in tests); per-viewer
+queues are bounded and drop the oldest update, so a slow socket never holds
+up the others.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from importlib import import_module
+from types import SimpleNamespace
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import exam_sessions, grading, taxonomy
+from .models import Classroom, ExamSession, Item
+
+logger = logging.getLogger(__name__)
+
+PATH = re.compile(r"^/ws/classes/(?P<pk>\d+)/progress/$")
+RECENT_HOURS = 12   # submitted sessions stay on the dashboard this long
+
+
+class InMemoryChannelLayer:
+    def __init__(self, capacity: int = 20):
+        self.capacity = capacity
+        self.channels: Dict[str, asyncio.Queue] = {}
+        self.groups: Dict[str, Set[str]] = defaultdict(set)
+
+    def new_channel(self, prefix: str = "live") -> str:
+        name = f"{prefix}.{uuid.uuid4().hex}"
+        self.channels[name] = asyncio.Queue(self.capacity)
+        return name
+
+    async def send(self, channel: str, message: dict) -> None:
+        queue = self.channels.get(channel)
+        if queue is None:
+            return
+        if queue.full():
+            queue.get_nowait()  # drop the oldest; only the latest progress matters
+        queue.put_nowait(message)
+
+    async def receive(self, channel: str) -> dict:
+        return await self.channels[channel].get()
+
+    async def group_add(self, group: str, channel: str) -> None:
+        self.groups[group].add(channel)
+
+    async def group_discard(self, group: str, channel: str) -> None:
+        self.groups[group].discard(channel)
+        if not self.groups[group]:
+            del self.groups[group]
+        if not any(channel in members for members in self.groups.values()):
+            self.channels.pop(channel, None)
+
+    async def group_send(self, group: str, message: dict) -> None:
+        for channel in list(self.groups.get(group, ())):
+            await self.send(channel, message)
+
+
+_layer = None
+
+
+def get_layer():
+    global _layer
+    if _layer is None:
+        _layer = import_string(settings.LIVE_CHANNEL_LAYER)()
+    return _layer
+
+
+def group_name(classroom_id: int) -> str:
+    return f"class.{classroom_id}"
+
+
+# ---- aggregation ----
+def classroom_progress(classroom_id: int, item_meta: Optional[Dict] = None) -> Dict:
+    """
+    Progress of the class's active and recently submitted exam sessions.
+    item_meta (uid -> (domain_id, answer_key)) is filled in place so a Room
+    only looks up items it has not seen before.
+    """
+    item_meta = {} if item_meta is None else item_meta
+    since = timezone.now() - timedelta(hours=RECENT_HOURS)
+    rows = list(
+        ExamSession.objects.filter(classroom_id=classroom_id)
+        .filter(Q(status=ExamSession.ACTIVE) | Q(submitted_at__gte=since))
+        .order_by("user__username", "id")
+        .values("id", "user_id", "user__username", "status", "items", "answers", "deadline")
+    )
+    cached = exam_sessions.cached_states([r["id"] for r in rows if r["status"] == ExamSession.ACTIVE])
+
+    unseen = {u for r in rows for u in r["items"]} - item_meta.keys()
+    if unseen:
+        for uid, domain_id, key in Item.objects.filter(uid__in=unseen).values_list("uid", "domain_id", "answer_key"):
+            item_meta[str(uid)] = (domain_id, key)
+
+    labels = taxonomy.get().domain_labels
+    students = []
+    for row in rows:
+        answers = (cached.get(row["id"]) or row)["answers"]
+        by_domain: Dict[str, Dict[str, int]] = {}
+        answered = correct = 0
+        for uid, answer in answers.items():
+            if answer in (None, "") or uid not in item_meta:
+                continue
+            domain_id, key = item_meta[uid]
+            answered += 1
+            ok = grading.grade(key, answer)
+            correct += bool(ok)
+            code = labels.get(domain_id, ("", ""))[0] or "other"
+            stats = by_domain.setdefault(code, {"answered": 0, "correct": 0})
+            stats["answered"] += 1
+            stats["correct"] += bool(ok)
+        students.append({
+            "session": row["id"],
+            "user": row["user_id"],
+            "username": row["user__username"],
+            "status": row["status"],
+            "deadline": row["deadline"],
+            "total": len(row["items"]),
+            "answered": answered,
+            "correct": correct,
+            "accuracy": round(correct / answered, 3) if answered else None,
+            "domains": {code: {**s, "accuracy": round(s["correct"] / s["answered"], 3)} for code, s in by_domain.items()},
+        })
+    return {"classroom": classroom_id, "generated_at": time.time(), "students": students}
+
+
+class Room:
+    """Watchers of one class in this process, and the task that feeds them."""
+
+    def __init__(self, classroom_id: int):
+        self.classroom_id = classroom_id
+        self.viewers = 0
+        self.task: Optional[asyncio.Task] = None
+        self.item_meta: Dict = {}
+        self.message: Optional[dict] = None
+        self.version = None
+        self.computed_at = 0.0
+
+    async def run(self):
+        layer = get_layer()
+        while True:
+            version = await sync_to_async(exam_sessions.class_version)(self.classroom_id)
+            stale = time.monotonic() - self.computed_at >= settings.LIVE_PROGRESS_MAX_AGE
+            if self.message is None or version != self.version or stale:
+                self.version = version
+                self.computed_at = time.monotonic()
+                try:
+                    data = await sync_to_async(classroom_progress)(self.classroom_id, self.item_meta)
+                except Exception:
+                    logger.exception("live progress for class %s failed", self.classroom_id)
+                else:
+                    # encoded once, sent to every viewer as is
+                    self.message = {"type": "progress", "text": json.dumps(data, cls=DjangoJSONEncoder)}
+                    await layer.group_send(group_name(self.classroom_id), self.message)
+            await asyncio.sleep(settings.LIVE_PROGRESS_INTERVAL)
+
+
+rooms: Dict[int, Room] = {}
+
+
+def join(classroom_id: int) -> Room:
+    room = rooms.get(classroom_id)
+    if room is None:
+        room = rooms[classroom_id] = Room(classroom_id)
+    room.viewers += 1
+    if room.task is None:
+        room.task = asyncio.ensure_future(room.run())
+    return room
+
+
+def leave(room: Room) -> None:
+    room.viewers -= 1
+    if room.viewers <= 0:
+        if room.task is not None:
+            room.task.cancel()
+        rooms.pop(room.classroom_id, None)
+
+
+# ---- websocket endpoint ----
+def _headers(scope) -> Dict[str, str]:
+    return {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+
+
+def origin_allowed(scope) -> bool:
+    """Block cross-site websocket hijacking: the Origin must be this host or a CORS-allowed origin."""
+    headers = _headers(scope)
+    origin = headers.get("origin")
+    if not origin:
+        return True
+    return origin in settings.CORS_ALLOWED_ORIGINS or urlparse(origin).netloc == headers.get("host")
+
+
+def scope_user(scope):
+    """The session user for a websocket handshake (same cookie as the HTTP API)."""
+    cookies = {}
+    for part in _headers(scope).get("cookie", "").split(";"):
+        name, _, value = part.strip().partition("=")
+        cookies[name] = value
+    store = import_module(settings.SESSION_ENGINE).SessionStore(cookies.get(settings.SESSION_COOKIE_NAME))
+    return get_user(SimpleNamespace(session=store))
+
+
+def can_watch(user, classroom_id: int) -> bool:
+    if not user.is_authenticated:
+        return False
+    return user.is_staff or Classroom.objects.filter(pk=classroom_id, teacher=user).exists()
+
+
+async def websocket_application(scope, receive, send):
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+    match = PATH.match(scope["path"])
+    if not match:
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    classroom_id = int(match["pk"])
+    user = await sync_to_async(scope_user)(scope)
+    if not origin_allowed(scope) or not await sync_to_async(can_watch)(user, classroom_id):
+        await send({"type": "websocket.close", "code": 4403})
+        return
+    await send({"type": "websocket.accept"})
+
+    layer = get_layer()
+    channel = layer.new_channel()
+    group = group_name(classroom_id)
+    await layer.group_add(group, channel)
+    room = join(classroom_id)
+    if room.message is not None:
+        await layer.send(channel, room.message)
+
+    async def pump():
+        while True:
+            update = await layer.receive(channel)
+            await send({"type": "websocket.send", "text": update["text"]})
+
+    pump_task = asyncio.ensure_future(pump())
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break  # anything the client sends is ignored
+    finally:
+        pump_task.cancel()
+        await layer.group_discard(group, channel)
+        leave(room)
@@ -0,0 +1,119 @@
+import io
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api import benchmarks, item_index
+from api.models import Domain, Item
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark import and /api/items/ endpoints on synthetic banks, each in a fresh "
+        "throwaway SQLite database, and compare against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1k", help="Comma-separated bank sizes, e.g. 1k,100k,1m.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed requests per endpoint.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline.")
+        parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%).")
+        parser.add_argument("--check", action="store_true", help="Exit non-zero on regressions.")
+        parser.add_argument("--output", help="Also write results as JSON to this path.")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            raise CommandError("The benchmark suite runs against SQLite only.")
+
+        results = {}
+        # DEBUG query logging would skew timings and memory on big banks
+        with tempfile.TemporaryDirectory(prefix="bench-") as workdir, override_settings(
+            # repeated bench logins would trip the login throttle
+            DEBUG=False, ITEM_INDEX_PATH=Path(workdir) / "item_index.bin", LOGIN_THROTTLE=(0, 0, 60),
+        ):
+            for size in opts["sizes"].split(","):
+                n = benchmarks.parse_size(size)
+                results[size.strip()] = self.run_size(n, Path(workdir), opts)
+
+        self.report(results)
+
+        if opts["output"]:
+            Path(opts["output"]).write_text(json.dumps(results, indent=2))
+
+        baseline_path = Path(opts["baseline"])
+        if opts["save_baseline"]:
+            baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+            baseline.update(results)
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+        elif baseline_path.exists():
+            problems = benchmarks.compare(results, json.loads(baseline_path.read_text()), opts["tolerance"])
+            for p in problems:
+                self.stdout.write(self.style.WARNING(f"REGRESSION {p}"))
+            if not problems:
+                self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
+            elif opts["check"]:
+                raise CommandError(f"{len(problems)} regression(s) against {baseline_path}")
+
+    def run_size(self, n, workdir, opts):
+        bank = workdir / f"bank_{n}.json"
+        self.stderr.write(f"[{n}] generating bank ...")
+        benchmarks.write_bank(bank, n, seed=opts["seed"])
+
+        old_name, old_test_name = connection.settings_dict["NAME"], connection.settings_dict["TEST"]["NAME"]
+        connection.settings_dict["TEST"]["NAME"] = str(workdir / f"bench_{n}.sqlite3")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stderr.write(f"[{n}] importing ...")
+            counter = benchmarks.QueryCounter()
+            t0 = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                call_command("import_sat_json", str(bank), stdout=io.StringIO())
+            elapsed = time.perf_counter() - t0
+            out = {"import": {"median_ms": round(elapsed * 1000, 1), "p95_ms": round(elapsed * 1000, 1),
+                              "queries": counter.count, "items_per_s": round(n / elapsed, 1)}}
+
+            self.stderr.write(f"[{n}] timing endpoints ...")
+            item_index.reset()
+            domain_id = Domain.objects.order_by("id").values_list("id", flat=True).first()
+            deep_page = max(1, Item.objects.count() // settings.REST_FRAMEWORK["PAGE_SIZE"] // 2)
+            out.update(benchmarks.run_scenarios(benchmarks.default_scenarios(domain_id, deep_page), opts["repeat"]))
+            uid = Item.objects.order_by("uid").values_list("uid", flat=True).first()
+            wire = [("list", "/api/items/"), ("detail", f"/api/items/{uid}/")]
+            out["wire"] = benchmarks.wire_scenarios(wire, opts["repeat"])
+            User.objects.create_user("bench", "bench@example.com", "bench-password")
+            out.update(benchmarks.auth_scenarios("bench@example.com", "bench-password", opts["repeat"]))
+            return out
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict["TEST"]["NAME"] = old_test_name
+
+    def report(self, results):
+        for size, scenarios in results.items():
+            self.stdout.write(f"\n== {size} items ==")
+            self.stdout.write(f"{'scenario':<28}{'median ms':>12}{'p95 ms':>12}{'queries':>10}")
+            for name, r in scenarios.items():
+                if name == "wire":
+                    continue
+                self.stdout.write(f"{name:<28}{r['median_ms']:>12.2f}{r['p95_ms']:>12.2f}{r['queries']:>10}")
+            imp = scenarios.get("import", {})
+            if imp:
+                self.stdout.write(f"import throughput: {imp['items_per_s']:.0f} items/s")
+            wire = scenarios.get("wire", {})
+            if wire:
+                self.stdout.write(f"{'response':<28}{'bytes':>12}{'cpu ms':>12}{'miss +ms':>10}")
+                for name, r in wire.items():
+                    self.stdout.write(f"{name:<28}{r['bytes']:>12}{r['cpu_ms']:>12.2f}{r['encode_cpu_ms']:>10.2f}")
@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+# Filtered scans as issued by ItemViewSet (COUNT for pagination + one page)
+COUNT_SQL = "SELECT COUNT(*) FROM {t} WHERE answer_options != '[]' AND lower(module) = 'math' AND difficulty = 'M'"
+PAGE_SQL = (
+    "SELECT uid, stem, answer_options FROM {t} WHERE answer_options != '[]' AND lower(module) = 'math' "
+    "ORDER BY create_date LIMIT 25 OFFSET 500"
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the split Item/ItemBody layout against the legacy wide Item row: "
+        "table size and filtered scan latency (SQLite only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            raise CommandError("bench_item_table only supports SQLite.")
+
+        with connection.cursor() as cur:
+            cur.execute("SELECT COUNT(*) FROM api_item")
+            n = cur.fetchone()[0]
+            if not n:
+                raise CommandError("No items; import a bank first.")
+
+            # Rebuild the pre-split layout in a temp table for comparison.
+            cur.execute("DROP TABLE IF EXISTS temp.bench_wide_item")
+            cur.execute(
+                "CREATE TEMP TABLE bench_wide_item AS "
+                "SELECT i.*, b.rationale, b.content FROM api_item i LEFT JOIN api_itembody b ON b.item_id = i.uid"
+            )
+
+            sizes = {}
+            for name in ("api_item", "api_itembody"):
+                cur.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = %s", [name])
+                sizes[name] = cur.fetchone()[0]
+            cur.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat('temp') WHERE name = 'bench_wide_item'")
+            sizes["wide (legacy)"] = cur.fetchone()[0]
+
+            self.stdout.write(f"{n} items")
+            for name, size in sizes.items():
+                self.stdout.write(f"  {name:<16} {size / 1024:>10.0f} KiB  ({size / n:.0f} B/item)")
+
+            for label, sql in (("filtered COUNT", COUNT_SQL), ("filtered page", PAGE_SQL)):
+                split = self.time(cur, sql.format(t="api_item"), opts["repeat"])
+                wide = self.time(cur, sql.format(t="temp.bench_wide_item"), opts["repeat"])
+                self.stdout.write(
+                    f"  {label:<16} split {split:8.2f} ms   wide {wide:8.2f} ms   ({wide / split if split else 0:.1f}x)"
+                )
+
+            cur.execute("DROP TABLE temp.bench_wide_item")
+
+    def time(self, cur, sql, repeat):
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            samples.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(samples)
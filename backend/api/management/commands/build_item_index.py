@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api import item_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the memory-mapped item index (ITEM_INDEX_PATH) from the database."
+
+    def handle(self, *args, **opts):
+        path = item_index.index_path()
+        n = item_index.build(path)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {n} items into {path} ({path.stat().st_size} bytes)."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import catalog, item_index
+from api.models import CatalogVersion
+
+
+class Command(BaseCommand):
+    help = "Show catalog versions, or --rollback to the catalog from before the last staged swap."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rollback", action="store_true")
+        parser.add_argument("--show", type=int, default=10, help="How many versions to list.")
+
+    def handle(self, *args, **opts):
+        if opts["rollback"]:
+            try:
+                version = catalog.rollback()
+            except (FileNotFoundError, ValueError) as exc:
+                raise CommandError(str(exc))
+            item_index.build()
+            self.stdout.write(self.style.SUCCESS(
+                f"Rolled back: catalog version {version.version} ({version.item_count} items)."
+            ))
+
+        for v in CatalogVersion.objects.order_by("-id")[:opts["show"]]:
+            self.stdout.write(f"  v{v.version}  {v.created_at:%Y-%m-%d %H:%M:%S}  {v.item_count:>8} items  {v.source}")
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import catalog, dedup, item_index
+from api.models import Item, ItemFingerprint
+
+
+def chunked(seq, size=500):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+class Command(BaseCommand):
+    help = "Report (and optionally flag) near-duplicate items using stored MinHash signatures."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=dedup.DEFAULT_THRESHOLD,
+                            help="Estimated Jaccard similarity needed to cluster two items.")
+        parser.add_argument("--rebuild", action="store_true",
+                            help="Fingerprint items that have no signature yet before clustering.")
+        parser.add_argument("--flag", action="store_true",
+                            help="Set Item.duplicate_of for every non-canonical cluster member.")
+        parser.add_argument("--show", type=int, default=20, help="Clusters to print (0 = none).")
+
+    def handle(self, *args, **opts):
+        if opts["rebuild"]:
+            self.rebuild()
+
+        pairs = ItemFingerprint.objects.values_list("item_id", "signature").iterator(chunk_size=2000)
+        clusters = dedup.find_clusters(pairs, threshold=opts["threshold"])
+
+        members = [uid for c in clusters for uid in c]
+        info = {}
+        for chunk in chunked(members):
+            for row in Item.objects.filter(uid__in=chunk).values("uid", "question_id", "create_date"):
+                info[row["uid"]] = row
+        rank = {uid: (row["create_date"] is None, row["create_date"] or 0, str(uid)) for uid, row in info.items()}
+
+        resolved = []
+        for cluster in clusters:
+            canonical = dedup.pick_canonical(cluster, rank)
+            resolved.append((canonical, [uid for uid in cluster if uid != canonical]))
+        resolved.sort(key=lambda c: -len(c[1]))
+
+        dupes = sum(len(others) for _, others in resolved)
+        self.stdout.write(f"{len(resolved)} clusters, {dupes} duplicate items (threshold {opts['threshold']}).")
+        for canonical, others in resolved[:opts["show"]]:
+            qid = (info.get(canonical) or {}).get("question_id") or "-"
+            self.stdout.write(f"  {canonical} [{qid}] <- {len(others)}: " + ", ".join(str(u) for u in others[:5])
+                              + (" ..." if len(others) > 5 else ""))
+
+        if opts["flag"]:
+            with transaction.atomic():
+                Item.objects.filter(duplicate_of__isnull=False).update(duplicate_of=None)
+                for canonical, others in resolved:
+                    for chunk in chunked(others):
+                        Item.objects.filter(uid__in=chunk).update(duplicate_of=canonical)
+                catalog.bump("dedup_items --flag", content_changed=False)  # facet columns untouched
+            item_index.build()
+            self.stdout.write(self.style.SUCCESS(f"Flagged {dupes} items as duplicates."))
+
+    def rebuild(self):
+        missing = Item.objects.filter(fingerprint__isnull=True).values_list("uid", "stem", "answer_options")
+        batch, total = [], 0
+        for uid, stem, options in missing.iterator(chunk_size=2000):
+            text = dedup.item_text(stem, options or [])
+            batch.append(ItemFingerprint(item_id=uid, text_hash=dedup.text_hash(text), signature=dedup.signature(text)))
+            if len(batch) >= 2000:
+                ItemFingerprint.objects.bulk_create(batch, batch_size=500)
+                total += len(batch)
+                batch = []
+        ItemFingerprint.objects.bulk_create(batch, batch_size=500)
+        total += len(batch)
+        self.stdout.write(f"Fingerprinted {total} items.")
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import exam_sessions
+
+
+class Command(BaseCommand):
+    help = "Snapshot cached exam session state to the database and submit sessions whose time ran out."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", type=float, default=0, help="Repeat every N seconds instead of once.")
+
+    def handle(self, *args, **opts):
+        while True:
+            counts = exam_sessions.flush()
+            self.stdout.write(f"Saved {counts['saved']}, submitted {counts['submitted']} exam session(s).")
+            if not opts["loop"]:
+                break
+            time.sleep(opts["loop"])
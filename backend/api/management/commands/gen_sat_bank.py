@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api import benchmarks
+
+
+class Command(BaseCommand):
+    help = "Write a synthetic item bank in the import_sat_json JSON shape (e.g. for benchmarks)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("json_path", type=str, help="Output path")
+        parser.add_argument("--size", default="1k", help="Number of items, e.g. 1000, 100k, 1m.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **opts):
+        n = benchmarks.parse_size(opts["size"])
+        benchmarks.write_bank(opts["json_path"], n, seed=opts["seed"])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {n} items to {opts['json_path']}"))
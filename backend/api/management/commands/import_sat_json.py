@@ -2,7 +2,10 @@ import json
 from pathlib import Path
 
 from django.core.management.base import BaseCommand, CommandError
-from api.models import Assessment, Test, Domain, Skill, Item
+from django.db import connection, transaction
+from api.models import Item, ItemBody, ItemFingerprint
+from api import catalog, dedup, grading, item_index, jobs, rendering, taxonomy
+from api.assets import AssetStore
 
 
 class Command(BaseCommand):
@@ -10,21 +13,89 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("json_path", type=str, help="Path to the JSON file")
+        parser.add_argument("--fetch-assets", action="store_true",
+                            help="Also download remote <img> sources into the local asset store.")
+        parser.add_argument("--staged", action="store_true",
+                            help="Import into a staging copy, validate, then swap the catalog in atomically.")
+        parser.add_argument("--allow-shrink", action="store_true",
+                            help="With --staged, accept a catalog with fewer items than the live one.")
+        parser.add_argument("--queue", action="store_true",
+                            help="Enqueue as a background job for `run_jobs` instead of importing here.")
 
     def handle(self, *args, **options):
         json_path = Path(options["json_path"])
         if not json_path.exists():
             raise CommandError(f"File not found: {json_path}")
 
+        if options["queue"]:
+            job = jobs.enqueue(
+                "import_sat_json", path=str(json_path.resolve()), staged=options["staged"],
+                allow_shrink=options["allow_shrink"], fetch_assets=options["fetch_assets"],
+            )
+            self.stdout.write(self.style.SUCCESS(f"Queued job {job.pk}; follow it at /api/jobs/{job.pk}/."))
+            return
+
         with json_path.open("r", encoding="utf-8") as f:
             data = json.load(f)
 
         if not isinstance(data, dict):
             raise CommandError("Expected top-level JSON object keyed by UID.")
 
+        assets = AssetStore(fetch_remote=options["fetch_assets"])
+        if options["staged"]:
+            return self.import_staged(json_path, data, assets, options["allow_shrink"])
+
+        created, updated = self.load(data, assets)
+        catalog.bump(json_path.name)
+        indexed = item_index.build()
+        self.stdout.write(self.style.SUCCESS(
+            f"Import complete: {created} created, {updated} updated. "
+            f"Assets: {assets.stored} stored, {assets.reused} reused. Index: {indexed} items."
+        ))
+
+    def import_staged(self, json_path, data, assets, allow_shrink, progress=None):
+        """
+        Import into a copy of the database, validate it there, then swap the
+        catalog tables into the live database in one transaction.
+        """
+        if connection.vendor != "sqlite":
+            raise CommandError("--staged needs the SQLite backend.")
+        live_counts = catalog.counts()
+        staging = catalog.staging_path()
+        catalog.snapshot(staging)
+        try:
+            with catalog.staged_database(staging):
+                # Nobody else reads the staging copy, so one transaction is safe (and much faster).
+                with transaction.atomic():
+                    created, updated = self.load(data, assets, progress=progress)
+                problems = catalog.validate(live_counts, allow_shrink=allow_shrink)
+            if problems:
+                raise CommandError("Staged import rejected, live catalog untouched:\n  " + "\n  ".join(problems))
+            if progress:
+                progress(created + updated, force=True)  # last chance for the caller to stop before the swap
+            version = catalog.swap_in(staging, source=json_path.name)
+        finally:
+            staging.unlink(missing_ok=True)
+        indexed = item_index.build()
+        self.stdout.write(self.style.SUCCESS(
+            f"Import complete: {created} created, {updated} updated. "
+            f"Assets: {assets.stored} stored, {assets.reused} reused. Index: {indexed} items. "
+            f"Catalog version {version.version} ({version.item_count} items)."
+        ))
+
+    def load(self, data, assets, start=0, progress=None):
+        """
+        Upsert items from `data` (skipping the first `start`). `progress(done)`
+        is called after each flushed batch; items before `done` are complete,
+        so it is a safe point to resume from.
+        """
         created, updated = 0, 0
+        bodies, fingerprints = [], []
+        tax = taxonomy.get(refresh=True)
 
-        for uid, payload in data.items():
+        for n, (uid, payload) in enumerate(data.items()):
+            if n < start:
+                continue
             # ---------- pull/normalize content FIRST (so 'content' is defined) ----------
             content = payload.get("content") or {}
 
@@ -52,6 +123,8 @@ class Command(BaseCommand):
             external_id = payload.get("external_id")
             score_band_range_cd = payload.get("score_band_range_cd")
             ibn = payload.get("ibn")
+            update_date = payload.get("updateDate") or payload.get("update_date")
+            create_date = payload.get("createDate") or payload.get("create_date")
 
             # text html fields from content
             stem = content.get("stem") or content.get("prompt") or content.get("question") or ""
@@ -64,6 +137,8 @@ class Command(BaseCommand):
             )
             if isinstance(correct_answers, str):
                 correct_answers = [correct_answers]
+            # compiled before the fallback below: option texts are not answers
+            answer_key = grading.compile_key(correct_answers, content.get("keys") or [])
             if not correct_answers:
                 correct_answers = norm_opts
 
@@ -72,29 +147,16 @@ class Command(BaseCommand):
                 "reading": "Reading and Writing",
                 "reading and writing": "Reading and Writing",
             }.get(module_raw, module_raw or "Unknown")
-            assess, _ = Assessment.objects.get_or_create(name=program)
-            test, _ = Test.objects.get_or_create(name=test_name)
+            assess_id = tax.ensure_assessment(program)
+            test_id = tax.ensure_test(test_name)
 
-            domain = None
+            domain_id = None
             if primary_class_cd or primary_class_cd_desc:
-                domain, _ = Domain.objects.get_or_create(
-                    code=primary_class_cd or "",
-                    defaults={"name": primary_class_cd_desc or primary_class_cd or ""},
-                )
-                if primary_class_cd_desc and (domain.name != primary_class_cd_desc):
-                    domain.name = primary_class_cd_desc
-                    domain.save(update_fields=["name"])
-
-            skill = None
-            if (skill_cd or skill_desc) and domain:
-                skill, _ = Skill.objects.get_or_create(
-                    code=skill_cd or "",
-                    domain=domain,
-                    defaults={"name": skill_desc or skill_cd or ""},
-                )
-                if skill_desc and (skill.name != skill_desc):
-                    skill.name = skill_desc
-                    skill.save(update_fields=["name"])
+                domain_id = tax.ensure_domain(primary_class_cd or "", primary_class_cd_desc or "")
+
+            skill_id = None
+            if (skill_cd or skill_desc) and domain_id:
+                skill_id = tax.ensure_skill(skill_cd or "", skill_desc or "", domain_id)
 
             # keep extra bits in content_slim
             content_slim = dict(content)
@@ -115,6 +177,12 @@ class Command(BaseCommand):
                     extras.pop(k, None)
             content_slim.update(extras)
 
+            # move embedded images/SVGs into the content-addressed asset store
+            stem = assets.rewrite_html(stem)
+            rationale = assets.rewrite_html(rationale)
+            norm_opts = assets.rewrite(norm_opts)
+            content_slim = assets.rewrite(content_slim)
+
             defaults = {
                 "question_id": question_id,
                 "program": program,
@@ -125,15 +193,19 @@ class Command(BaseCommand):
                 "score_band_range_cd": score_band_range_cd,
                 "external_id": external_id,
                 "stem": stem or "",
-                "rationale": rationale or "",
                 "correct_answers": correct_answers,
+                "answer_key": answer_key,
                 "answer_options": norm_opts,
-                "content": content_slim, 
-                "assessment": assess,
-                "test": test,
-                "domain": domain,
-                "skill": skill,
+                "assessment_id": assess_id,
+                "test_id": test_id,
+                "domain_id": domain_id,
+                "skill_id": skill_id,
             }
+            # source timestamps (epoch ms) drive the API's Last-Modified/ETag; keep them when absent
+            if update_date:
+                defaults["update_date"] = update_date
+            if create_date:
+                defaults["create_date"] = create_date
 
             obj, was_created = Item.objects.update_or_create(uid=uid, defaults=defaults)
             if was_created:
@@ -141,4 +213,52 @@ class Command(BaseCommand):
             else:
                 updated += 1
 
-        self.stdout.write(self.style.SUCCESS(f"Import complete: {created} created, {updated} updated."))
+            bodies.append(ItemBody(item=obj, rationale=rationale or "", content=content_slim))
+            text = dedup.item_text(stem, norm_opts)
+            fingerprints.append(ItemFingerprint(
+                item=obj, text_hash=dedup.text_hash(text), signature=dedup.signature(text),
+            ))
+            if len(bodies) >= 500:
+                self.flush(bodies, fingerprints)
+                bodies, fingerprints = [], []
+                if progress:
+                    progress(n + 1)
+
+        self.flush(bodies, fingerprints)
+        if progress:
+            progress(len(data))
+        return created, updated
+
+    def flush(self, bodies, fingerprints):
+        # Re-render only the bodies whose source changed since the last import.
+        known = dict(
+            ItemBody.objects.filter(item__in=[b.item_id for b in bodies]).values_list("item_id", "render_hash")
+        )
+        changed, unchanged = [], []
+        for body in bodies:
+            item = body.item
+            if known.get(body.item_id) == rendering.render_hash(item.stem, body.rationale, item.answer_options):
+                unchanged.append(body)
+                continue
+            for field, value in rendering.render_item(item.stem, body.rationale, item.answer_options).items():
+                setattr(body, field, value)
+            changed.append(body)
+
+        ItemBody.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["item"],
+            update_fields=["rationale", "content", *rendering.RENDERED_FIELDS],
+        )
+        ItemBody.objects.bulk_create(
+            unchanged,
+            update_conflicts=True,
+            unique_fields=["item"],
+            update_fields=["rationale", "content"],
+        )
+        ItemFingerprint.objects.bulk_create(
+            fingerprints,
+            update_conflicts=True,
+            unique_fields=["item"],
+            update_fields=["text_hash", "signature"],
+        )
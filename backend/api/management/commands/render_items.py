@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from api import rendering
+from api.models import ItemBody
+
+
+class Command(BaseCommand):
+    help = "Pre-render sanitized HTML/plain text for items whose source changed (or --all)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Re-render every item, ignoring render_hash.")
+
+    def handle(self, *args, **opts):
+        bodies = ItemBody.objects.select_related("item").only(
+            "item__stem", "item__answer_options", "rationale", "render_hash"
+        )
+        batch, seen, rendered = [], 0, 0
+        for body in bodies.iterator(chunk_size=1000):
+            seen += 1
+            item = body.item
+            if not opts["all"] and body.render_hash == rendering.render_hash(item.stem, body.rationale, item.answer_options):
+                continue
+            for field, value in rendering.render_item(item.stem, body.rationale, item.answer_options).items():
+                setattr(body, field, value)
+            batch.append(body)
+            if len(batch) >= 500:
+                ItemBody.objects.bulk_update(batch, rendering.RENDERED_FIELDS)
+                rendered += len(batch)
+                batch = []
+        ItemBody.objects.bulk_update(batch, rendering.RENDERED_FIELDS)
+        rendered += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} of {seen} items."))
@@ -0,0 +1,42 @@
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import jobs
+
+
+def _worker(once, poll):
+    jobs.work(once=once, poll=poll)
+
+
+class Command(BaseCommand):
+    help = "Run background job workers (imports, scrapes) from the DB-backed queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes to start.")
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty.")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds between queue polls when idle.")
+
+    def handle(self, *args, **opts):
+        if opts["workers"] <= 1:
+            ran = jobs.work(once=opts["once"], poll=opts["poll"])
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} job(s)."))
+            return
+
+        # children must open their own DB connections
+        connections.close_all()
+        procs = [
+            multiprocessing.Process(target=_worker, args=(opts["once"], opts["poll"]), daemon=False)
+            for _ in range(opts["workers"])
+        ]
+        for p in procs:
+            p.start()
+        self.stdout.write(f"Started {len(procs)} workers: " + ", ".join(str(p.pid) for p in procs))
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            # each worker re-queues its running job on the same interrupt
+            for p in procs:
+                p.join()
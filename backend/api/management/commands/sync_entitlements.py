@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from api import entitlements
+
+
+class Command(BaseCommand):
+    help = "Backfill entitlements from the billing provider (ENTITLEMENT_PROVIDER) for users or given emails."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", action="append", default=[], help="Only these emails (repeatable).")
+
+    def handle(self, *args, **opts):
+        provider = entitlements.get_provider()
+        emails = opts["email"] or list(User.objects.exclude(email="").values_list("email", flat=True))
+        applied = 0
+        for email in emails:
+            event = provider.subscription_event(email)
+            if event and entitlements.apply_event(event):
+                applied += 1
+        self.stdout.write(self.style.SUCCESS(f"Updated {applied} of {len(emails)} entitlements."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api import item_stats
+
+
+class Command(BaseCommand):
+    help = "Fold newly submitted exam sessions into per-item statistics (p-value, median time, discrimination)."
+
+    def handle(self, *args, **opts):
+        totals = item_stats.update()
+        self.stdout.write(self.style.SUCCESS(
+            f"Folded {totals['sessions']} sessions into {totals['items']} item stats."
+        ))
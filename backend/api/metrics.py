@@ -0,0 +1,225 @@
+"""
+Optional per-request performance instrumentation.
+
+Enable with PERF_METRICS_ENABLED (env PERF_METRICS=1), which installs
+PerfMetricsMiddleware. Each request then records total time, DB time and
+query count (via connection.execute_wrapper), serialization/render time
+(via the DRF hooks below) and response bytes. Results are sent back in a
+Server-Timing header, folded into per-view histograms exposed at
+/api/metrics/ in Prometheus text format, and a warning is logged when a
+request exceeds PERF_QUERY_BUDGET queries (usually an N+1).
+
+With the middleware off, the DRF hooks only do a ContextVar lookup.
+Histograms are per process; scrape each worker (or aggregate upstream).
+"""
+import hmac
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_current: ContextVar[Optional["RequestMetrics"]] = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("db", "queries", "serialize")
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.serialize = 0.0
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - t0
+            self.queries += 1
+
+
+@contextmanager
+def _timed(m: RequestMetrics):
+    # lazy queries fired while serializing count as DB time, not serialization
+    db0, t0 = m.db, time.perf_counter()
+    try:
+        yield
+    finally:
+        m.serialize += time.perf_counter() - t0 - (m.db - db0)
+
+
+class _NoOp:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoOp()
+
+
+def serialize_phase():
+    """Context manager that adds its duration to the request's serialization time."""
+    m = _current.get()
+    return _NOOP if m is None else _timed(m)
+
+
+# ---- DRF hooks ----
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serialize_phase():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with serialize_phase():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Times `.data` of a serializer; use with Meta.list_serializer_class = TimedListSerializer."""
+
+    @property
+    def data(self):
+        with serialize_phase():
+            return super().data
+
+
+# ---- histograms ----
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+METRICS = (
+    ("api_request_duration_seconds", "Total request time.", DURATION_BUCKETS),
+    ("api_request_db_seconds", "Time spent in database queries.", DURATION_BUCKETS),
+    ("api_request_serialize_seconds", "Time spent serializing and rendering.", DURATION_BUCKETS),
+    ("api_request_queries", "Database queries per request.", QUERY_BUCKETS),
+    ("api_response_bytes", "Response body size.", BYTES_BUCKETS),
+)
+
+_lock = threading.Lock()
+_views: Dict[Tuple[str, str], Tuple[Histogram, ...]] = {}
+
+
+def observe(view, method, values):
+    key = (view, method)
+    with _lock:
+        hists = _views.get(key)
+        if hists is None:
+            hists = _views[key] = tuple(Histogram(buckets) for _, _, buckets in METRICS)
+        for hist, value in zip(hists, values):
+            hist.observe(value)
+
+
+def render_prometheus() -> str:
+    out = []
+    with _lock:
+        items = sorted(_views.items())
+        for i, (name, help_text, _) in enumerate(METRICS):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} histogram")
+            for (view, method), hists in items:
+                out.extend(hists[i].lines(name, f'view="{view}",method="{method}"'))
+    return "\n".join(out) + "\n"
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+# ---- middleware ----
+class PerfMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, "PERF_QUERY_BUDGET", 20)
+
+    def __call__(self, request):
+        m = RequestMetrics()
+        token = _current.set(m)
+        t0 = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(m.db_wrapper))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - t0
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.view_name or match.route) if match else "unmatched"
+        size = 0 if response.streaming else len(response.content)
+        observe(view, request.method, (total, m.db, m.serialize, m.queries, size))
+
+        response["Server-Timing"] = (
+            f'app;dur={(total - m.db - m.serialize) * 1000:.1f}, '
+            f'db;dur={m.db * 1000:.1f};desc="{m.queries} queries", '
+            f"ser;dur={m.serialize * 1000:.1f}, "
+            f"total;dur={total * 1000:.1f}"
+        )
+        if m.queries > self.query_budget:
+            logger.warning(
+                "Possible N+1: %s %s (%s) ran %d queries (budget %d) in %.1f ms",
+                request.method, request.path, view, m.queries, self.query_budget, m.db * 1000,
+            )
+        return response
+
+
+def allowed(request) -> bool:
+    """Staff sessions, or a bearer token matching PERF_METRICS_TOKEN (for scrapers)."""
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    token = getattr(settings, "PERF_METRICS_TOKEN", "")
+    scheme, _, given = request.headers.get("Authorization", "").partition(" ")
+    return bool(token) and scheme.lower() == "bearer" and hmac.compare_digest(given.strip(), token)
+
+
+def metrics_view(request):
+    if not getattr(settings, "PERF_METRICS_ENABLED", False):
+        raise Http404
+    if not allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_rename_keys_item_answer_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemFingerprint",
+            fields=[
+                (
+                    "item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="fingerprint",
+                        serialize=False,
+                        to="api.item",
+                    ),
+                ),
+                ("text_hash", models.CharField(max_length=40)),
+                ("signature", models.BinaryField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="item",
+            name="duplicate_of",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="duplicates",
+                to="api.item",
+            ),
+        ),
+    ]
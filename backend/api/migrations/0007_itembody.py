@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_bodies(apps, schema_editor):
+    Item = apps.get_model("api", "Item")
+    ItemBody = apps.get_model("api", "ItemBody")
+    batch = []
+    rows = Item.objects.values_list("uid", "rationale", "content")
+    for uid, rationale, content in rows.iterator(chunk_size=2000):
+        batch.append(ItemBody(item_id=uid, rationale=rationale or "", content=content or {}))
+        if len(batch) >= 2000:
+            ItemBody.objects.bulk_create(batch, batch_size=500)
+            batch = []
+    ItemBody.objects.bulk_create(batch, batch_size=500)
+
+
+def restore_bodies(apps, schema_editor):
+    Item = apps.get_model("api", "Item")
+    ItemBody = apps.get_model("api", "ItemBody")
+    for body in ItemBody.objects.iterator(chunk_size=2000):
+        Item.objects.filter(uid=body.item_id).update(rationale=body.rationale, content=body.content)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_item_duplicate_of_itemfingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemBody",
+            fields=[
+                (
+                    "item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="body",
+                        serialize=False,
+                        to="api.item",
+                    ),
+                ),
+                ("rationale", models.TextField(blank=True, default="")),
+                ("content", models.JSONField(blank=True, default=dict)),
+            ],
+        ),
+        migrations.RunPython(copy_bodies, restore_bodies),
+        migrations.RemoveField(
+            model_name="item",
+            name="content",
+        ),
+        migrations.RemoveField(
+            model_name="item",
+            name="rationale",
+        ),
+    ]
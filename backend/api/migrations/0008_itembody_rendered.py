@@ -0,0 +1,43 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_itembody"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="itembody",
+            name="options_html",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name="itembody",
+            name="rationale_html",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="itembody",
+            name="rationale_text",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="itembody",
+            name="render_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="itembody",
+            name="stem_html",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.AddField(
+            model_name="itembody",
+            name="stem_text",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:50
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fold duplicate domains (same code) and skills (same domain + code) into the lowest id."""
+    Domain = apps.get_model("api", "Domain")
+    Skill = apps.get_model("api", "Skill")
+    Item = apps.get_model("api", "Item")
+
+    dupes = Domain.objects.values("code").annotate(n=Count("id"), keep=Min("id")).filter(n__gt=1)
+    for row in dupes:
+        others = Domain.objects.filter(code=row["code"]).exclude(id=row["keep"])
+        Item.objects.filter(domain__in=others).update(domain_id=row["keep"])
+        Skill.objects.filter(domain__in=others).update(domain_id=row["keep"])
+        others.delete()
+
+    dupes = Skill.objects.values("domain", "code").annotate(n=Count("id"), keep=Min("id")).filter(n__gt=1)
+    for row in dupes:
+        others = Skill.objects.filter(domain=row["domain"], code=row["code"]).exclude(id=row["keep"])
+        Item.objects.filter(skill__in=others).update(skill_id=row["keep"])
+        others.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_job"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="domain",
+            name="code",
+            field=models.CharField(max_length=10, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name="skill",
+            constraint=models.UniqueConstraint(
+                fields=("domain", "code"), name="uniq_skill_domain_code"
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def check_unique_emails(apps, schema_editor):
+    """
+    Refuse to build the unique index while accounts share an email (compared
+    as the index does, lower(email)). Which account keeps the address is for
+    an admin to decide, so the migration fails listing every conflict
+    instead of blanking emails.
+    """
+    User = apps.get_model("auth", "User")
+    groups = defaultdict(list)
+    rows = User.objects.exclude(email="").annotate(key=Lower("email")).order_by("key", "id")
+    for pk, username, email, key in rows.values_list("id", "username", "email", "key"):
+        groups[key].append(f"{username!r} (id {pk}, {email})")
+    conflicts = [f"{key}: {', '.join(accounts)}" for key, accounts in groups.items() if len(accounts) > 1]
+    if conflicts:
+        raise RuntimeError(
+            "Accounts share an email address; change or clear all but one of each, then migrate again:\n  "
+            + "\n  ".join(conflicts)
+        )
+
+
+class Migration(migrations.Migration):
+    """Unique index on auth_user.email (non-empty) for api.auth_backends.EmailBackend."""
+
+    dependencies = [
+        ("api", "0011_taxonomy_unique"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_unique_emails, migrations.RunPython.noop),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX auth_user_email_uniq ON auth_user (email) WHERE email <> ''",
+            "DROP INDEX auth_user_email_uniq",
+        ),
+    ]
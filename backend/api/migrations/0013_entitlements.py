@@ -0,0 +1,50 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_auth_user_email_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BillingEvent",
+            fields=[
+                (
+                    "event_id",
+                    models.CharField(max_length=100, primary_key=True, serialize=False),
+                ),
+                ("type", models.CharField(max_length=80)),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Entitlement",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("email", models.EmailField(max_length=254, unique=True)),
+                (
+                    "customer_id",
+                    models.CharField(
+                        blank=True, db_index=True, default="", max_length=64
+                    ),
+                ),
+                ("status", models.CharField(blank=True, default="", max_length=20)),
+                ("product_id", models.CharField(blank=True, default="", max_length=64)),
+                ("current_period_end", models.DateTimeField(blank=True, null=True)),
+                ("event_created", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
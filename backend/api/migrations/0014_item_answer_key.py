@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:20
+
+from django.db import migrations, models
+
+
+def compile_keys(apps, schema_editor):
+    """Compile answer keys for items imported before api.grading existed."""
+    from api import grading
+
+    Item = apps.get_model("api", "Item")
+    batch = []
+    for item in Item.objects.only("uid", "correct_answers", "answer_options").iterator(chunk_size=2000):
+        # the importer stored every option as "correct" when the source had no key
+        answers = [] if item.correct_answers == item.answer_options else item.correct_answers
+        item.answer_key = grading.compile_key(answers)
+        batch.append(item)
+        if len(batch) >= 1000:
+            Item.objects.bulk_update(batch, ["answer_key"])
+            batch = []
+    Item.objects.bulk_update(batch, ["answer_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_entitlements"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="item",
+            name="answer_key",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(compile_keys, migrations.RunPython.noop),
+    ]
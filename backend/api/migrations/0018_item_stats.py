@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0017_classroom"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemStats",
+            fields=[
+                (
+                    "item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="api.item",
+                    ),
+                ),
+                ("attempts", models.IntegerField(default=0)),
+                ("correct", models.IntegerField(default=0)),
+                ("p_value", models.FloatField(db_index=True, null=True)),
+                ("median_time", models.FloatField(db_index=True, null=True)),
+                ("discrimination", models.FloatField(db_index=True, null=True)),
+                ("time_histogram", models.JSONField(default=list)),
+                ("score_sum", models.FloatField(default=0)),
+                ("score_sq_sum", models.FloatField(default=0)),
+                ("score_correct_sum", models.FloatField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StatsRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sessions", models.IntegerField(default=0)),
+                ("items", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="examsession",
+            name="in_stats",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="examsession",
+            index=models.Index(
+                condition=models.Q(("in_stats", False), ("status", "submitted")),
+                fields=["id"],
+                name="exam_stats_pending",
+            ),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:09
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facets(apps, schema_editor):
+    Item = apps.get_model("api", "Item")
+    ItemFacet = apps.get_model("api", "ItemFacet")
+    for field in ("program", "module", "difficulty", "primary_class_cd"):
+        values = Item.objects.exclude(**{f"{field}__isnull": True}).values(field).annotate(n=Count("pk"))
+        ItemFacet.objects.bulk_create(
+            ItemFacet(field=field, value=str(v[field])[:100], count=v["n"]) for v in values.order_by(field)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0018_item_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ItemFacet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("field", models.CharField(max_length=40)),
+                ("value", models.CharField(max_length=100)),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="itemfacet",
+            constraint=models.UniqueConstraint(
+                fields=("field", "value"), name="uniq_item_facet"
+            ),
+        ),
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
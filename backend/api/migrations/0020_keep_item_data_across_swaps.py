@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0019_itemfacet"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="itemstats",
+            name="item",
+            field=models.OneToOneField(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                primary_key=True,
+                related_name="stats",
+                serialize=False,
+                to="api.item",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="reviewstate",
+            name="item",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="api.item",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from importlib import import_module
+
+from django.db import migrations
+
+# same check as 0012, for databases that already applied it (addresses differing only in case)
+check_unique_emails = import_module("api.migrations.0012_auth_user_email_unique").check_unique_emails
+
+
+class Migration(migrations.Migration):
+    """Make the auth_user.email index case-insensitive: lower(email), looked up by api.auth_backends.users_by_email."""
+
+    dependencies = [
+        ("api", "0020_keep_item_data_across_swaps"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_unique_emails, migrations.RunPython.noop),
+        migrations.RunSQL(
+            "DROP INDEX auth_user_email_uniq",
+            "CREATE UNIQUE INDEX auth_user_email_uniq ON auth_user (email) WHERE email <> ''",
+        ),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX auth_user_email_ci_uniq ON auth_user (lower(email)) WHERE email > ''",
+            "DROP INDEX auth_user_email_ci_uniq",
+        ),
+    ]
@@ -1,20 +1,37 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 
 class Assessment(models.Model):
     name = models.CharField(max_length=50, unique=True)
 
+    def __str__(self):
+        return self.name
+
 class Test(models.Model):
     name = models.CharField(max_length=50, unique=True)
 
+    def __str__(self):
+        return self.name
+
 class Domain(models.Model):
-    code = models.CharField(max_length=10)
+    code = models.CharField(max_length=10, unique=True)
     name = models.CharField(max_length=100)
 
+    def __str__(self):
+        return f"{self.code} {self.name}"
+
 class Skill(models.Model):
     code = models.CharField(max_length=20)
     name = models.CharField(max_length=150)
     domain = models.ForeignKey(Domain, on_delete=models.CASCADE, related_name="skills")
 
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["domain", "code"], name="uniq_skill_domain_code")]
+
+    def __str__(self):
+        return f"{self.code} {self.name}"
+
 class Item(models.Model):
     uid = models.UUIDField(primary_key=True)
     question_id = models.CharField(max_length=20, blank=True, null=True)
@@ -31,11 +48,204 @@ class Item(models.Model):
     skill = models.ForeignKey(Skill, on_delete=models.SET_NULL, null=True, blank=True)
 
     stem = models.TextField(blank=True, default="")
-    rationale = models.TextField(blank=True, default="")
     answer_options = models.JSONField(default=list, blank=True)
     correct_answers = models.JSONField(default=list, blank=True)   # <- letters (A/B/..), or fallback to keys
-    content = models.JSONField(default=dict, blank=True)           # <- OPTIONAL: keep extra scraped fields
+    answer_key = models.JSONField(default=dict, blank=True)        # compiled by api.grading at import
 
     external_id = models.CharField(max_length=120, blank=True, null=True)
     update_date = models.BigIntegerField(blank=True, null=True)
     create_date = models.BigIntegerField(blank=True, null=True)
+
+    # set by `manage.py dedup_items --flag`; points at the cluster's canonical item
+    duplicate_of = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="duplicates"
+    )
+
+    def __str__(self):
+        return self.question_id or str(self.uid)
+
+class ItemBody(models.Model):
+    """
+    Bulky per-item payload kept out of the Item row so list filters, counts
+    and scans only read narrow pages. Loaded via select_related("body").
+    """
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name="body")
+    rationale = models.TextField(blank=True, default="")
+    content = models.JSONField(default=dict, blank=True)           # <- OPTIONAL: keep extra scraped fields
+
+    # Pre-rendered forms of stem/rationale/options (see api.rendering); served
+    # by the API in place of the raw scraped HTML when present.
+    render_hash = models.CharField(max_length=64, blank=True, default="")
+    stem_html = models.TextField(blank=True, default="")
+    stem_text = models.TextField(blank=True, default="")
+    rationale_html = models.TextField(blank=True, default="")
+    rationale_text = models.TextField(blank=True, default="")
+    options_html = models.JSONField(default=list, blank=True)
+
+class ItemFingerprint(models.Model):
+    """MinHash signature of an item's normalized stem + options (see api.dedup)."""
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name="fingerprint")
+    text_hash = models.CharField(max_length=40)
+    signature = models.BinaryField()
+
+class CatalogVersion(models.Model):
+    """One row per catalog change (import, staged swap, rollback); the latest id is the live version."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    source = models.CharField(max_length=200, blank=True, default="")
+    item_count = models.IntegerField(default=0)
+
+    @property
+    def version(self):
+        return self.pk
+
+class Job(models.Model):
+    """Background import/scrape run executed by `manage.py run_jobs` workers (see api.jobs)."""
+    QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+    STATUS_CHOICES = [(s, s) for s in (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED)]
+
+    kind = models.CharField(max_length=40)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    cancel_requested = models.BooleanField(default=False)
+
+    done = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    run_start_done = models.IntegerField(default=0)       # `done` when the current run started
+    checkpoint = models.JSONField(default=dict, blank=True)  # handler-defined resume point
+    message = models.TextField(blank=True, default="")
+
+    worker = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "id"])]
+
+    @property
+    def throughput(self):
+        """Units per second over the current (or last) run."""
+        if not self.started_at:
+            return None
+        end = self.finished_at or self.heartbeat_at
+        seconds = (end - self.started_at).total_seconds() if end else 0
+        return (self.done - self.run_start_done) / seconds if seconds > 0 else None
+
+    @property
+    def eta_seconds(self):
+        rate = self.throughput
+        if self.status != self.RUNNING or not self.total or not rate:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+class Entitlement(models.Model):
+    """Subscription state per email, kept current by billing webhooks (see api.entitlements)."""
+    email = models.EmailField(unique=True)
+    customer_id = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    status = models.CharField(max_length=20, blank=True, default="")   # Stripe subscription status
+    product_id = models.CharField(max_length=64, blank=True, default="")
+    current_period_end = models.DateTimeField(null=True, blank=True)
+    event_created = models.BigIntegerField(default=0)   # newest applied event; older ones are ignored
+    updated_at = models.DateTimeField(auto_now=True)
+
+class BillingEvent(models.Model):
+    """Webhook event ids already applied (deliveries are retried, so dedupe)."""
+    event_id = models.CharField(max_length=100, primary_key=True)
+    type = models.CharField(max_length=80)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+class ReviewState(models.Model):
+    """Spaced-repetition schedule for one user x item (SM-2, see api.reviews)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="reviews")
+    # no DB constraint: a catalog swap may drop the item, and the schedule is
+    # kept (hidden by the join in reviews.due) in case it comes back
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name="+", db_constraint=False)
+    due_at = models.DateTimeField()
+    interval = models.FloatField(default=0)          # days
+    ease = models.FloatField(default=2.5)
+    repetitions = models.PositiveIntegerField(default=0)   # correct in a row
+    lapses = models.PositiveIntegerField(default=0)
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "item"], name="uniq_review_user_item")]
+        # "due now" is a range scan on this index: user = ? AND due_at <= now ORDER BY due_at
+        indexes = [models.Index(fields=["user", "due_at"], name="review_user_due")]
+
+class Classroom(models.Model):
+    """A teacher's class; its students' exam sessions stream to /ws/classes/<id>/progress/ (api.live)."""
+    name = models.CharField(max_length=100)
+    teacher = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="taught_classes")
+    students = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="classrooms", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+class ExamSession(models.Model):
+    """
+    A timed mock exam. In-progress answers/timers live in the exam session
+    cache (api.exam_sessions); this row holds periodic snapshots and the
+    graded result after submit.
+    """
+    ACTIVE, SUBMITTED = "active", "submitted"
+    STATUS_CHOICES = [(s, s) for s in (ACTIVE, SUBMITTED)]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="exam_sessions")
+    classroom = models.ForeignKey(Classroom, on_delete=models.SET_NULL, null=True, blank=True, related_name="exam_sessions")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ACTIVE)
+    items = models.JSONField(default=list)                # item uids in exam order
+    answers = models.JSONField(default=dict, blank=True)  # uid -> answer, as of the last snapshot
+    timers = models.JSONField(default=dict, blank=True)   # uid -> seconds spent
+    seq = models.IntegerField(default=0)                  # autosave sequence of the last snapshot
+    started_at = models.DateTimeField(auto_now_add=True)
+    deadline = models.DateTimeField(null=True, blank=True)
+    snapshot_at = models.DateTimeField(null=True, blank=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    results = models.JSONField(default=dict, blank=True)  # uid -> true/false/null after submit
+    score = models.IntegerField(null=True, blank=True)
+    in_stats = models.BooleanField(default=False)          # folded into ItemStats (api.item_stats)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "deadline"]),
+            # the stats job's "new attempts" scan stays small however many sessions were folded already
+            models.Index(fields=["id"], condition=Q(status="submitted", in_stats=False), name="exam_stats_pending"),
+        ]
+
+class ItemStats(models.Model):
+    """
+    Empirical statistics per item from submitted exam sessions, folded in
+    incrementally by api.item_stats. The raw sums are kept so each run only
+    adds new attempts; p_value, median_time and discrimination are derived.
+    """
+    # no DB constraint, like ReviewState.item: stats outlive catalog swaps that drop the item
+    item = models.OneToOneField(Item, on_delete=models.CASCADE, primary_key=True, related_name="stats",
+                                db_constraint=False)
+    attempts = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    p_value = models.FloatField(null=True, db_index=True)           # share correct
+    median_time = models.FloatField(null=True, db_index=True)       # seconds, from time_histogram
+    discrimination = models.FloatField(null=True, db_index=True)    # point-biserial vs. rest-of-exam score
+    time_histogram = models.JSONField(default=list)                 # counts per api.item_stats.TIME_BUCKETS
+    # sums over attempts of the rest-of-exam score (share correct on the other items)
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    score_correct_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class StatsRun(models.Model):
+    """One row per api.item_stats run that folded new sessions in; the latest id versions the stats."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    sessions = models.IntegerField(default=0)
+    items = models.IntegerField(default=0)
+
+class ItemFacet(models.Model):
+    """Distinct values (with counts) of the Item columns the admin filters on; rebuilt per catalog change (api.facets)."""
+    field = models.CharField(max_length=40)
+    value = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["field", "value"], name="uniq_item_facet")]
@@ -0,0 +1,189 @@
+"""
+Import-time rendering of scraped HTML (stems, rationales, answer options).
+
+`render_html` returns allowlist-sanitized, whitespace-minified markup and a
+plain-text version in one pass. Results are keyed by `render_hash` so the
+importer only re-renders items whose source text changed; bump
+RENDER_VERSION when the rules below change to force a full re-render.
+"""
+import hashlib
+import json
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import Iterable, List, Tuple
+
+RENDER_VERSION = 1
+
+RENDERED_FIELDS = ["render_hash", "stem_html", "stem_text", "rationale_html", "rationale_text", "options_html"]
+
+HTML_TAGS = {
+    "a", "b", "blockquote", "br", "caption", "code", "div", "em", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "img", "li", "ol", "p", "pre", "s",
+    "small", "span", "strong", "sub", "sup", "table", "tbody", "td", "tfoot", "th",
+    "thead", "tr", "u", "ul",
+}
+MATHML_TAGS = {
+    "math", "maction", "annotation", "menclose", "merror", "mfenced", "mfrac", "mi",
+    "mmultiscripts", "mn", "mo", "mover", "mpadded", "mphantom", "mprescripts", "mroot",
+    "mrow", "ms", "mspace", "msqrt", "mstyle", "msub", "msubsup", "msup", "mtable", "mtd",
+    "mtext", "mtr", "munder", "munderover", "none", "semantics",
+}
+SVG_TAGS = {
+    "svg", "circle", "clippath", "defs", "ellipse", "g", "line", "lineargradient",
+    "marker", "path", "polygon", "polyline", "radialgradient", "rect", "stop", "text",
+    "title", "tspan",
+}
+ALLOWED_TAGS = HTML_TAGS | MATHML_TAGS | SVG_TAGS
+
+# Dropped together with everything inside them.
+DROP_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed", "noscript", "template", "head", "foreignobject"}
+
+VOID_TAGS = {"br", "hr", "img"}
+BLOCK_TAGS = {
+    "blockquote", "br", "caption", "div", "figcaption", "figure", "h1", "h2", "h3", "h4",
+    "h5", "h6", "hr", "li", "ol", "p", "pre", "table", "tr", "ul",
+}
+
+ALLOWED_ATTRS = {
+    "alt", "aria-hidden", "aria-label", "class", "colspan", "height", "href", "role",
+    "rowspan", "src", "title", "width",
+    # MathML
+    "accent", "close", "columnalign", "display", "encoding", "fence", "linethickness",
+    "lspace", "mathvariant", "notation", "open", "rspace", "separator", "stretchy",
+    # SVG
+    "cx", "cy", "d", "dx", "dy", "fill", "font-size", "font-weight", "offset", "points",
+    "preserveaspectratio", "r", "rx", "ry", "stroke", "stroke-dasharray", "stroke-width",
+    "text-anchor", "transform", "viewbox", "x", "x1", "x2", "y", "y1", "y2",
+}
+URL_ATTRS = {"href", "src"}
+SAFE_URL_RE = re.compile(r"^(https?:|/|#|data:image/(png|jpe?g|gif|webp|svg\+xml)[;,])", re.I)
+
+# SVG attributes are case-sensitive in the DOM; HTMLParser lowercases them.
+SVG_ATTR_CASE = {"viewbox": "viewBox", "preserveaspectratio": "preserveAspectRatio"}
+SVG_TAG_CASE = {"clippath": "clipPath", "lineargradient": "linearGradient", "radialgradient": "radialGradient"}
+
+_WS_RE = re.compile(r"\s+")
+
+
+class _Renderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html: List[str] = []
+        self.text: List[str] = []
+        self.stack: List[str] = []
+        self.drop_depth = 0
+        self.pre_depth = 0
+        self.after_block = True
+
+    def _attrs(self, attrs) -> str:
+        out = []
+        for name, value in attrs:
+            if name not in ALLOWED_ATTRS:
+                continue
+            value = (value or "").strip()
+            if name in URL_ATTRS and not SAFE_URL_RE.match(value):
+                continue
+            out.append(f' {SVG_ATTR_CASE.get(name, name)}="{escape(value, quote=True)}"')
+        return "".join(out)
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, self_closing=True)
+
+    def _start(self, tag, attrs, self_closing):
+        if tag in DROP_CONTENT_TAGS:
+            if not self_closing:
+                self.drop_depth += 1
+            return
+        if self.drop_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag not in ALLOWED_TAGS:
+            return
+        name = SVG_TAG_CASE.get(tag, tag)
+        self.after_block = tag in BLOCK_TAGS
+        if tag in VOID_TAGS:
+            self.html.append(f"<{name}{self._attrs(attrs)}>")
+        elif self_closing:
+            self.html.append(f"<{name}{self._attrs(attrs)}/>")
+        else:
+            self.html.append(f"<{name}{self._attrs(attrs)}>")
+            self.stack.append(tag)
+            if tag == "pre":
+                self.pre_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self.drop_depth = max(0, self.drop_depth - 1)
+            return
+        if self.drop_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag not in self.stack:
+            return
+        # close anything left open inside this element
+        while self.stack:
+            open_tag = self.stack.pop()
+            if open_tag == "pre":
+                self.pre_depth -= 1
+            self.html.append(f"</{SVG_TAG_CASE.get(open_tag, open_tag)}>")
+            if open_tag == tag:
+                break
+        self.after_block = tag in BLOCK_TAGS
+
+    def handle_data(self, data):
+        if self.drop_depth:
+            return
+        self.text.append(data)
+        if not self.pre_depth:
+            # whitespace between block elements is insignificant
+            if self.after_block and not data.strip():
+                return
+            data = _WS_RE.sub(" ", data)
+        self.after_block = False
+        self.html.append(escape(data, quote=False))
+
+    def result(self) -> Tuple[str, str]:
+        while self.stack:
+            tag = self.stack.pop()
+            self.html.append(f"</{SVG_TAG_CASE.get(tag, tag)}>")
+        html = "".join(self.html).strip()
+        lines = (_WS_RE.sub(" ", line).strip() for line in "".join(self.text).split("\n"))
+        text = "\n".join(line for line in lines if line)
+        return html, text
+
+
+def render_html(raw: str) -> Tuple[str, str]:
+    """Return (sanitized minified HTML, plain text) for a scraped HTML fragment."""
+    if not raw:
+        return "", ""
+    r = _Renderer()
+    r.feed(raw)
+    r.close()
+    return r.result()
+
+
+def render_hash(stem: str, rationale: str, options: Iterable[str]) -> str:
+    """Content hash of everything render_item() reads, plus RENDER_VERSION."""
+    payload = json.dumps([RENDER_VERSION, stem or "", rationale or "", list(options or [])], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def render_item(stem: str, rationale: str, options: Iterable[str]) -> dict:
+    """Rendered fields for ItemBody."""
+    options = list(options or [])
+    stem_html, stem_text = render_html(stem)
+    rationale_html, rationale_text = render_html(rationale)
+    return {
+        "render_hash": render_hash(stem, rationale, options),
+        "stem_html": stem_html,
+        "stem_text": stem_text,
+        "rationale_html": rationale_html,
+        "rationale_text": rationale_text,
+        "options_html": [render_html(o)[0] for o in options],
+    }
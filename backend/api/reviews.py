@@ -0,0 +1,86 @@
+"""
+Spaced-repetition review queue (SM-2).
+
+Every answered item gets a ReviewState row per user. A miss resets the item
+to a short relearning interval and lowers its ease; a correct answer
+stretches the interval (1 day, 6 days, then interval x ease). "Due now" is
+one range scan on the (user, due_at) index joined to the item, so it stays
+flat however many review rows other users have, and a practice session is
+rescheduled with two reads and one upsert inside a single transaction.
+"""
+from datetime import timedelta
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Item, ReviewState
+
+MIN_EASE = 1.3
+RELEARN_INTERVAL = 10 / (24 * 60)   # days: missed items come back in ten minutes
+PASSING_QUALITY = 3
+
+
+def quality(result) -> int:
+    """SM-2 quality 0-5 from a grade (True/False) or an explicit 0-5 rating."""
+    if isinstance(result, bool):
+        return 4 if result else 1
+    return max(0, min(5, int(result)))
+
+
+def reschedule(state: ReviewState, q: int, now) -> ReviewState:
+    """Apply one SM-2 review of quality q to state (in place)."""
+    if q < PASSING_QUALITY:
+        if state.repetitions:
+            state.lapses += 1
+        state.repetitions = 0
+        state.interval = RELEARN_INTERVAL
+    else:
+        state.repetitions += 1
+        if state.repetitions == 1:
+            state.interval = 1
+        elif state.repetitions == 2:
+            state.interval = 6
+        else:
+            state.interval = round(max(state.interval, 1) * state.ease, 2)
+    state.ease = max(MIN_EASE, state.ease + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    state.reviewed_at = now
+    state.due_at = now + timedelta(days=state.interval)
+    return state
+
+
+def due(user, limit: int = 20, now=None) -> List[ReviewState]:
+    """Reviews due for user, most overdue first, with their items (one query)."""
+    now = now or timezone.now()
+    qs = ReviewState.objects.filter(user=user, due_at__lte=now).order_by("due_at")
+    # the inner join to item skips schedules whose item a catalog swap dropped
+    return list(qs.select_related("item", "item__body", "item__stats")[:limit])
+
+
+def record(user, results: Dict, now=None) -> List[ReviewState]:
+    """
+    Reschedule a practice session: results maps item uid -> True/False or a
+    0-5 quality. Unknown items are skipped. Returns the updated states.
+    """
+    now = now or timezone.now()
+    if not results:
+        return []
+    with transaction.atomic():
+        known = set(Item.objects.filter(uid__in=list(results)).values_list("uid", flat=True))
+        existing = {
+            s.item_id: s for s in ReviewState.objects.select_for_update().filter(user=user, item_id__in=known)
+        }
+        states = []
+        for uid, result in results.items():
+            if uid not in known:
+                continue
+            state = existing.get(uid) or ReviewState(user=user, item_id=uid)
+            states.append(reschedule(state, quality(result), now))
+        ReviewState.objects.bulk_create(
+            states,
+            update_conflicts=True,
+            unique_fields=["user", "item"],
+            update_fields=["due_at", "interval", "ease", "repetitions", "lapses", "reviewed_at"],
+        )
+    return states
+
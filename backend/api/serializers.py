@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Assessment, Test, Domain, Skill, Item
+from . import taxonomy
+from .metrics import TimedListSerializer, TimedSerializerMixin
+from .models import Assessment, Test, Domain, Skill, Item, ItemStats, Job, ReviewState
 
 class AssessmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -21,15 +23,100 @@ class SkillSerializer(serializers.ModelSerializer):
         model = Skill
         fields = "__all__"
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ItemStats
+        fields = ["attempts", "p_value", "median_time", "discrimination"]
+
+class ItemSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Item without the bulky ItemBody fields (list views, unless ?full=1)."""
+    # Pre-rendered HTML from ItemBody (api.rendering), falling back to the raw source.
+    stem = serializers.SerializerMethodField()
+    answer_options = serializers.SerializerMethodField()
+    # Labels from the taxonomy cache (api.taxonomy), no joins
+    skill_code = serializers.SerializerMethodField()
+    skill_name = serializers.SerializerMethodField()
+    # Empirical stats (api.item_stats), joined by the views; null until students have attempted it
+    stats = serializers.SerializerMethodField()
+
     class Meta:
         model = Item
+        list_serializer_class = TimedListSerializer
+        fields = [
+            "uid", "question_id", "program", "module", "difficulty",
+            "primary_class_cd", "primary_class_desc", "score_band_range_cd",
+            "assessment", "test", "domain", "skill", "skill_code", "skill_name",
+            "stem", "external_id",
+            "correct_answers", "answer_options", "update_date", "create_date", "stats",
+        ]
+
+    @staticmethod
+    def rendered(obj, field, raw):
+        """The rendered field, or `raw` if the item was never rendered. Empty output (all markup stripped) is kept."""
+        body = getattr(obj, "body", None)
+        if body is None or not body.render_hash:
+            return raw
+        return getattr(body, field)
+
+    def get_stem(self, obj):
+        return self.rendered(obj, "stem_html", obj.stem)
+
+    def get_answer_options(self, obj):
+        return self.rendered(obj, "options_html", obj.answer_options)
+
+    def get_skill_code(self, obj):
+        return taxonomy.get().skill_labels.get(obj.skill_id, (None, None))[0]
+
+    def get_skill_name(self, obj):
+        return taxonomy.get().skill_labels.get(obj.skill_id, (None, None))[1]
+
+    def get_stats(self, obj):
+        stats = getattr(obj, "stats", None)
+        return ItemStatsSerializer(stats).data if stats else None
+
+class ItemSerializer(ItemSummarySerializer):
+    rationale = serializers.SerializerMethodField()
+    stem_text = serializers.CharField(source="body.stem_text", read_only=True, default="")
+    rationale_text = serializers.CharField(source="body.rationale_text", read_only=True, default="")
+    content = serializers.JSONField(source="body.content", read_only=True, default=dict)
+
+    class Meta(ItemSummarySerializer.Meta):
         fields = [
             "uid", "question_id", "program", "module", "difficulty",
             "primary_class_cd", "primary_class_desc", "score_band_range_cd",
-            "assessment", "test", "domain", "skill",
-            "stem", "rationale", "external_id",
-            "correct_answers", "answer_options", "update_date", "create_date",
+            "assessment", "test", "domain", "skill", "skill_code", "skill_name",
+            "stem", "stem_text", "rationale", "rationale_text", "external_id",
+            "correct_answers", "answer_options", "update_date", "create_date", "stats",
             "content",
         ]
-    
\ No newline at end of file
+
+    def get_rationale(self, obj):
+        body = getattr(obj, "body", None)
+        return self.rendered(obj, "rationale_html", body.rationale if body else "") or ""
+
+class JobSerializer(serializers.ModelSerializer):
+    throughput = serializers.FloatField(read_only=True)
+    eta_seconds = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            "id", "kind", "params", "status", "cancel_requested",
+            "done", "total", "throughput", "eta_seconds", "checkpoint", "message",
+            "worker", "created_at", "started_at", "heartbeat_at", "finished_at",
+        ]
+        read_only_fields = [f for f in fields if f not in ("kind", "params")]
+
+    def validate_kind(self, value):
+        from .jobs import HANDLERS
+
+        if value not in HANDLERS:
+            raise serializers.ValidationError(f"Unknown job kind; expected one of {sorted(HANDLERS)}.")
+        return value
+
+class ReviewSerializer(serializers.ModelSerializer):
+    item = ItemSerializer(read_only=True)
+
+    class Meta:
+        model = ReviewState
+        fields = ["item", "due_at", "interval", "ease", "repetitions", "lapses", "reviewed_at"]
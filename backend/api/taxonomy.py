@@ -0,0 +1,115 @@
+"""
+Process-wide cache of the small taxonomy tables (Assessment, Test, Domain,
+Skill) as code -> id and id -> label dicts.
+
+The importer resolves every item's program/module/domain/skill here instead
+of issuing get_or_create queries, the item list filters accept domain and
+skill codes, and the serializers label items without joins. A snapshot is
+tagged with the catalog version (api.catalog) it was loaded at; the version
+is rechecked at most every RECHECK_SECONDS and the snapshot reloaded when
+it moved. Each import starts from a fresh load, and rows it creates through
+`ensure_*` are added to the local snapshot immediately.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from . import catalog
+from .models import Assessment, Domain, Skill, Test
+
+RECHECK_SECONDS = 2.0
+
+
+class Taxonomy:
+    def __init__(self, version: int):
+        self.version = version
+        self.assessments: Dict[str, int] = dict(Assessment.objects.values_list("name", "id"))
+        self.tests: Dict[str, int] = dict(Test.objects.values_list("name", "id"))
+        self.domains: Dict[str, Tuple[int, str]] = {}      # code -> (id, name)
+        self.domain_labels: Dict[int, Tuple[str, str]] = {}  # id -> (code, name)
+        for pk, code, name in Domain.objects.values_list("id", "code", "name"):
+            self.domains[code] = (pk, name)
+            self.domain_labels[pk] = (code, name)
+        self.skills: Dict[Tuple[int, str], Tuple[int, str]] = {}  # (domain id, code) -> (id, name)
+        self.skill_labels: Dict[int, Tuple[str, str]] = {}
+        self.skill_codes: Dict[str, list] = {}               # code -> [ids] (codes may repeat across domains)
+        for pk, code, name, domain_id in Skill.objects.values_list("id", "code", "name", "domain_id"):
+            self._add_skill(pk, code, name, domain_id)
+
+    def _add_skill(self, pk, code, name, domain_id):
+        self.skills[(domain_id, code)] = (pk, name)
+        self.skill_labels[pk] = (code, name)
+        self.skill_codes.setdefault(code, []).append(pk)
+
+    # ---- lookups (API) ----
+    def domain_id(self, code: str) -> Optional[int]:
+        hit = self.domains.get(code)
+        return hit[0] if hit else None
+
+    def skill_id(self, code: str, domain_id: Optional[int] = None) -> Optional[int]:
+        if domain_id:
+            hit = self.skills.get((domain_id, code))
+            return hit[0] if hit else None
+        ids = self.skill_codes.get(code) or []
+        return ids[0] if len(ids) == 1 else None
+
+    # ---- get-or-create (importer) ----
+    def ensure_assessment(self, name: str) -> int:
+        if name not in self.assessments:
+            self.assessments[name] = Assessment.objects.get_or_create(name=name)[0].pk
+        return self.assessments[name]
+
+    def ensure_test(self, name: str) -> int:
+        if name not in self.tests:
+            self.tests[name] = Test.objects.get_or_create(name=name)[0].pk
+        return self.tests[name]
+
+    def ensure_domain(self, code: str, name: str) -> int:
+        """Id of the domain `code`, created if missing; renamed if `name` is given and differs."""
+        hit = self.domains.get(code)
+        if hit is None:
+            obj, _ = Domain.objects.get_or_create(code=code, defaults={"name": name or code})
+            hit = (obj.pk, obj.name)
+        if name and hit[1] != name:
+            Domain.objects.filter(pk=hit[0]).update(name=name)
+            hit = (hit[0], name)
+        self.domains[code] = hit
+        self.domain_labels[hit[0]] = (code, hit[1])
+        return hit[0]
+
+    def ensure_skill(self, code: str, name: str, domain_id: int) -> int:
+        hit = self.skills.get((domain_id, code))
+        if hit is None:
+            obj, _ = Skill.objects.get_or_create(code=code, domain_id=domain_id, defaults={"name": name or code})
+            self._add_skill(obj.pk, code, obj.name, domain_id)
+            hit = (obj.pk, obj.name)
+        if name and hit[1] != name:
+            Skill.objects.filter(pk=hit[0]).update(name=name)
+            self.skills[(domain_id, code)] = (hit[0], name)
+            self.skill_labels[hit[0]] = (code, name)
+        return hit[0]
+
+
+_lock = threading.Lock()
+_current: Optional[Taxonomy] = None
+_checked_at = 0.0
+
+
+def get(refresh: bool = False) -> Taxonomy:
+    """The process-wide snapshot, reloaded when the catalog version changes (or on refresh)."""
+    global _current, _checked_at
+    now = time.monotonic()
+    if not refresh and _current is not None and now - _checked_at < RECHECK_SECONDS:
+        return _current
+    with _lock:
+        version = catalog.current_version()
+        _checked_at = now
+        if refresh or _current is None or _current.version != version:
+            _current = Taxonomy(version)
+        return _current
+
+
+def reset():
+    global _current, _checked_at
+    with _lock:
+        _current, _checked_at = None, 0.0
@@ -1,3 +1,911 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import (
+    auth_backends, benchmarks, catalog, compression, dedup, entitlements, exam_sessions, facets, grading, hashing,
+    item_index, item_stats, jobs, live, metrics, rendering, reviews,
+)
+from .models import Classroom, Domain, ExamSession, Item, ItemStats, Job, Skill
+
+
+_tmp_dir = tempfile.TemporaryDirectory()
+_tmp_settings = override_settings(
+    ITEM_INDEX_PATH=os.path.join(_tmp_dir.name, "item_index.bin"),
+    CATALOG_DIR=os.path.join(_tmp_dir.name, "catalog"),
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "exam_sessions": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(_tmp_dir.name, "exam_sessions"),
+        },
+    },
+)
+
+
+def setUpModule():
+    # Imports rebuild the item index and may snapshot the catalog, exams write a file cache;
+    # keep all of them away from the real ones.
+    _tmp_settings.enable()
+
+
+def tearDownModule():
+    _tmp_settings.disable()
+    _tmp_dir.cleanup()
+    item_index.reset()
+
+
+def sat_payload(stem, options=("1", "2", "3", "4"), **extra):
+    """One entry in the import_sat_json input shape."""
+    payload = {
+        "program": "SAT",
+        "module": "math",
+        "difficulty": "M",
+        "primary_class_cd": "H",
+        "primary_class_cd_desc": "Algebra",
+        "skill_cd": "H.A.",
+        "skill_desc": "Linear equations in one variable",
+        "content": {
+            "stem": stem,
+            "rationale": "<p>Choice A is correct.</p>",
+            "answerOptions": [{"id": str(i), "content": f"<p>{o}</p>"} for i, o in enumerate(options)],
+            "correct_answer": ["A"],
+        },
+    }
+    payload.update(extra)
+    return payload
+
+
+def import_bank(bank, *args):
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(bank, f)
+    try:
+        call_command("import_sat_json", f.name, *args, stdout=io.StringIO())
+    finally:
+        os.unlink(f.name)
+
+
+class DedupTests(TestCase):
+    STEM = "<p>If 3x + 7 = 22, what is the value of x when the equation is solved for x?</p>"
+
+    def test_signature_similarity(self):
+        a = dedup.signature(dedup.item_text(self.STEM, ["5", "6"]))
+        b = dedup.signature(dedup.item_text(self.STEM.replace("<p>", "<p> "), ["5", "6"]))
+        c = dedup.signature(dedup.item_text("<p>Which choice best describes the passage?</p>", ["x"]))
+        self.assertEqual(dedup.similarity(a, b), 1.0)
+        self.assertLess(dedup.similarity(a, c), 0.3)
+
+    def test_large_duplicate_groups_are_clustered(self):
+        sig = dedup.signature(dedup.item_text(self.STEM, ["5", "6"]))
+        other = dedup.signature(dedup.item_text("<p>Which choice best describes the passage?</p>", ["x"]))
+        clusters = dedup.find_clusters([(i, sig) for i in range(600)] + [("a", other), ("b", other)])
+        self.assertEqual(sorted(len(c) for c in clusters), [2, 600])
+
+    def test_flag_duplicates_hides_them_from_list(self):
+        u1, u2, u3 = (str(uuid.uuid4()) for _ in range(3))
+        import_bank({
+            u1: sat_payload(self.STEM),
+            u2: sat_payload(self.STEM.replace("x?", "x ?")),
+            u3: sat_payload("<p>Which choice completes the text with the most logical transition?</p>"),
+        })
+        call_command("dedup_items", "--flag", stdout=io.StringIO())
+
+        flagged = Item.objects.filter(duplicate_of__isnull=False)
+        self.assertEqual(flagged.count(), 1)
+        self.assertNotEqual(str(flagged.get().uid), u3)
+
+        res = self.client.get("/api/items/")
+        self.assertEqual(res.json()["count"], 2)
+        res = self.client.get("/api/items/", {"include_duplicates": "1"})
+        self.assertEqual(res.json()["count"], 3)
+        # still retrievable by uid
+        res = self.client.get(f"/api/items/{flagged.get().uid}/")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["uid"], str(flagged.get().uid))
+
+
+class RenderingTests(TestCase):
+    def test_render_html_sanitizes_and_minifies(self):
+        html, text = rendering.render_html(
+            '<div style="x" onclick="evil()">\n  <p>Solve   <b>for</b> x<script>alert(1)</script></p>\n'
+            '  <p><math><mi>x</mi><mo>=</mo><mn>2</mn></math> <a href="javascript:evil()">link</a></p>'
+        )
+        self.assertEqual(
+            html, '<div><p>Solve <b>for</b> x</p><p><math><mi>x</mi><mo>=</mo><mn>2</mn></math> <a>link</a></p></div>'
+        )
+        self.assertEqual(text, "Solve for x\nx=2 link")
+
+    def test_import_serves_rendered_html(self):
+        uid = str(uuid.uuid4())
+        import_bank({uid: sat_payload("<p onmouseover='x()'>What   is x?</p>")})
+        res = self.client.get(f"/api/items/{uid}/").json()
+        self.assertEqual(res["stem"], "<p>What is x?</p>")
+        self.assertEqual(res["stem_text"], "What is x?")
+        self.assertEqual(res["answer_options"], ["<p>1</p>", "<p>2</p>", "<p>3</p>", "<p>4</p>"])
+
+    def test_markup_sanitized_to_nothing_is_not_served_raw(self):
+        uid = str(uuid.uuid4())
+        payload = sat_payload('<iframe src="javascript:alert(1)"></iframe>')
+        payload["content"]["rationale"] = '<iframe src="javascript:alert(1)"></iframe>'
+        import_bank({uid: payload})
+        res = self.client.get(f"/api/items/{uid}/").json()
+        self.assertEqual((res["stem"], res["rationale"]), ("", ""))
+
+    def test_list_reads_rendered_html_without_extra_queries(self):
+        import_bank({str(uuid.uuid4()): sat_payload(f"<p>Question   {i}</p>") for i in range(10)})
+        self.client.get("/api/items/")  # warm the catalog version and taxonomy caches
+        with self.assertNumQueries(3):  # validators, catalog version, page; none per row
+            res = self.client.get("/api/items/").json()
+        self.assertEqual(len(res["results"]), 10)
+        self.assertTrue(all(r["stem"].startswith("<p>Question ") for r in res["results"]))
+
+    def test_list_leaves_out_item_bodies_unless_full(self):
+        uid = str(uuid.uuid4())
+        import_bank({uid: sat_payload("<p>What is x?</p>")})
+        body = {"rationale", "stem_text", "rationale_text", "content"}
+        for url, included in (("/api/items/", False), ("/api/items/?full=1", True), (f"/api/items/{uid}/", True)):
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.get(url).json()
+            row = res["results"][0] if "results" in res else res
+            self.assertEqual(body <= row.keys(), included, url)
+            self.assertEqual(body & row.keys() == set(), not included, url)
+            page = [q["sql"] for q in ctx.captured_queries if '"api_itembody"' in q["sql"]]
+            self.assertEqual(len(page), 1, url)
+            self.assertEqual('"api_itembody"."content"' in page[0], included, url)
+            self.assertIn('"api_itembody"."stem_html"', page[0])
+
+
+class AssetTests(TestCase):
+    PNG = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+
+    def test_import_extracts_and_dedupes_assets(self):
+        svg = '<svg viewBox="0 0 10 10"><title>Graph "A" &amp; B</title><path d="M0 0L10 10"/></svg>'
+        img = f'<img src="data:image/png;base64,{self.PNG}">'
+        u1, u2 = str(uuid.uuid4()), str(uuid.uuid4())
+        with tempfile.TemporaryDirectory() as root, override_settings(ITEM_ASSET_ROOT=root):
+            import_bank({
+                u1: sat_payload(f"<p>Use the graph.</p>{svg}{img}"),
+                u2: sat_payload(f"<p>Same picture again.</p>{img}"),
+            })
+            files = sorted(os.listdir(root))
+            self.assertEqual([f.rsplit(".", 1)[1] for f in files], sorted(["png", "svg"]))
+            stem = self.client.get(f"/api/items/{u1}/").json()["stem"]
+            # served straight away from outside STATIC_ROOT
+            res = self.client.get(f"/api/assets/{files[0]}")
+            self.assertEqual(res.status_code, 200)
+            self.assertIn("immutable", res["Cache-Control"])
+            self.assertEqual(self.client.get("/api/assets/..%2Fsecret.png").status_code, 404)
+
+        self.assertNotIn("data:", stem)
+        self.assertNotIn("<svg", stem)
+        for name in files:
+            self.assertIn(f'src="/api/assets/{name}"', stem)
+        self.assertIn('alt="Graph &quot;A&quot; &amp; B"', stem)
+
+
+@override_settings(
+    MIDDLEWARE=["api.metrics.PerfMetricsMiddleware", *settings.MIDDLEWARE],
+    PERF_METRICS_ENABLED=True,
+    PERF_QUERY_BUDGET=1,
+)
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_server_timing_and_prometheus_histograms(self):
+        import_bank({str(uuid.uuid4()): sat_payload("<p>Solve for x.</p>")})
+        with self.assertLogs("api.metrics", "WARNING") as logs:
+            res = self.client.get("/api/items/")
+        self.assertRegex(res["Server-Timing"], r'db;dur=[\d.]+;desc="3 queries", ser;dur=[\d.]+')
+        self.assertIn("Possible N+1", logs.output[0])
+
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+        self.client.force_login(User.objects.create_user("ops", is_staff=True))
+        text = self.client.get("/api/metrics/").content.decode()
+        self.assertIn('api_request_queries_bucket{view="item-list",method="GET",le="5"} 1', text)
+        self.assertIn('api_request_duration_seconds_count{view="item-list",method="GET"} 1', text)
+
+    @override_settings(PERF_METRICS_TOKEN="s3cret")
+    def test_metrics_endpoint_accepts_scrape_token(self):
+        self.assertEqual(self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer nope").status_code, 403)
+        self.assertEqual(self.client.get("/api/metrics/", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+        self.client.force_login(User.objects.create_user("learner"))
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+    @override_settings(PERF_METRICS_ENABLED=False)
+    def test_metrics_endpoint_hidden_when_disabled(self):
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 404)
+
+
+class BenchmarkHelperTests(TestCase):
+    def test_synthetic_bank_imports(self):
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+            path = f.name
+        try:
+            benchmarks.write_bank(path, 30, seed=1)
+            call_command("import_sat_json", path, stdout=io.StringIO())
+        finally:
+            os.unlink(path)
+        self.assertEqual(Item.objects.count(), 30)
+
+    def test_compare_flags_slowdowns_and_extra_queries(self):
+        base = {"1k": {"list": {"median_ms": 10.0, "queries": 2}}}
+        self.assertEqual(benchmarks.compare({"1k": {"list": {"median_ms": 11.0, "queries": 2}}}, base, 0.25), [])
+        problems = benchmarks.compare({"1k": {"list": {"median_ms": 20.0, "queries": 3}}}, base, 0.25)
+        self.assertEqual(len(problems), 2)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        import_bank({
+            str(uuid.uuid4()): sat_payload("<p>Math one</p>"),
+            str(uuid.uuid4()): sat_payload("<p>Math two</p>"),
+            str(uuid.uuid4()): sat_payload("<p>Reading</p>", module="reading"),
+        })
+
+    def test_ndjson_export_honours_filters(self):
+        res = self.client.get("/api/items/export/", {"module": "math"})
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in b"".join(res.streaming_content).splitlines()]
+        self.assertEqual(sorted(r["stem"] for r in rows), ["<p>Math one</p>", "<p>Math two</p>"])
+
+    def test_gzipped_csv_export(self):
+        res = self.client.get("/api/items/export/", {"type": "csv", "compress": "gzip"}, HTTP_ACCEPT="text/csv")
+        self.assertEqual(res["Content-Type"], "application/gzip")
+        lines = gzip.decompress(b"".join(res.streaming_content)).decode().splitlines()
+        self.assertTrue(lines[0].startswith("uid,question_id,program,module"))
+        self.assertEqual(len(lines), 4)
+
+
+class BatchTests(TestCase):
+    def test_batch_keeps_order_and_reports_missing(self):
+        u1, u2, unknown = (str(uuid.uuid4()) for _ in range(3))
+        import_bank({u1: sat_payload("<p>One</p>"), u2: sat_payload("<p>Two</p>")})
+
+        with self.assertNumQueries(1):
+            res = self.client.post(
+                "/api/items/batch/", {"uids": [u2, unknown, u1, "not-a-uid"]}, content_type="application/json"
+            )
+        body = res.json()
+        self.assertEqual([r["uid"] for r in body["results"]], [u2, u1])
+        self.assertEqual(body["results"][0]["stem"], "<p>Two</p>")
+        self.assertEqual(body["missing"], [unknown, "not-a-uid"])
+
+        res = self.client.get("/api/items/batch/", {"uids": f"{u1},{u2}"})
+        self.assertEqual([r["uid"] for r in res.json()["results"]], [u1, u2])
+
+    def test_batch_limit(self):
+        uids = [str(uuid.uuid4()) for _ in range(501)]
+        res = self.client.post("/api/items/batch/", {"uids": uids}, content_type="application/json")
+        self.assertEqual(res.status_code, 400)
+
+
+class ItemIndexTests(TestCase):
+    def setUp(self):
+        item_index.reset()
+        self.uids = [str(uuid.uuid4()) for _ in range(4)]
+        import_bank({
+            self.uids[0]: sat_payload("<p>One</p>", difficulty="H"),
+            self.uids[1]: sat_payload("<p>Two</p>", difficulty="E"),
+            self.uids[2]: sat_payload("<p>Three</p>", module="reading", primary_class_cd="INI",
+                                      primary_class_cd_desc="Information and Ideas", skill_cd="CID"),
+            self.uids[3]: sat_payload("<p>No options</p>", options=()),
+        })
+
+    def test_filters_match_queryset(self):
+        index = item_index.get_index()
+        self.assertEqual(index.count, 4)
+        domain = Item.objects.get(uid=self.uids[2]).domain_id
+        for params in ({}, {"difficulty": "h"}, {"module": "Math"}, {"domain": domain},
+                       {"require_options": False}, {"module": "math", "difficulty": "E"}, {"module": "nope"},
+                       {"domain": 0}, {"domain": -1}):
+            res = self.client.get("/api/items/", {k: ("0" if v is False else v) for k, v in params.items()})
+            self.assertEqual(index.count_matching(**params), res.json()["count"], params)
+
+    def test_count_and_sample_endpoints(self):
+        res = self.client.get("/api/items/count/", {"module": "math"})
+        self.assertEqual(res.json(), {"count": 2, "source": "index"})
+        res = self.client.get("/api/items/count/", {"search": "Three"})
+        self.assertEqual(res.json(), {"count": 1, "source": "db"})
+        res = self.client.get("/api/items/count/", {"domain": "0"})
+        self.assertEqual(res.json(), {"count": 0, "source": "index"})
+
+        with self.assertNumQueries(1):
+            res = self.client.get("/api/items/sample/", {"n": 10})
+        self.assertEqual(sorted(r["uid"] for r in res.json()["results"]), sorted(self.uids[:3]))
+
+        # Stale index rows are skipped, not errors
+        Item.objects.filter(uid=self.uids[0]).delete()
+        res = self.client.get("/api/items/sample/", {"n": 10, "difficulty": "H"})
+        self.assertEqual(res.json()["results"], [])
+
+
+class StagedImportTests(TransactionTestCase):
+    def test_staged_import_swaps_and_rolls_back(self):
+        old, new = str(uuid.uuid4()), str(uuid.uuid4())
+        import_bank({old: sat_payload("<p>Old stem</p>")})
+        before = catalog.current_version()
+
+        import_bank({old: sat_payload("<p>Edited stem</p>"), new: sat_payload("<p>New</p>")}, "--staged")
+        self.assertEqual(catalog.current_version(), before + 1)
+        self.assertEqual(Item.objects.count(), 2)
+        self.assertEqual(Item.objects.get(uid=old).stem, "<p>Edited stem</p>")
+        self.assertEqual(Item.objects.get(uid=new).body.stem_text, "New")
+        self.assertFalse(catalog.staging_path().exists())
+
+        user = User.objects.create_user("learner")
+        reviews.record(user, {uuid.UUID(new): False}, now=timezone.now() - timedelta(days=1))
+
+        call_command("catalog", "--rollback", stdout=io.StringIO())
+        self.assertEqual(catalog.current_version(), before + 2)
+        self.assertEqual(list(Item.objects.values_list("stem", flat=True)), ["<p>Old stem</p>"])
+        self.assertEqual(Item.objects.get(uid=old).body.rationale, "<p>Choice A is correct.</p>")
+        # the schedule of the dropped item is kept but not served
+        self.assertEqual(reviews.due(user), [])
+
+        call_command("catalog", "--rollback", stdout=io.StringIO())  # redo
+        self.assertEqual([str(r.item_id) for r in reviews.due(user)], [new])
+
+    def staged_job(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({str(uuid.uuid4()): sat_payload("<p>Staged</p>")}, f)
+        self.addCleanup(os.unlink, f.name)
+        return jobs.claim("test", pk=jobs.enqueue("import_sat_json", path=f.name, staged=True).pk)
+
+    def test_cancelled_staged_import_stops_before_swap(self):
+        before = catalog.current_version()
+        job = self.staged_job()
+        jobs.cancel(job)
+        job = jobs.run(job)
+        self.assertEqual(job.status, Job.CANCELLED)
+        self.assertEqual((Item.objects.count(), catalog.current_version()), (0, before))
+        self.assertFalse(catalog.staging_path().exists())
+
+    def test_cancel_after_swap_still_succeeds(self):
+        job = self.staged_job()
+        swap_in = catalog.swap_in
+
+        def swap_then_cancel(*args, **kwargs):
+            version = swap_in(*args, **kwargs)
+            jobs.cancel(job)
+            return version
+
+        with mock.patch.object(catalog, "swap_in", side_effect=swap_then_cancel):
+            job = jobs.run(job)
+        self.assertEqual((job.status, job.done), (Job.SUCCEEDED, 1), job.message)
+        self.assertEqual(Item.objects.count(), 1)
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.uids = [str(uuid.uuid4()) for _ in range(3)]
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump({u: sat_payload(f"<p>Q{i}</p>") for i, u in enumerate(self.uids)}, f)
+        self.path = f.name
+        self.addCleanup(os.unlink, f.name)
+
+    def test_enqueue_run_and_report(self):
+        payload = {"kind": "import_sat_json", "params": {"path": self.path}}
+        res = self.client.post("/api/jobs/", payload, content_type="application/json")
+        self.assertEqual(res.status_code, 403)
+
+        self.client.force_login(User.objects.create_user("ops", is_staff=True))
+        res = self.client.post("/api/jobs/", payload, content_type="application/json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["status"], "queued")
+
+        call_command("run_jobs", "--once", stdout=io.StringIO())
+        job = self.client.get(f"/api/jobs/{res.json()['id']}/").json()
+        self.assertEqual((job["status"], job["done"], job["total"]), ("succeeded", 3, 3))
+        self.assertEqual(job["checkpoint"], {"next": 3})
+        self.assertEqual(Item.objects.count(), 3)
+
+    def test_cancel_and_resume_from_checkpoint(self):
+        job = jobs.enqueue("import_sat_json", path=self.path)
+        jobs.cancel(job)
+        self.assertEqual(job.status, Job.CANCELLED)
+
+        Job.objects.filter(pk=job.pk).update(done=2, checkpoint={"next": 2})
+        self.assertTrue(jobs.resume(job))
+        job = jobs.run(jobs.claim("test", pk=job.pk))
+        self.assertEqual(job.status, Job.SUCCEEDED, job.message)
+        self.assertEqual(list(Item.objects.values_list("uid", flat=True)), [uuid.UUID(self.uids[2])])
+
+    def test_worker_stops_once_job_is_taken_over(self):
+        job = jobs.claim("slow", pk=jobs.enqueue("import_sat_json", path=self.path).pk)
+        # stale heartbeat: another worker claims it
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=jobs.STALE_SECONDS + 1))
+        self.assertEqual(jobs.claim("fresh").pk, job.pk)
+        job = jobs.run(job)
+        self.assertEqual((job.status, job.worker), (Job.RUNNING, "fresh"))
+        self.assertEqual(Item.objects.count(), 0)
+
+
+class TaxonomyTests(TestCase):
+    def test_import_reuses_cached_rows_and_filters_by_code(self):
+        import_bank({str(uuid.uuid4()): sat_payload("<p>A</p>")})
+        import_bank({str(uuid.uuid4()): sat_payload("<p>B</p>", skill_desc="Renamed skill")})
+        self.assertEqual(Domain.objects.count(), 1)
+        self.assertEqual(list(Skill.objects.values_list("code", "name")), [("H.A.", "Renamed skill")])
+
+        res = self.client.get("/api/items/", {"domain": "H", "skill": "H.A."})
+        self.assertEqual(res.json()["count"], 2)
+        self.assertEqual(res.json()["results"][0]["skill_name"], "Renamed skill")
+        self.assertEqual(self.client.get("/api/items/", {"domain": "nope"}).json()["count"], 0)
+
+        with self.assertRaises(IntegrityError):
+            Domain.objects.create(code="H", name="Duplicate")
+
+
+class ConditionalGetTests(TestCase):
+    def test_item_and_list_revalidate(self):
+        uid = str(uuid.uuid4())
+        import_bank({uid: sat_payload("<p>Q</p>", updateDate=1700000000000)})
+
+        res = self.client.get(f"/api/items/{uid}/")
+        etag, modified = res["ETag"], res["Last-Modified"]
+        # the catalog version is newer than the item's update_date
+        self.assertNotEqual(modified, "Tue, 14 Nov 2023 22:13:20 GMT")
+        with self.assertNumQueries(2):
+            res = self.client.get(f"/api/items/{uid}/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+        res = self.client.get(f"/api/items/{uid}/", HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(self.client.get(f"/api/items/{uuid.uuid4()}/", HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+        list_etag = self.client.get("/api/items/", {"domain": "H"})["ETag"]
+        res = self.client.get("/api/items/", {"domain": "H"}, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, 304)
+        self.assertNotEqual(self.client.get("/api/items/", {"domain": "H", "page": 1})["ETag"], list_etag)
+
+        # a new stats fold moves Last-Modified too, not just the ETag
+        ItemStats.objects.create(item_id=uid, attempts=1, time_histogram=[])
+        ItemStats.objects.filter(item_id=uid).update(updated_at=timezone.now() + timedelta(seconds=5))
+        self.assertEqual(self.client.get(f"/api/items/{uid}/", HTTP_IF_MODIFIED_SINCE=modified).status_code, 200)
+
+        # a new import bumps the catalog version, so both tags change
+        import_bank({str(uuid.uuid4()): sat_payload("<p>Other</p>")})
+        self.assertEqual(self.client.get(f"/api/items/{uid}/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        res = self.client.get("/api/items/", {"domain": "H"}, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, 200)
+
+
+class AuthTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def register(self, email):
+        return self.client.post("/api/auth/register/", {"email": email, "password": "pw-12345!"},
+                                content_type="application/json")
+
+    def test_register_picks_free_username_and_login_by_email(self):
+        User.objects.create_user("sam", "other@example.com")
+        User.objects.create_user("sam2", "other2@example.com")
+        self.assertEqual(self.register("sam@Example.COM").json()["user"]["username"], "sam1")
+        self.assertEqual(self.register("sam@example.com").status_code, 400)
+        self.client.logout()
+
+        res = self.client.post("/api/auth/login/", {"email": "sam@example.com", "password": "pw-12345!"},
+                               content_type="application/json")
+        self.assertEqual(res.json()["user"]["email"], "sam@example.com")
+        res = self.client.post("/api/auth/login/", {"email": "sam@example.com", "password": "wrong"},
+                               content_type="application/json")
+        self.assertEqual(res.status_code, 401)
+
+    def test_login_matches_email_case_insensitively_on_the_index(self):
+        User.objects.create_user("bob", "Bob@Example.com", "pw-12345!")  # stored as typed (e.g. via the admin)
+        res = self.client.post("/api/auth/login/", {"email": "bob@example.com", "password": "pw-12345!"},
+                               content_type="application/json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.register("BOB@example.com").status_code, 400)
+        with connection.cursor() as cur:
+            sql, params = auth_backends.users_by_email("bob@example.com").query.sql_with_params()
+            cur.execute("EXPLAIN QUERY PLAN " + sql, params)
+            self.assertIn("auth_user_email_ci_uniq", str(cur.fetchall()))
+
+    def test_email_index_migration_lists_conflicts_instead_of_blanking(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        check = import_module("api.migrations.0012_auth_user_email_unique").check_unique_emails
+        with connection.cursor() as cur:
+            cur.execute("DROP INDEX auth_user_email_ci_uniq")  # rolled back with the test
+        User.objects.create_user("amy", "Amy@Example.com", last_login=timezone.now())
+        User.objects.create_user("amy2", "amy@example.com")
+        User.objects.create_user("lee", "lee@example.com")
+        with self.assertRaisesRegex(RuntimeError, r"amy@example\.com: 'amy' \(id \d+, Amy@example\.com\), 'amy2'") as ctx:
+            check(apps, None)
+        self.assertNotIn("lee", str(ctx.exception))
+        self.assertEqual(User.objects.filter(email="").count(), 0)
+
+    def test_me_is_served_from_cache_until_the_user_changes(self):
+        self.register("kim@example.com")
+        self.assertEqual(self.client.get("/api/auth/me/").json()["user"]["username"], "kim")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/auth/me/").json()["user"]["username"], "kim")
+
+        user = User.objects.get(username="kim")
+        user.set_password("changed")
+        user.save()
+        self.assertIsNone(self.client.get("/api/auth/me/").json()["user"])
+
+    @override_settings(LOGIN_THROTTLE=(100, 2, 60))
+    def test_login_throttled_per_email(self):
+        attempt = {"email": "x@example.com", "password": "nope"}
+        for _ in range(2):
+            self.assertEqual(self.client.post("/api/auth/login/", attempt, content_type="application/json").status_code, 401)
+        res = self.client.post("/api/auth/login/", attempt, content_type="application/json")
+        self.assertEqual(res.status_code, 429)
+        self.assertTrue(int(res["Retry-After"]) > 0)
+
+    def test_saturated_hash_pool_answers_503(self):
+        _, slots = hashing._pool()
+        held = 0
+        while slots.acquire(blocking=False):
+            held += 1
+        try:
+            res = self.register("busy@example.com")
+        finally:
+            for _ in range(held):
+                slots.release()
+        self.assertEqual(res.status_code, 503)
+        self.assertFalse(User.objects.filter(email="busy@example.com").exists())
+
+
+class GradingTests(TestCase):
+    def test_grid_in_equivalents(self):
+        key = grading.compile_key(["2/3"])
+        for answer in ["2/3", "4/6", ".6666", ".6667", "0.666", "0.667"]:
+            self.assertTrue(grading.grade(key, answer), answer)
+        # truncated/rounded decimals must fill the grid: ".666" leaves a column empty
+        for answer in [".67", "0.66", ".666", ".667", "00.666", ".6665", "3/2", "", None]:
+            self.assertFalse(grading.grade(key, answer), answer)
+        key = grading.compile_key(["3.5"], ["7/2"])
+        self.assertEqual(key, {"exact": ["7/2"]})
+        self.assertTrue(grading.grade(key, "3.50"))
+        self.assertTrue(grading.grade(grading.compile_key(["-1/3"]), "-.3333"))
+        self.assertFalse(grading.grade(grading.compile_key(["-1/3"]), "-.333"))
+        self.assertTrue(grading.grade(grading.compile_key(["37/3"]), "12.33"))
+        self.assertEqual(grading.compile_key(["b"]), {"choices": ["B"]})
+        self.assertIsNone(grading.grade({}, "A"))
+
+    def test_batch_grading_endpoint(self):
+        import_bank({
+            str(uuid.uuid4()): {"module": "math", "content": {"stem": "<p>mcq</p>", "answerOptions": ["1", "2"], "correct_answer": ["B"]}},
+            str(uuid.uuid4()): {"module": "math", "content": {"stem": "<p>spr</p>", "answerOptions": ["x"], "correct_answer": ["2/3"]}},
+            str(uuid.uuid4()): {"module": "math", "content": {"stem": "<p>nokey</p>", "answerOptions": ["1", "2"]}},
+        })
+        mcq, spr, nokey = (str(Item.objects.get(stem__contains=s).uid) for s in ("mcq", "spr", "nokey"))
+        responses = {mcq: "b", spr: "0.667", nokey: "1", "not-a-uid": "A"}
+        with self.assertNumQueries(1):
+            res = self.client.post("/api/items/grade/", {"responses": responses}, content_type="application/json")
+        body = res.json()
+        self.assertEqual(body["results"], {mcq: True, spr: True, nokey: None})
+        self.assertEqual((body["correct"], body["graded"], body["missing"]), (2, 2, ["not-a-uid"]))
+
+
+class ReviewTests(TestCase):
+    def setUp(self):
+        import_bank({
+            str(uuid.uuid4()): {"module": "math", "content": {"stem": f"<p>q{i}</p>", "answerOptions": ["1", "2"], "correct_answer": ["A"]}}
+            for i in range(3)
+        })
+        self.uids = [str(u) for u in Item.objects.order_by("stem").values_list("uid", flat=True)]
+        self.user = User.objects.create_user("rev", "rev@example.com", "pw-12345!")
+        self.client.force_login(self.user)
+
+    def test_session_reschedules_and_misses_come_due(self):
+        res = self.client.post("/api/reviews/", {"responses": {self.uids[0]: "B", self.uids[1]: "A"}},
+                               content_type="application/json")
+        self.assertEqual(res.json()["scheduled"], 2)
+        self.assertEqual(res.json()["results"][self.uids[1]]["interval"], 1)
+        self.assertEqual(self.client.get("/api/reviews/").json()["results"], [])
+
+        later = timezone.now() + timedelta(hours=1)
+        with self.assertNumQueries(1):
+            due = reviews.due(self.user, now=later)
+        self.assertEqual([str(s.item_id) for s in due], [self.uids[0]])
+
+        reviews.record(self.user, {due[0].item_id: True}, now=later)
+        state = reviews.record(self.user, {due[0].item_id: 5}, now=later + timedelta(days=1))[0]
+        self.assertEqual((state.repetitions, state.interval, state.lapses), (2, 6, 0))
+        self.assertEqual(self.user.reviews.count(), 2)
+
+    def test_rejects_bad_quality(self):
+        res = self.client.post("/api/reviews/", {"results": {self.uids[0]: 9}}, content_type="application/json")
+        self.assertEqual(res.status_code, 400)
+
+
+@override_settings(EXAM_SNAPSHOT_SECONDS=60)
+class ExamSessionTests(TestCase):
+    def setUp(self):
+        import_bank({
+            str(uuid.uuid4()): {"module": "math", "content": {"stem": f"<p>q{i}</p>", "answerOptions": ["1", "2"], "correct_answer": ["A"]}}
+            for i in range(2)
+        })
+        self.uids = [str(u) for u in Item.objects.order_by("stem").values_list("uid", flat=True)]
+        self.client.force_login(User.objects.create_user("exam", "exam@example.com", "pw-12345!"))
+        res = self.client.post("/api/exams/", {"items": self.uids, "duration": 3600}, content_type="application/json")
+        self.pk = res.json()["id"]
+
+    def save(self, answers, seq):
+        return self.client.post(f"/api/exams/{self.pk}/autosave/", {"answers": answers, "seq": seq},
+                                content_type="application/json")
+
+    def test_autosaves_coalesce_and_submit_grades(self):
+        with CaptureQueriesContext(connection) as queries:
+            for seq in range(1, 6):
+                self.assertEqual(self.save({self.uids[0]: "AB"[seq % 2]}, seq).status_code, 200)
+        self.assertFalse([q for q in queries if "api_examsession" in q["sql"]])
+        self.assertEqual(self.save({self.uids[0]: "B"}, 3).json()["seq"], 5)  # stale retry ignored
+        res = self.client.post(f"/api/exams/{self.pk}/autosave/", [1, 2], content_type="application/json")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(ExamSession.objects.get(pk=self.pk).seq, 0)
+
+        self.assertEqual(exam_sessions.flush(), {"saved": 1, "submitted": 0})
+        self.assertEqual(ExamSession.objects.get(pk=self.pk).answers, {self.uids[0]: "B"})
+
+        self.save({self.uids[1]: "A"}, 6)
+        res = self.client.post(f"/api/exams/{self.pk}/submit/", content_type="application/json").json()
+        self.assertEqual((res["score"], res["results"]), (1, {self.uids[0]: False, self.uids[1]: True}))
+        self.assertEqual(self.save({self.uids[0]: "A"}, 7).status_code, 409)
+        self.assertEqual(self.client.get(f"/api/exams/{self.pk}/").json()["score"], 1)
+
+    def test_stale_state_copies_neither_lose_saves_nor_reopen(self):
+        first, second = exam_sessions.get(self.pk), exam_sessions.get(self.pk)
+        exam_sessions.autosave(first, {self.uids[0]: "A"}, {})
+        exam_sessions.autosave(second, {self.uids[1]: "B"}, {})
+        self.assertEqual(exam_sessions.get(self.pk)["answers"], {self.uids[0]: "A", self.uids[1]: "B"})
+
+        late = exam_sessions.get(self.pk)
+        self.assertEqual(self.client.post(f"/api/exams/{self.pk}/submit/", [1], content_type="application/json")
+                         .status_code, 400)
+        exam_sessions.submit(exam_sessions.get(self.pk))
+        with self.assertRaises(exam_sessions.SessionClosed):
+            exam_sessions.autosave(late, {self.uids[0]: "B"}, {})
+        self.assertEqual(self.client.get(f"/api/exams/{self.pk}/").json()["status"], ExamSession.SUBMITTED)
+
+    def test_state_survives_cache_loss_from_snapshot(self):
+        self.save({self.uids[0]: "A"}, 1)
+        exam_sessions.flush()
+        caches["exam_sessions"].clear()
+        self.assertEqual(self.client.get(f"/api/exams/{self.pk}/").json()["answers"], {self.uids[0]: "A"})
+
+
+class ItemStatsTests(TestCase):
+    GRID = ["TTT", "TTF", "FTF", "FFT", "FFF", "TTT"]  # per student: q0 q1 q2
+
+    def setUp(self):
+        import_bank({str(uuid.uuid4()): sat_payload(f"<p>stat {i}</p>") for i in range(3)})
+        self.uids = [str(u) for u in Item.objects.order_by("stem").values_list("uid", flat=True)]
+        self.user = User.objects.create_user("stat", "stat@example.com", "pw-12345!")
+        for row in self.GRID:
+            self.submit({u: c == "T" for u, c in zip(self.uids, row)})
+
+    def submit(self, results):
+        ExamSession.objects.create(user=self.user, status=ExamSession.SUBMITTED, items=list(results),
+                                   results=results, timers={u: 40 for u in results})
+
+    def test_incremental_fold(self):
+        self.assertEqual(item_stats.update(), {"sessions": 6, "items": 3})
+        stats = Item.objects.get(uid=self.uids[0]).stats
+        self.assertEqual((stats.attempts, stats.p_value, stats.median_time), (6, 0.5, 37.5))
+        self.assertGreater(stats.discrimination, 0.5)
+        self.assertEqual(item_stats.update(), {"sessions": 0, "items": 0})
+
+        self.submit({self.uids[1]: False})
+        self.assertEqual(item_stats.update(), {"sessions": 1, "items": 1})
+        self.assertEqual(Item.objects.get(uid=self.uids[1]).stats.attempts, 7)
+
+        res = self.client.get("/api/items/?ordering=-stats__p_value").json()
+        self.assertEqual(res["results"][0]["uid"], self.uids[1])  # 4 of 7
+        self.assertEqual(res["results"][0]["stats"]["attempts"], 7)
+        res = self.client.get("/api/items/?p_value_max=0.5").json()
+        self.assertEqual({r["uid"] for r in res["results"]}, {self.uids[0], self.uids[2]})
+
+
+class ItemAdminTests(TestCase):
+    def setUp(self):
+        bank = {str(uuid.uuid4()): sat_payload(f"<p>admin {i}</p>", difficulty="E" if i % 3 else "H") for i in range(6)}
+        with self.captureOnCommitCallbacks(execute=True) as rebuilds:  # facets are rebuilt after the commit
+            import_bank(bank)
+        self.assertEqual(len(rebuilds), 1)
+        self.client.force_login(User.objects.create_superuser("root", "root@example.com", "pw-12345!"))
+
+    def test_changelist_reads_facets_not_distinct(self):
+        self.assertEqual(facets.values("difficulty"), [("E", 4), ("H", 2)])
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get("/admin/api/item/")
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, "E (4)")
+        sql = [q["sql"] for q in ctx.captured_queries]
+        self.assertFalse([q for q in sql if "DISTINCT" in q])
+        self.assertFalse([q for q in sql if 'COUNT(*)' in q and '"api_item"' in q and "WHERE" not in q])
+
+        res = self.client.get("/admin/api/item/?difficulty=H")
+        self.assertContains(res, "2 items")
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        import_bank({str(uuid.uuid4()): sat_payload(f"<p>wire {i}</p>") for i in range(20)})
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(compression.negotiate("gzip;q=0, identity"), None)
+        self.assertEqual(compression.negotiate("*"), compression.encodings()[0])
+        self.assertEqual(compression.negotiate(""), None)
+
+    def test_list_compressed_once_per_version(self):
+        plain = self.client.get("/api/items/")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        with mock.patch.object(compression, "encode", wraps=compression.encode) as encode:
+            for _ in range(3):
+                res = self.client.get("/api/items/", HTTP_ACCEPT_ENCODING="gzip")
+                self.assertEqual(res["Content-Encoding"], "gzip")
+                self.assertEqual(gzip.decompress(res.content), plain.content)
+            self.assertEqual(encode.call_count, 1)
+
+            import_bank({str(uuid.uuid4()): sat_payload("<p>wire new</p>")})
+            res = self.client.get("/api/items/", HTTP_ACCEPT_ENCODING="gzip")
+            self.assertEqual(json.loads(gzip.decompress(res.content))["count"], 21)
+            self.assertEqual(encode.call_count, 2)
+
+        # the browsable API's HTML (username, CSRF token) is neither compressed nor cached,
+        # and never served in place of the JSON body
+        self.client.force_login(User.objects.create_user("viewer", "viewer@example.com", "pw-12345!"))
+        res = self.client.get("/api/items/", HTTP_ACCEPT="text/html", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(res["Content-Type"].startswith("text/html"))
+        self.assertNotIn("Content-Encoding", res)
+        self.client.logout()
+        res = self.client.get("/api/items/", HTTP_ACCEPT="application/json", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertEqual(json.loads(gzip.decompress(res.content))["count"], 21)
+
+        # unsafe methods are never compressed
+        res = self.client.post("/api/auth/login/", {}, content_type="application/json", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", res)
+
+
+class FakeSocket:
+    """Drives api.live.websocket_application like an ASGI server would."""
+
+    def __init__(self, path, cookie):
+        self.inbox, self.outbox = asyncio.Queue(), asyncio.Queue()
+        scope = {"type": "websocket", "path": path,
+                 "headers": [(b"cookie", cookie.encode()), (b"host", b"testserver")]}
+        self.task = asyncio.ensure_future(live.websocket_application(scope, self.inbox.get, self.outbox.put))
+        self.inbox.put_nowait({"type": "websocket.connect"})
+
+    async def receive(self):
+        return await asyncio.wait_for(self.outbox.get(), 5)
+
+    async def close(self):
+        await self.inbox.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(self.task, 5)
+
+
+@override_settings(LIVE_PROGRESS_INTERVAL=0.01)
+class LiveProgressTests(TestCase):
+    def setUp(self):
+        import_bank({str(uuid.uuid4()): sat_payload(f"<p>live {i}</p>") for i in range(2)})
+        self.uids = [str(u) for u in Item.objects.order_by("stem").values_list("uid", flat=True)]
+        teacher = User.objects.create_user("teach", "teach@example.com", "pw-12345!")
+        self.student = User.objects.create_user("stu", "stu@example.com", "pw-12345!")
+        self.room = Classroom.objects.create(name="P1", teacher=teacher)
+        self.room.students.add(self.student)
+        self.state = exam_sessions.start(self.student, self.uids, 3600, classroom_id=self.room.pk)
+        exam_sessions.autosave(self.state, {self.uids[0]: "A"}, {})
+        self.client.force_login(teacher)
+        self.cookie = f"sessionid={self.client.cookies['sessionid'].value}"
+        self.path = f"/ws/classes/{self.room.pk}/progress/"
+
+    async def test_viewers_share_one_computation(self):
+        calls = []
+        compute = live.classroom_progress
+
+        def counted(*args):
+            calls.append(args[0])
+            return compute(*args)
+
+        with mock.patch.object(live, "classroom_progress", counted):
+            a, b = FakeSocket(self.path, self.cookie), FakeSocket(self.path, self.cookie)
+            self.assertEqual((await a.receive())["type"], "websocket.accept")
+            self.assertEqual((await b.receive())["type"], "websocket.accept")
+            first = json.loads((await a.receive())["text"])
+            self.assertEqual(json.loads((await b.receive())["text"]), first)
+            student = first["students"][0]
+            self.assertEqual((student["answered"], student["correct"], student["domains"]["H"]["accuracy"]), (1, 1, 1.0))
+
+            await sync_to_async(exam_sessions.autosave)(self.state, {self.uids[1]: "B"}, {})
+            for socket in (a, b):
+                self.assertEqual(json.loads((await socket.receive())["text"])["students"][0]["answered"], 2)
+            await a.close()
+            await b.close()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(live.rooms, {})
+
+    async def test_students_cannot_watch(self):
+        await sync_to_async(self.client.force_login)(self.student)
+        socket = FakeSocket(self.path, f"sessionid={self.client.cookies['sessionid'].value}")
+        self.assertEqual(await socket.receive(), {"type": "websocket.close", "code": 4403})
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET="whsec_test", ITEMS_REQUIRE_ENTITLEMENT=True)
+class EntitlementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("pat", "pat@example.com", "pw-12345!")
+        self.client.force_login(self.user)
+
+    def post_event(self, event, secret="whsec_test"):
+        body = json.dumps(event).encode("utf-8")
+        return self.client.post("/api/billing/webhook/", body, content_type="application/json",
+                                HTTP_STRIPE_SIGNATURE=entitlements.sign(body, secret))
+
+    def test_webhook_rejects_bad_signature(self):
+        event = entitlements.stub_event("customer.subscription.created", "pat@example.com")
+        self.assertEqual(self.post_event(event, secret="wrong").status_code, 400)
+
+    def test_gating_follows_webhooks_without_extra_queries(self):
+        self.assertEqual(self.client.get("/api/items/count/").status_code, 403)
+        event = entitlements.stub_event("customer.subscription.created", "Pat@Example.com")
+        self.assertTrue(self.post_event(event).json()["applied"])
+        self.assertFalse(self.post_event(event).json()["applied"])  # redelivery
+        self.assertEqual(self.client.get("/api/items/count/").status_code, 200)
+        self.assertTrue(self.client.get("/api/billing/entitlement/").json()["subscribed"])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/items/count/")
+        self.assertFalse([q for q in queries if "api_entitlement" in q["sql"]])  # served from the cache
+
+        self.post_event(entitlements.stub_event("customer.subscription.deleted", "pat@example.com"))
+        self.assertEqual(self.client.get("/api/items/count/").status_code, 403)
+
+    def test_subscription_event_before_checkout(self):
+        # Supabase checkout gives Stripe only a customer id, so the subscription event carries no email
+        early = entitlements.stub_event("customer.subscription.created", "", customer="cus_new")
+        self.assertEqual(self.post_event(early).status_code, 409)
+        checkout = {"id": "evt_checkout", "type": "checkout.session.completed", "created": early["created"],
+                    "data": {"object": {"customer": "cus_new", "customer_email": "pat@example.com",
+                                        "mode": "subscription", "payment_status": "paid", "subscription": "sub_1"}}}
+        self.assertTrue(self.post_event(checkout).json()["applied"])
+        self.assertTrue(entitlements.is_entitled(self.user))
+        # Stripe's redelivery of the early event now applies (it was not recorded as handled)
+        self.assertTrue(self.post_event(early).json()["applied"])
+        self.assertTrue(entitlements.status("pat@example.com")["until"])
+
+    def test_sync_from_provider(self):
+        provider = entitlements.StubProvider()
+        provider.subscribe("pat@example.com")
+        with override_settings(ENTITLEMENT_PROVIDER="api.tests.SyncProvider"):
+            SyncProvider.instance = provider
+            call_command("sync_entitlements", stdout=io.StringIO())
+        self.assertTrue(entitlements.is_entitled(self.user))
+
+
+class SyncProvider:
+    instance = None
+
+    def __new__(cls):
+        return cls.instance
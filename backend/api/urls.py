@@ -1,7 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AssessmentViewSet, TestViewSet, DomainViewSet, SkillViewSet, ItemViewSet
+from .views import (
+    AssessmentViewSet, TestViewSet, DomainViewSet, SkillViewSet, ItemViewSet, JobViewSet, ReviewViewSet,
+    ExamSessionViewSet,
+)
+from .assets import asset_view
 from .auth_views import login_view, register_view, logout_view, me_view, csrf_token_view
+from .billing_views import billing_webhook_view, entitlement_view
+from .metrics import metrics_view
 
 router = DefaultRouter()
 router.register(r"assessments", AssessmentViewSet, basename="assessment")
@@ -9,6 +15,9 @@ router.register(r"tests", TestViewSet, basename="test")
 router.register(r"domains", DomainViewSet, basename="domain")
 router.register(r"skills", SkillViewSet, basename="skill")
 router.register(r"items", ItemViewSet, basename="item")
+router.register(r"jobs", JobViewSet, basename="job")
+router.register(r"reviews", ReviewViewSet, basename="review")
+router.register(r"exams", ExamSessionViewSet, basename="exam")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -17,4 +26,8 @@ urlpatterns = [
     path("auth/logout/", logout_view, name="logout"),
     path("auth/me/", me_view, name="me"),
     path("auth/csrf/", csrf_token_view, name="csrf"),
+    path("billing/webhook/", billing_webhook_view, name="billing-webhook"),
+    path("billing/entitlement/", entitlement_view, name="entitlement"),
+    path("metrics/", metrics_view, name="metrics"),
+    path("assets/<str:name>", asset_view, name="item-asset"),
 ]
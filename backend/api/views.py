@@ -1,17 +1,95 @@
 # api/views.py
-from rest_framework import viewsets, filters
+import csv
+import hashlib
+import io
+import json
+import uuid
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import viewsets, filters, mixins, permissions, renderers, status
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
-from .models import Assessment, Test, Domain, Skill, Item
+from . import catalog, entitlements, exam_sessions, grading, item_index, jobs, reviews, taxonomy
+from .models import Assessment, Test, Domain, Skill, ExamSession, Item, Job
 from .serializers import (
     AssessmentSerializer,
     TestSerializer,
     DomainSerializer,
     SkillSerializer,
     ItemSerializer,
+    ItemSummarySerializer,
+    JobSerializer,
+    ReviewSerializer,
 )
 
+EXPORT_FIELDS = [
+    "uid", "question_id", "program", "module", "difficulty",
+    "primary_class_cd", "primary_class_desc", "score_band_range_cd",
+    "assessment", "test", "domain", "skill",
+    "stem", "external_id", "correct_answers", "answer_options",
+    "update_date", "create_date",
+]
+EXPORT_BUFFER_BYTES = 64 * 1024
+BATCH_MAX_UIDS = 500
+STATS_FILTERS = {
+    "min_attempts": "stats__attempts__gte",
+    "p_value_min": "stats__p_value__gte",
+    "p_value_max": "stats__p_value__lte",
+    "discrimination_min": "stats__discrimination__gte",
+    "median_time_max": "stats__median_time__lte",
+}
+
+
+class PassthroughRenderer(renderers.BaseRenderer):
+    """Lets streaming actions skip DRF content negotiation/rendering."""
+    media_type = "*/*"
+    format = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+def export_rows(qs, kind):
+    """Encode queryset rows as NDJSON or CSV text, in ~EXPORT_BUFFER_BYTES pieces."""
+    buf = io.StringIO()
+    writer = csv.writer(buf) if kind == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_FIELDS)
+    for row in qs.values_list(*EXPORT_FIELDS).iterator(chunk_size=2000):
+        row = dict(zip(EXPORT_FIELDS, row))
+        row["uid"] = str(row["uid"])
+        if writer:
+            row["correct_answers"] = json.dumps(row["correct_answers"])
+            row["answer_options"] = json.dumps(row["answer_options"])
+            writer.writerow(row.values())
+        else:
+            buf.write(json.dumps(row, ensure_ascii=False))
+            buf.write("\n")
+        if buf.tell() >= EXPORT_BUFFER_BYTES:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def gzip_stream(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = z.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield z.flush()
+
+
 class AssessmentViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Assessment.objects.all().order_by("name")
     serializer_class = AssessmentSerializer
@@ -32,50 +110,303 @@ class SkillViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = SkillSerializer
 
 
+class CountedPagination(PageNumberPagination):
+    """Reuses a row count the view already computed (view.filtered_count) instead of a COUNT query."""
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = DjangoPaginator(object_list, per_page)
+        if getattr(self, "known_count", None) is not None:
+            paginator.count = self.known_count
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.known_count = getattr(view, "filtered_count", None)
+        return super().paginate_queryset(queryset, request, view)
+
+
 class ItemViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Item.objects.all().order_by("create_date")
     serializer_class = ItemSerializer
+    pagination_class = CountedPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["stem", "question_id", "primary_class_desc"]
-    ordering_fields = ["create_date", "update_date", "difficulty"]
+    ordering_fields = [
+        "create_date", "update_date", "difficulty",
+        "stats__p_value", "stats__median_time", "stats__discrimination", "stats__attempts",
+    ]
+
+    def get_permissions(self):
+        # premium gating: an in-process cache hit per request (api.entitlements)
+        if settings.ITEMS_REQUIRE_ENTITLEMENT:
+            return [entitlements.HasEntitlement()]
+        return super().get_permissions()
+
+    def is_slim(self):
+        # lists leave out the ItemBody rationale/content unless asked for ?full=1; retrieve always has them
+        return self.action == "list" and self.request.query_params.get("full") not in ("1", "true", "True")
+
+    def get_serializer_class(self):
+        if self.is_slim():
+            return ItemSummarySerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
         qs = super().get_queryset()
         p = self.request.query_params
 
+        # rationale/content live in ItemBody; slim lists only need the rendered stem/options
+        qs = qs.select_related("body", "stats")
+        if self.is_slim():
+            qs = qs.defer(
+                "body__rationale", "body__content",
+                "body__stem_text", "body__rationale_html", "body__rationale_text",
+            )
+
+        params = self.filter_params()
+
         # Hide items with no answer options by default
-        require_options = p.get("require_options", "1")
-        if require_options in ("1", "true", "True"):
+        if params["require_options"]:
             qs = qs.exclude(answer_options__isnull=True).exclude(answer_options=[])
 
-        # Parse ints safely
-        def to_int(val):
+        # Hide items flagged as near-duplicates (manage.py dedup_items --flag) from listings;
+        # a flagged item stays retrievable by its uid (saved links, reviews, exam sessions)
+        if not params["include_duplicates"] and self.action != "retrieve":
+            qs = qs.filter(duplicate_of__isnull=True)
+
+        # an explicit id always filters, even 0 or an unknown name's -1 (no rows; same as the item index)
+        if params["assessment"] is not None:
+            qs = qs.filter(assessment_id=params["assessment"])
+        if params["test"] is not None:
+            qs = qs.filter(test_id=params["test"])
+        if params["domain"] is not None:
+            qs = qs.filter(domain_id=params["domain"])
+        if params["skill"] is not None:
+            qs = qs.filter(skill_id=params["skill"])
+        if params["module"]:
+            qs = qs.filter(module__iexact=params["module"])
+        if params["difficulty"]:
+            qs = qs.filter(difficulty__iexact=params["difficulty"])
+
+        # empirical stats (api.item_stats); indexed columns on ItemStats
+        for param, lookup in STATS_FILTERS.items():
+            value = p.get(param)
+            if value not in (None, ""):
+                try:
+                    qs = qs.filter(**{lookup: float(value)})
+                except ValueError:
+                    pass
+
+        return qs
+
+    def filter_params(self):
+        """
+        List filters from the query string (shared by the DB and item-index paths).
+        assessment/test/domain/skill take an id, or a name/code resolved through
+        the taxonomy cache (unknown names match nothing).
+        """
+        p = self.request.query_params
+        tax = taxonomy.get()
+
+        # Parse ints safely, falling back to a taxonomy lookup
+        def to_id(val, lookup):
+            if not val:
+                return None
             try:
                 return int(val)
-            except (TypeError, ValueError):
-                return None
+            except ValueError:
+                return lookup(val) or -1
 
-        assessment = to_int(p.get("assessment"))
-        test = to_int(p.get("test"))
-        domain = to_int(p.get("domain"))
-        skill = to_int(p.get("skill"))
-        module = p.get("module")
-        difficulty = p.get("difficulty")
-
-        if assessment:
-            qs = qs.filter(assessment_id=assessment)
-        if test:
-            qs = qs.filter(test_id=test)
-        if domain:
-            qs = qs.filter(domain_id=domain)
-        if skill:
-            qs = qs.filter(skill_id=skill)
-        if module:
-            qs = qs.filter(module__iexact=module)
-        if difficulty:
-            qs = qs.filter(difficulty__iexact=difficulty)
+        domain = to_id(p.get("domain"), tax.domain_id)
+        return {
+            "require_options": p.get("require_options", "1") in ("1", "true", "True"),
+            "include_duplicates": p.get("include_duplicates", "0") in ("1", "true", "True"),
+            "assessment": to_id(p.get("assessment"), tax.assessments.get),
+            "test": to_id(p.get("test"), tax.tests.get),
+            "domain": domain,
+            "skill": to_id(p.get("skill"), lambda code: tax.skill_id(code, domain)),
+            "module": p.get("module"),
+            "difficulty": p.get("difficulty"),
+        }
 
-        return qs
+    def indexed(self):
+        """The mapped item index, if it exists and can answer this request (no search or stats filters)."""
+        if self.request.query_params.get("search") or STATS_FILTERS.keys() & self.request.query_params.keys():
+            return None
+        return item_index.get_index()
+
+    def fetch_in_order(self, uids):
+        """Items for `uids` from one IN query, in the given order, skipping unknown UIDs."""
+        qs = Item.objects.filter(uid__in=uids).select_related("assessment", "test", "domain", "skill", "body", "stats")
+        found = {item.uid: item for item in qs}
+        return [found[uid] for uid in uids if uid in found]
+
+    # ---- conditional GET ----
+    @staticmethod
+    def last_modified(update_date, *changed_at):
+        """
+        Epoch seconds of the newest input to the body: the items' update_date
+        (epoch ms or s) and when the catalog (swap, rollback) or stats changed.
+        """
+        stamps = [dt.timestamp() for dt in changed_at if dt]
+        if update_date:
+            stamps.append(update_date / 1000 if update_date > 10**11 else update_date)
+        return int(max(stamps)) if stamps else None
+
+    def conditional(self, request, etag, last_modified, respond):
+        """
+        304 when If-None-Match/If-Modified-Since match `etag`/`last_modified`
+        (epoch seconds); otherwise build the response with respond() and tag it.
+        """
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+            # let clients store it but always revalidate
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            row = self.get_queryset().filter(pk=kwargs["pk"]).values_list("update_date", "stats__updated_at").first()
+        except DjangoValidationError:
+            row = None
+        if row is None:
+            raise Http404
+        updated, stats_at = row
+        version, version_at = catalog.current()
+        stats_tag = int(stats_at.timestamp() * 1e6) if stats_at else 0
+        etag = f'W/"{version}-{kwargs["pk"]}-{updated or 0}-{stats_tag}"'
+        return self.conditional(
+            request, etag, self.last_modified(updated, version_at, stats_at),
+            lambda: super(ItemViewSet, self).retrieve(request, *args, **kwargs),
+        )
+
+    def list(self, request, *args, **kwargs):
+        # count + max(update_date) + newest item stats over the filter, plus the query string (page, ordering, full)
+        stats = self.filter_queryset(self.get_queryset()).aggregate(
+            n=Count("pk"), last=Max("update_date"), stats_at=Max("stats__updated_at"),
+        )
+        self.filtered_count = stats["n"]
+        version, version_at = catalog.current()
+        key = f"{version}|{stats['n']}|{stats['last']}|{stats['stats_at']}|{request.GET.urlencode()}"
+        etag = f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]}"'
+        return self.conditional(
+            request, etag, self.last_modified(stats["last"], version_at, stats["stats_at"]),
+            lambda: super(ItemViewSet, self).list(request, *args, **kwargs),
+        )
+
+    @action(detail=False, methods=["get"])
+    def count(self, request):
+        """Number of items matching the list filters, from the item index when available."""
+        index = self.indexed()
+        if index is not None:
+            return Response({"count": index.count_matching(**self.filter_params()), "source": "index"})
+        return Response({"count": self.filter_queryset(self.get_queryset()).count(), "source": "db"})
+
+    @action(detail=False, methods=["get"])
+    def sample(self, request):
+        """
+        Random items matching the list filters (?n=, default 10, max BATCH_MAX_UIDS).
+        Sampling runs on the item index; only the picked rows are read from the DB.
+        """
+        try:
+            n = max(1, min(int(request.query_params.get("n", 10)), BATCH_MAX_UIDS))
+        except ValueError:
+            n = 10
+        index = self.indexed()
+        if index is not None:
+            items = self.fetch_in_order(index.sample(n, **self.filter_params()))
+        else:
+            items = list(self.filter_queryset(self.get_queryset()).order_by("?")[:n])
+        return Response({"results": self.get_serializer(items, many=True).data})
+
+    @action(detail=False, methods=["get", "post"])
+    def batch(self, request):
+        """
+        Fetch up to BATCH_MAX_UIDS items in one query: POST {"uids": [...]} or
+        GET ?uids=a,b,c. Results keep the requested order; unknown or malformed
+        UIDs are listed under "missing". List filters do not apply here.
+        """
+        if request.method == "POST":
+            raw = request.data.get("uids") if hasattr(request.data, "get") else None
+        else:
+            raw = [u for u in request.query_params.get("uids", "").split(",") if u.strip()]
+        if not isinstance(raw, list):
+            return Response({"detail": "Expected a list of item UIDs in 'uids'."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(raw) > BATCH_MAX_UIDS:
+            return Response({"detail": f"At most {BATCH_MAX_UIDS} UIDs per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        requested = {}
+        for value in dict.fromkeys(str(u).strip() for u in raw):
+            try:
+                requested[value] = uuid.UUID(value)
+            except ValueError:
+                requested[value] = None
+
+        items = self.fetch_in_order([u for u in requested.values() if u])
+        found = {item.uid for item in items}
+        missing = [value for value, uid in requested.items() if uid not in found]
+        data = self.get_serializer(items, many=True).data
+        return Response({"results": data, "missing": missing})
+
+    @action(detail=False, methods=["post"])
+    def grade(self, request):
+        """
+        Grade a whole submission against the compiled answer keys (api.grading):
+        POST {"responses": {uid: answer, ...}} (up to BATCH_MAX_UIDS). Results map
+        each UID to true/false, or null when the item has no usable key.
+        """
+        raw = request.data.get("responses") if hasattr(request.data, "get") else None
+        if not isinstance(raw, dict):
+            return Response({"detail": "Expected an object of UID -> answer in 'responses'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(raw) > BATCH_MAX_UIDS:
+            return Response({"detail": f"At most {BATCH_MAX_UIDS} UIDs per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        responses, missing = {}, []
+        for value, answer in raw.items():
+            try:
+                responses[uuid.UUID(str(value).strip())] = answer
+            except ValueError:
+                missing.append(value)
+        # one narrow query for every key in the submission, then pure in-memory grading
+        keys = dict(Item.objects.filter(uid__in=list(responses)).values_list("uid", "answer_key"))
+        missing += [str(uid) for uid in responses if uid not in keys]
+        results = grading.grade_batch(keys, {uid: a for uid, a in responses.items() if uid in keys})
+        graded = [r for r in results.values() if r is not None]
+        return Response({
+            "results": {str(uid): r for uid, r in results.items()},
+            "correct": sum(graded),
+            "graded": len(graded),
+            "missing": missing,
+        })
+
+    @action(detail=False, methods=["get"], renderer_classes=[PassthroughRenderer])
+    def export(self, request):
+        """
+        Stream every item matching the list filters (including search/ordering) as
+        NDJSON (default) or CSV via ?type=csv, without pagination or COUNT.
+        ?compress=gzip gzips the stream on the fly.
+        """
+        kind = "csv" if request.query_params.get("type") == "csv" else "ndjson"
+        qs = self.filter_queryset(self.get_queryset())
+
+        body = export_rows(qs, kind)
+        content_type = "text/csv; charset=utf-8" if kind == "csv" else "application/x-ndjson"
+        filename = f"items.{kind}"
+        if request.query_params.get("compress") == "gzip":
+            body = gzip_stream(body)
+            content_type = "application/gzip"
+            filename += ".gz"
+        else:
+            body = (chunk.encode("utf-8") for chunk in body)
+
+        response = StreamingHttpResponse(body, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
     @action(detail=False, methods=["get"])
     def modules(self, request):
@@ -95,3 +426,168 @@ class ItemViewSet(viewsets.ReadOnlyModelViewSet):
                 out.append(s)
         out.sort(key=str.lower)
         return Response(out)
+
+
+class JobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Background jobs (staff only). POST {"kind": "import_sat_json", "params": {"path": ...}}
+    to enqueue; `manage.py run_jobs` workers pick them up.
+    """
+    queryset = Job.objects.order_by("-id")
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = None
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.request.query_params.get("status"):
+            qs = qs.filter(status=self.request.query_params["status"])
+        return qs[:100] if self.action == "list" else qs
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        jobs.cancel(job)
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True, methods=["post"])
+    def resume(self, request, pk=None):
+        job = self.get_object()
+        if not jobs.resume(job):
+            return Response({"detail": f"Job is {job.status}; only failed or cancelled jobs can resume."},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(job).data)
+
+
+class ReviewViewSet(viewsets.ViewSet):
+    """
+    Spaced-repetition queue for the current user (api.reviews).
+    GET ?n=20 lists due items; POST {"results": {uid: true/false or 0-5}} or
+    {"responses": {uid: answer}} (graded against the answer keys) reschedules
+    a practice session.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        try:
+            n = max(1, min(int(request.query_params.get("n", 20)), BATCH_MAX_UIDS))
+        except ValueError:
+            return Response({"detail": "n must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        data = ReviewSerializer(reviews.due(request.user, n), many=True).data
+        return Response({"results": data})
+
+    def create(self, request):
+        results = request.data.get("results") if hasattr(request.data, "get") else None
+        responses = request.data.get("responses") if hasattr(request.data, "get") else None
+        if not isinstance(results or responses, dict):
+            return Response({"detail": "Expected 'results' or 'responses' as an object keyed by item UID."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        raw = results or responses
+        if len(raw) > BATCH_MAX_UIDS:
+            return Response({"detail": f"At most {BATCH_MAX_UIDS} UIDs per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        parsed = {}
+        for value, result in raw.items():
+            try:
+                parsed[uuid.UUID(str(value).strip())] = result
+            except ValueError:
+                continue
+        if responses and not results:
+            keys = dict(Item.objects.filter(uid__in=list(parsed)).values_list("uid", "answer_key"))
+            graded = grading.grade_batch(keys, {uid: a for uid, a in parsed.items() if uid in keys})
+            parsed = {uid: ok for uid, ok in graded.items() if ok is not None}
+        else:
+            if not all(isinstance(r, bool) or (isinstance(r, int) and 0 <= r <= 5) for r in parsed.values()):
+                return Response({"detail": "Results must be true/false or a 0-5 quality."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        states = reviews.record(request.user, parsed)
+        return Response({
+            "scheduled": len(states),
+            "results": {str(s.item_id): {"due_at": s.due_at, "interval": s.interval} for s in states},
+        })
+
+
+class ExamSessionViewSet(viewsets.ViewSet):
+    """
+    Timed mock exams for the current user (api.exam_sessions). Autosaves go to
+    the exam session cache and reach the database in periodic snapshots.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def payload(self, state):
+        data = {key: state[key] for key in ("id", "status", "items", "answers", "timers", "seq")}
+        data["remaining_seconds"] = exam_sessions.remaining(state)
+        return data
+
+    def get_state(self, pk):
+        try:
+            state = exam_sessions.get(int(pk))
+        except ValueError:
+            state = None
+        if state is None or state["user_id"] != self.request.user.id:
+            raise Http404
+        return state
+
+    def create(self, request):
+        raw = request.data.get("items") if hasattr(request.data, "get") else None
+        duration = request.data.get("duration") if hasattr(request.data, "get") else None
+        if not isinstance(raw, list) or not raw or len(raw) > BATCH_MAX_UIDS:
+            return Response({"detail": f"Expected 1-{BATCH_MAX_UIDS} item UIDs in 'items'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            items = list(dict.fromkeys(str(uuid.UUID(str(u).strip())) for u in raw))
+            duration = int(duration) if duration else None
+            classroom = int(request.data.get("classroom") or 0)
+        except (TypeError, ValueError):
+            return Response({"detail": "Invalid item UID, duration or classroom."}, status=status.HTTP_400_BAD_REQUEST)
+        if classroom and not request.user.classrooms.filter(pk=classroom).exists():
+            return Response({"detail": "Not a member of that class."}, status=status.HTTP_400_BAD_REQUEST)
+        state = exam_sessions.start(request.user, items, duration, classroom_id=classroom or None)
+        return Response(self.payload(state), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        state = self.get_state(pk)
+        data = self.payload(state)
+        if state["status"] == ExamSession.SUBMITTED:
+            data.update(ExamSession.objects.filter(pk=state["id"]).values("results", "score").get())
+        return Response(data)
+
+    @action(detail=True, methods=["post"])
+    def autosave(self, request, pk=None):
+        """POST {"answers": {uid: answer}, "timers": {uid: seconds}, "seq": n}; only changed entries are needed."""
+        state = self.get_state(pk)
+        answers = request.data.get("answers") or {} if hasattr(request.data, "get") else None
+        timers = request.data.get("timers") or {} if hasattr(request.data, "get") else None
+        seq = request.data.get("seq") if hasattr(request.data, "get") else None
+        if not isinstance(answers, dict) or not isinstance(timers, dict) or not (seq is None or isinstance(seq, int)):
+            return Response({"detail": "Expected 'answers'/'timers' objects and an integer 'seq'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            state = exam_sessions.autosave(state, answers, timers, seq)
+        except exam_sessions.SessionClosed:
+            return Response({"detail": "This exam session is closed."}, status=status.HTTP_409_CONFLICT)
+        except exam_sessions.SessionBusy:
+            return Response({"detail": "Busy, retry."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"seq": state["seq"], "saved_seq": state["saved_seq"],
+                         "remaining_seconds": exam_sessions.remaining(state)})
+
+    @action(detail=True, methods=["post"])
+    def submit(self, request, pk=None):
+        """POST with optional final {"answers": {...}, "timers": {...}} (same shape as autosave)."""
+        state = self.get_state(pk)
+        answers = request.data.get("answers") or {} if hasattr(request.data, "get") else None
+        timers = request.data.get("timers") or {} if hasattr(request.data, "get") else None
+        if not isinstance(answers, dict) or not isinstance(timers, dict):
+            return Response({"detail": "Expected 'answers'/'timers' objects."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if answers:
+                try:
+                    state = exam_sessions.autosave(state, answers, timers)
+                except exam_sessions.SessionClosed:
+                    pass  # late answers are dropped; grade what was saved in time
+            session = exam_sessions.submit(state)
+        except exam_sessions.SessionBusy:
+            return Response({"detail": "Busy, retry."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({"id": session.pk, "status": session.status, "score": session.score,
+                         "results": session.results})
@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.live import websocket_application  # noqa: E402  (needs the app registry loaded above)
+
+
+async def application(scope, receive, send):
+    """Websockets (/ws/classes/<id>/progress/) go to api.live, everything else to Django."""
+    if scope["type"] == "websocket":
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,6 +46,10 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.metrics.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 25,
 }
@@ -61,6 +66,91 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# gzip/brotli for API responses, negotiated per request (api.compression);
+# compressed bodies of ETagged responses are cached per catalog version.
+API_COMPRESSION = os.environ.get("API_COMPRESSION", "1") in ("1", "true", "True")
+API_COMPRESSION_MIN_BYTES = 512
+API_COMPRESSION_CACHE = "default"
+API_COMPRESSION_CACHE_MAX_BYTES = 1024 * 1024
+if API_COMPRESSION:
+    MIDDLEWARE.insert(1, "api.compression.CompressionMiddleware")
+
+# Per-request timing (Server-Timing header, /api/metrics/, N+1 warnings).
+# Off by default; when off the middleware is not installed at all. Installed
+# outside compression, so it times it and sees the bytes on the wire.
+PERF_METRICS_ENABLED = os.environ.get("PERF_METRICS", "") in ("1", "true", "True")
+PERF_QUERY_BUDGET = int(os.environ.get("PERF_QUERY_BUDGET", "20"))
+# /api/metrics/ is served to staff sessions, or to scrapers sending "Authorization: Bearer <token>"
+PERF_METRICS_TOKEN = os.environ.get("PERF_METRICS_TOKEN", "")
+if PERF_METRICS_ENABLED:
+    MIDDLEWARE.insert(1, "api.metrics.PerfMetricsMiddleware")
+
+# Item admin: facet-table filters and estimated changelist counts instead of
+# DISTINCT scans and exact COUNTs over the whole bank (api.admin).
+ADMIN_PERFORMANCE_MODE = os.environ.get("ADMIN_PERFORMANCE_MODE", "1") in ("1", "true", "True")
+
+# Email logins (unique lower(auth_user.email) index) first; username logins for the admin
+AUTHENTICATION_BACKENDS = [
+    "api.auth_backends.EmailBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
+# Password hashing runs on a small per-process pool (api.hashing): at most
+# HASH_WORKERS hashes at once, HASH_QUEUE_MAX waiting; beyond that login and
+# register answer 503 straight away.
+HASH_WORKERS = int(os.environ.get("HASH_WORKERS", "2"))
+HASH_QUEUE_MAX = int(os.environ.get("HASH_QUEUE_MAX", "8"))
+HASH_TIMEOUT = 10
+# Login/register attempts per (IP, email) per window in seconds (429 beyond).
+# The IP limit is generous because a classroom often shares one address.
+LOGIN_THROTTLE = (60, 10, 60)
+TRUST_X_FORWARDED_FOR = os.environ.get("TRUST_X_FORWARDED_FOR", "") in ("1", "true", "True")
+
+# Premium gating from the local entitlement store (api.entitlements), fed by
+# Stripe webhooks at /api/billing/webhook/. Off until the webhook is wired up.
+ITEMS_REQUIRE_ENTITLEMENT = os.environ.get("ITEMS_REQUIRE_ENTITLEMENT", "") in ("1", "true", "True")
+ENTITLEMENT_CACHE_SECONDS = 300
+ENTITLEMENT_PROVIDER = os.environ.get("ENTITLEMENT_PROVIDER", "api.entitlements.StripeProvider")
+STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY", "")
+STRIPE_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET", "")
+
+# Sessions are read through the cache (written through to the DB). With more
+# than one worker process set REDIS_URL so logouts are seen by every worker.
+# In-progress exam sessions (api.exam_sessions) use their own cache: a file
+# cache shared by the workers on this host, or Redis. Autosaves reach the DB
+# in snapshots at most every EXAM_SNAPSHOT_SECONDS per session.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        },
+        "exam_sessions": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+            "KEY_PREFIX": "exam",
+        },
+    }
+else:
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "exam_sessions": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("EXAM_SESSION_DIR", str(BASE_DIR / "exam_sessions")),
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        },
+    }
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+EXAM_SESSION_CACHE = "exam_sessions"
+EXAM_SNAPSHOT_SECONDS = 30
+
+# Live class progress over websockets (api.live, served by backend.asgi):
+# recomputed at most every LIVE_PROGRESS_INTERVAL seconds per watched class
+# when its sessions changed, and at least every LIVE_PROGRESS_MAX_AGE.
+LIVE_CHANNEL_LAYER = "api.live.InMemoryChannelLayer"
+LIVE_PROGRESS_INTERVAL = 2.0
+LIVE_PROGRESS_MAX_AGE = 15
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
@@ -83,6 +173,19 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Content-addressed images/SVGs extracted from items at import time (api.assets),
+# kept outside STATIC_ROOT and served by api.assets.asset_view, so assets from
+# a running import are served at once and collectstatic never deletes them.
+# Set ITEM_ASSET_URL to an absolute URL when the frontend runs on another origin.
+ITEM_ASSET_ROOT = Path(os.environ.get("ITEM_ASSET_ROOT", BASE_DIR / "item_assets"))
+ITEM_ASSET_URL = os.environ.get("ITEM_ASSET_URL", "/api/assets/")
+
+# Memory-mapped item metadata snapshot rebuilt after imports (api.item_index)
+ITEM_INDEX_PATH = Path(os.environ.get("ITEM_INDEX_PATH", BASE_DIR / "item_index.bin"))
+
+# Staging copy and rollback snapshot for `import_sat_json --staged` (api.catalog)
+CATALOG_DIR = Path(os.environ.get("CATALOG_DIR", BASE_DIR / "catalog"))
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
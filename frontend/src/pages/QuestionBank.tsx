@@ -65,7 +65,8 @@ export default function QuestionBank() {
   );
 
   const fetchFirstPage = useCallback(async (extraParams: Record<string, any> = {}) => {
-    const params = { limit: PAGE_SIZE, ...(debouncedPrimaryClass ? { primary_class_desc: debouncedPrimaryClass } : {}), ...extraParams };
+    // full=1: the quiz shows each item's rationale
+    const params = { limit: PAGE_SIZE, full: 1, ...(debouncedPrimaryClass ? { primary_class_desc: debouncedPrimaryClass } : {}), ...extraParams };
     return ExamAPI.listItems(params);
   }, [debouncedPrimaryClass]);
 